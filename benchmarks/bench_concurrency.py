@@ -0,0 +1,149 @@
+"""Mixed read/write concurrency on SQLite: rollback journal vs tuned WAL.
+
+Runs gunicorn twice on fresh database files:
+
+    before  journal_mode=DELETE, synchronous=FULL, default page cache, no mmap
+    after   the defaults: WAL, synchronous=NORMAL, 64 MiB cache, 256 MiB mmap
+
+Reader processes alternate GET /api/assets?limit=50 and GET
+/api/dashboard/metrics while writer processes create assets through
+POST /api/assets. Throughput, read p95 latency and errors (including
+"database is locked") are reported per run.
+
+Usage:
+    python benchmarks/bench_concurrency.py [--readers 6] [--writers 2] [--duration 10]
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from bench_load import ROOT, free_port, login, wait_until_ready
+
+MODES = {
+    "before": {
+        "IIMS_SQLITE_JOURNAL_MODE": "DELETE",
+        "IIMS_SQLITE_SYNCHRONOUS": "FULL",
+        "IIMS_SQLITE_CACHE_SIZE": "-2000",
+        "IIMS_SQLITE_MMAP_SIZE": "0",
+    },
+    "after": {},
+}
+READ_PATHS = ["/api/assets?limit=50", "/api/dashboard/metrics"]
+
+
+def reader(port, token, duration):
+    headers = {"Authorization": f"Bearer {token}"}
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    index = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        connection.request("GET", READ_PATHS[index % len(READ_PATHS)], headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+        index += 1
+    return "read", latencies, errors
+
+
+def writer(port, token, duration):
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors = [], 0
+    prefix = uuid.uuid4().hex[:8]
+    deadline = time.monotonic() + duration
+    index = 0
+    while time.monotonic() < deadline:
+        body = json.dumps({
+            "action": "create",
+            "assetId": f"CONC-{prefix}-{index:06d}",
+            "assetType": "Laptop",
+            "assignedUser": "Bench User",
+            "purchaseDate": "2024-01-01",
+            "warrantyExpiryDate": "2027-01-01",
+        })
+        started = time.perf_counter()
+        connection.request("POST", "/api/assets", body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status == 201:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+        index += 1
+    return "write", latencies, errors
+
+
+def run(mode, readers, writers, duration, workers, threads):
+    port = free_port()
+    database_path = os.path.join(tempfile.mkdtemp(prefix="iims-bench-"), f"{mode}.db")
+    env = dict(
+        os.environ,
+        IIMS_DATABASE_URL=f"sqlite:///{database_path}",
+        IIMS_BIND=f"127.0.0.1:{port}",
+        IIMS_WORKERS=str(workers),
+        IIMS_THREADS=str(threads),
+        IIMS_SECRET_KEY="bench-concurrency",
+        IIMS_ACCESS_LOG="",
+        **MODES[mode],
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "server:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(port)
+        token = login(port)
+        with ProcessPoolExecutor(max_workers=readers + writers) as pool:
+            futures = [pool.submit(reader, port, token, duration) for _ in range(readers)]
+            futures += [pool.submit(writer, port, token, duration) for _ in range(writers)]
+            results = [future.result() for future in futures]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    summary = {}
+    for kind in ("read", "write"):
+        latencies = [value for result in results if result[0] == kind for value in result[1]]
+        errors = sum(result[2] for result in results if result[0] == kind)
+        p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) >= 20 else float("nan")
+        summary[kind] = (len(latencies) / duration, p95, errors)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.workers} workers x {args.threads} threads, "
+          f"{args.duration:.0f}s per run")
+    print(f"{'mode':<7} {'reads/s':>9} {'read p95 ms':>12} {'read err':>9} {'writes/s':>9} {'write p95 ms':>13} {'write err':>10}")
+    for mode in MODES:
+        summary = run(mode, args.readers, args.writers, args.duration, args.workers, args.threads)
+        reads, writes = summary["read"], summary["write"]
+        print(f"{mode:<7} {reads[0]:9.1f} {reads[1]:12.1f} {reads[2]:9d} {writes[0]:9.1f} {writes[1]:13.1f} {writes[2]:10d}")
+
+
+if __name__ == "__main__":
+    main()
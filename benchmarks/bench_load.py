@@ -0,0 +1,127 @@
+"""Load test: requests per second against gunicorn as the worker count grows.
+
+For each worker count a gunicorn server is started with ``gunicorn.conf.py``
+on a temporary SQLite database. Client processes then issue keep-alive GET
+requests against the dashboard and a page of assets for a fixed duration.
+
+Usage:
+    python benchmarks/bench_load.py [--workers 1 2 4] [--threads 4] [--clients 8] [--duration 10]
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ["/api/dashboard/metrics", "/api/assets?limit=50"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port, deadline=30.0):
+    started = time.monotonic()
+    while time.monotonic() - started < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", PATHS[0])
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def client(port, token, duration):
+    """Issue keep-alive requests until the duration elapses; return (ok, errors)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    ok = errors = 0
+    deadline = time.monotonic() + duration
+    index = 0
+    while time.monotonic() < deadline:
+        try:
+            connection.request("GET", PATHS[index % len(PATHS)], headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                ok += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        index += 1
+    connection.close()
+    return ok, errors
+
+
+def login(port):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    body = json.dumps({"username": "itstaff", "password": "it123"})
+    connection.request("POST", "/api/auth/login", body=body, headers={"Content-Type": "application/json"})
+    return json.loads(connection.getresponse().read())["token"]
+
+
+def run(workers, threads, clients, duration, database_url):
+    port = free_port()
+    env = dict(
+        os.environ,
+        IIMS_DATABASE_URL=database_url,
+        IIMS_BIND=f"127.0.0.1:{port}",
+        IIMS_WORKERS=str(workers),
+        IIMS_THREADS=str(threads),
+        IIMS_SECRET_KEY="bench-load",
+        IIMS_ACCESS_LOG="",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "server:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(port)
+        token = login(port)
+        with ProcessPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(client, [port] * clients, [token] * clients, [duration] * clients))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    ok = sum(result[0] for result in results)
+    errors = sum(result[1] for result in results)
+    return ok / duration, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='iims-bench-'), 'bench.db')}"
+    print(f"{os.cpu_count()} CPUs, {args.threads} threads/worker, {args.clients} clients, {args.duration:.0f}s per run")
+    print(f"{'workers':>7} {'req/s':>10} {'errors':>7}")
+    baseline = None
+    for workers in args.workers:
+        rate, errors = run(workers, args.threads, args.clients, args.duration, database_url)
+        baseline = baseline or rate
+        print(f"{workers:>7} {rate:10.1f} {errors:>7}  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
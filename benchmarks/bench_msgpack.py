@@ -0,0 +1,115 @@
+"""Response encoding: JSON (``jsonify``) vs MessagePack negotiated through ``Accept``.
+
+Seeds a temporary database with ``--rows`` assets, hardware health records
+and network devices, then fetches the lists automation clients poll, once
+as JSON and once with ``Accept: application/msgpack``:
+
+    /api/monitoring/hardware    /api/monitoring/network    /api/assets
+    /api/assets?limit=1000      (one page, built by jsonify rather than streamed)
+
+For each it reports the best of ``--repeat`` server times (request through
+the last body byte, in-process via the test client, so including the
+query), the time to encode the decoded payload on its own, the bytes on the
+wire and the client's time to decode the body. The JSON encoder is whichever
+provider ``IIMS_JSON_BACKEND`` selects (orjson when installed).
+
+Usage:
+    python benchmarks/bench_msgpack.py [--rows 50000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URLS = ["/api/monitoring/hardware", "/api/monitoring/network", "/api/assets", "/api/assets?limit=1000"]
+
+
+def build_database(path, rows):
+    env = dict(os.environ, IIMS_DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "server", "schema", "upgrade"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+    checked = datetime(2025, 1, 1)
+    today = date(2025, 1, 1)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO assets (asset_id, asset_type, assigned_user, purchase_date, warranty_expiry_date, "
+            "status, department) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"BENCH-{i:07d}", ["Laptop", "Desktop", "Monitor"][i % 3], f"User {i % 1000:04d}",
+                 (today - timedelta(days=i % 1000)).isoformat(), (today + timedelta(days=i % 900)).isoformat(),
+                 "Active", ["IT", "HR", "Sales"][i % 3])
+                for i in range(rows)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO hardware_health_records (device_id, cpu_load, memory_util, is_overheating, last_check) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (f"HW-{i:07d}", i % 100, (i * 7) % 100, i % 17 == 0,
+                 (checked - timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S.%f"))
+                for i in range(rows)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO network_devices (device_id, bandwidth_mb, is_downtime, abnormal_traffic) VALUES (?, ?, ?, ?)",
+            ((f"NET-{i:07d}", (i * 13) % 1000, i % 23 == 0, i % 31 == 0) for i in range(rows)),
+        )
+
+
+def best_time(func, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="iims-bench-"), "bench.db")
+    build_database(path, args.rows)
+    os.environ.update(IIMS_DATABASE_URL=f"sqlite:///{path}", IIMS_DATABASE_INIT="manual")
+    sys.path.insert(0, ROOT)
+    from server import create_app, msgpack
+
+    if msgpack is None:
+        sys.exit("msgpack is not installed: pip install msgpack")
+    app = create_app()
+    client = app.test_client()
+    client.post("/api/auth/login", json={"username": "itstaff", "password": "it123"})
+    with app.app_context():
+        dumps = app.json.dumps
+    encodings = [
+        ("json", {"Accept": "application/json"}, lambda obj: dumps(obj, separators=(",", ":")), json.loads),
+        ("msgpack", {"Accept": "application/msgpack"}, msgpack.packb, msgpack.unpackb),
+    ]
+
+    print(f"{args.rows:,} rows per table, best of {args.repeat}, JSON provider {type(app.json).__name__}")
+    print(f"{'url':<26} {'encoding':<8} {'server ms':>10} {'encode ms':>10} {'bytes':>12} {'size':>6} {'decode ms':>10}")
+    for url in URLS:
+        baseline_bytes = None
+        for name, headers, encode, decode in encodings:
+            seconds, body = best_time(lambda: client.get(url, headers=headers).get_data(), args.repeat)
+            decode_seconds, payload = best_time(lambda: decode(body), args.repeat)
+            with app.app_context():
+                encode_seconds, _ = best_time(lambda: encode(payload), args.repeat)
+            baseline_bytes = baseline_bytes or len(body)
+            print(f"{url:<26} {name:<8} {seconds * 1000:10.1f} {encode_seconds * 1000:10.1f} {len(body):12,} "
+                  f"{len(body) / baseline_bytes:5.0%} {decode_seconds * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Serialization throughput: ORM ``to_dict()`` vs column tuples, stdlib json vs orjson.
+
+Seeds a temporary database with ``--rows`` assets and audit log entries,
+then times three ways of turning a full table into a JSON array:
+
+    to_dict       the old path: hydrate ORM objects, call ``to_dict()``
+                  (attribute access + ``strftime``), encode with the stdlib
+    rows          ``ROW_SERIALIZERS``: select only the needed columns as
+                  tuples with dates trimmed in SQL, encode with the stdlib
+    rows+orjson   the same rows encoded by ``OrjsonProvider`` (skipped when
+                  orjson is not installed)
+
+Reports the best of ``--repeat`` runs in rows per second.
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 100000] [--repeat 3]
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_database(path, rows):
+    env = dict(os.environ, IIMS_DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "server", "schema", "upgrade"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+    started = datetime(2024, 1, 1)
+    today = date(2025, 1, 1)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO assets (asset_id, asset_type, assigned_user, purchase_date, warranty_expiry_date, "
+            "status, department) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"BENCH-{i:07d}", ["Laptop", "Desktop", "Monitor"][i % 3], f"User {i % 1000:04d}",
+                 (today - timedelta(days=i % 1000)).isoformat(), (today + timedelta(days=i % 900)).isoformat(),
+                 "Active", ["IT", "HR", "Sales"][i % 3])
+                for i in range(rows)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO audit_logs (timestamp, user_role, action, details) VALUES (?, ?, ?, ?)",
+            (
+                ((started + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S.%f"), "Admin", "UPDATE",
+                 f"Benchmark entry {i}")
+                for i in range(rows)
+            ),
+        )
+
+
+def best_rate(func, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="iims-bench-"), "bench.db")
+    build_database(path, args.rows)
+    os.environ.update(IIMS_DATABASE_URL=f"sqlite:///{path}", IIMS_DATABASE_INIT="manual")
+    sys.path.insert(0, ROOT)
+    from flask.json.provider import DefaultJSONProvider
+
+    from server import ROW_SERIALIZERS, Asset, AuditLog, OrjsonProvider, create_app, db, orjson
+
+    app = create_app({"JSON_BACKEND": "json"})
+    providers = {"json": DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(app)
+
+    print(f"{args.rows:,} rows per table, best of {args.repeat}")
+    print(f"{'table':<12} {'path':<12} {'rows/s':>12} {'speedup':>8}")
+    with app.app_context():
+        for model in (Asset, AuditLog):
+            query = model.query.order_by(model.id)
+            serializer = ROW_SERIALIZERS[model]
+
+            def orm_path():
+                db.session.expunge_all()
+                providers["json"].dumps([record.to_dict() for record in query.all()], separators=(",", ":"))
+
+            def rows_path(provider):
+                columns, convert = serializer.prepare()
+                provider.dumps(convert(query.with_entities(*columns).all()), separators=(",", ":"))
+
+            paths = [("to_dict", orm_path), ("rows", lambda: rows_path(providers["json"]))]
+            if "orjson" in providers:
+                paths.append(("rows+orjson", lambda: rows_path(providers["orjson"])))
+            baseline = None
+            for name, func in paths:
+                rate = best_rate(func, args.rows, args.repeat)
+                baseline = baseline or rate
+                print(f"{model.__tablename__:<12} {name:<12} {rate:12,.0f} {rate / baseline:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Worker startup: import-to-first-response latency.
+
+Each run starts a fresh interpreter against an already deployed database and
+measures the time to import ``server`` and the time until the first
+``GET /api/dashboard/metrics`` response. Modes:
+
+    eager   replays the old import-time work (migrate + seed probes) before
+            the first request, as every worker used to do
+    lazy    the default: nothing at import, one schema version read on the
+            first request
+    manual  IIMS_DATABASE_INIT=manual: schema managed by the deploy step, no
+            initialization work in the worker at all
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import json, sys, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+if sys.argv[1] == "eager":
+    with server.app.app_context():
+        server.initialize_database()
+        server.seed_initial_data()
+response = server.app.test_client().get("/api/dashboard/metrics")
+assert response.status_code == 200, response.status_code
+finished = time.perf_counter()
+print(json.dumps({"import": imported - started, "firstResponse": finished - started}))
+"""
+
+
+def run_worker(mode, env):
+    worker_env = dict(env, IIMS_DATABASE_INIT="manual" if mode == "manual" else "lazy")
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER, mode],
+        cwd=ROOT,
+        env=worker_env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp(prefix="iims-bench-")
+    env = dict(
+        os.environ,
+        IIMS_DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'bench.db')}",
+        IIMS_AUDIT_MODE="sync",
+    )
+    # Deploy step: create, migrate and seed the database once
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "server", "schema", "upgrade"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+
+    print(f"{'mode':<8} {'import ms':>10} {'first response ms':>18}")
+    for mode in ("eager", "lazy", "manual"):
+        samples = [run_worker(mode, env) for _ in range(args.runs)]
+        import_ms = statistics.median(sample["import"] for sample in samples) * 1000
+        first_ms = statistics.median(sample["firstResponse"] for sample in samples) * 1000
+        print(f"{mode:<8} {import_ms:10.1f} {first_ms:18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Peak memory of a large list response: buffered jsonify vs streamed JSON array.
+
+Builds a temporary database with ``--rows`` audit log entries (1M by default),
+then serves ``GET /api/audit-log`` once per mode in a fresh interpreter:
+
+    buffered  the old path: every row as an ORM object, then a list of dicts,
+              then one encoded string, all alive at the same time
+    streamed  the default: ``yield_per`` batches encoded into ~64 KiB chunks
+
+Each worker reads the body chunk by chunk, sampling RSS as it goes, and
+reports the RSS before the request, the peak, and samples along the way. A
+flat profile means memory does not depend on the row count.
+
+Usage:
+    python benchmarks/bench_stream_memory.py [--rows 1000000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import json, resource, sys, time
+import server
+from server import app, db, AuditLog
+from flask import jsonify
+
+PAGE = 4096
+
+def rss_mb():
+    with open("/proc/self/statm") as handle:
+        return int(handle.read().split()[1]) * PAGE / 2**20
+
+mode = sys.argv[1]
+if mode == "buffered":
+    @app.get("/bench/buffered")
+    def buffered():
+        logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).all()
+        return jsonify([log.to_dict() for log in logs])
+    url = "/bench/buffered"
+else:
+    url = "/api/audit-log"
+
+client = app.test_client()
+client.post("/api/auth/login", json={"username": "admin", "password": "admin123", "mfaCode": "123456"})
+client.get("/api/audit-log?limit=1")
+baseline = rss_mb()
+started = time.perf_counter()
+response = client.get(url, buffered=False)
+samples, size, chunks = [], 0, 0
+for chunk in response.response:
+    size += len(chunk)
+    chunks += 1
+    if chunks % 25 == 0:
+        samples.append(round(rss_mb(), 1))
+response.close()
+elapsed = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({"baseline": baseline, "peak": peak, "bytes": size, "seconds": elapsed, "samples": samples}))
+"""
+
+
+def build_database(path, rows):
+    env = dict(os.environ, IIMS_DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "server", "schema", "upgrade"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+    started = datetime(2024, 1, 1)
+    actions = ["CREATE", "UPDATE", "DELETE", "LOGIN", "EXPORT"]
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO audit_logs (timestamp, user_role, action, details) VALUES (?, ?, ?, ?)",
+            (
+                (
+                    (started + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S.%f"),
+                    "Admin",
+                    actions[i % len(actions)],
+                    f"Benchmark entry {i} for asset AST-{i % 5000:05d}",
+                )
+                for i in range(rows)
+            ),
+        )
+
+
+def run_worker(mode, env):
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER, mode],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="iims-bench-"), "bench.db")
+    print(f"Seeding {args.rows:,} audit log rows ...")
+    build_database(path, args.rows)
+    env = dict(
+        os.environ,
+        IIMS_DATABASE_URL=f"sqlite:///{path}",
+        IIMS_DATABASE_INIT="manual",
+        IIMS_AUDIT_MODE="sync",
+        # Mapped database pages and SQLite's page cache (64 MiB by default)
+        # would otherwise fill up during the scan and show as resident
+        # memory; both are capped, so keep them small to measure the response
+        IIMS_SQLITE_MMAP_SIZE="0",
+        IIMS_SQLITE_CACHE_SIZE="-2000",
+    )
+
+    print(f"{'mode':<9} {'rss before MB':>14} {'peak MB':>9} {'growth MB':>10} {'body MB':>8} {'seconds':>8}  rss samples MB")
+    for mode in ("buffered", "streamed"):
+        result = run_worker(mode, env)
+        growth = result["peak"] - result["baseline"]
+        samples = result["samples"]
+        shown = samples if len(samples) <= 8 else samples[:4] + ["..."] + samples[-3:]
+        print(f"{mode:<9} {result['baseline']:14.1f} {result['peak']:9.1f} {growth:10.1f} "
+              f"{result['bytes'] / 2**20:8.1f} {result['seconds']:8.1f}  {shown}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Asset writes per second: three commits per mutation vs one unit of work.
+
+"before" replays the original pattern: commit the asset, then commit the
+audit entry, then commit the asset log entry. "after" records all three rows
+with ``unit_of_work()`` and commits once.
+
+Usage:
+    python benchmarks/bench_unit_of_work.py [--writes 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+DB_DIR = tempfile.mkdtemp(prefix="iims-bench-")
+os.environ["IIMS_DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}"
+# The original code committed audit entries synchronously
+os.environ["IIMS_AUDIT_MODE"] = "sync"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server  # noqa: E402
+from server import app, db, Asset, add_asset_log, add_audit_log, unit_of_work  # noqa: E402
+
+
+def make_asset(prefix, index):
+    return Asset(
+        asset_id=f"{prefix}-{index:06d}",
+        asset_type="Laptop",
+        assigned_user="Bench User",
+        purchase_date=date(2024, 1, 1),
+        warranty_expiry_date=date(2027, 1, 1),
+        status="Active",
+        department="IT",
+    )
+
+
+def three_commits(index):
+    asset = make_asset("BEFORE", index)
+    db.session.add(asset)
+    server.adjust_kpi_counters(after=server.kpi_contributions(asset))
+    db.session.commit()
+    add_audit_log("CREATE", f"Created asset {asset.asset_id}", "Admin")
+    add_asset_log(
+        asset.asset_id,
+        "CREATE",
+        f"{asset.asset_type} assigned to {asset.assigned_user}",
+        "Admin",
+        asset_type=asset.asset_type,
+        assigned_user=asset.assigned_user,
+    )
+
+
+def single_commit(index):
+    asset = make_asset("AFTER", index)
+    with unit_of_work("Admin") as uow:
+        uow.add(asset)
+        uow.audit("CREATE", f"Created asset {asset.asset_id}")
+        uow.asset_log(asset, "CREATE", f"{asset.asset_type} assigned to {asset.assigned_user}")
+
+
+def measure(label, write, writes):
+    started = time.perf_counter()
+    for index in range(writes):
+        write(index)
+    elapsed = time.perf_counter() - started
+    rate = writes / elapsed
+    print(f"{label:<28} {writes:>6} writes  {elapsed:8.3f}s  {rate:10.1f} writes/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=500)
+    args = parser.parse_args()
+
+    with app.app_context():
+        server.initialize_database(reset=True)
+        before = measure("before (3 commits/write)", three_commits, args.writes)
+        after = measure("after (unit of work)", single_commit, args.writes)
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
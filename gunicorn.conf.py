@@ -0,0 +1,68 @@
+"""Gunicorn settings for production: pre-forked workers, each running a thread pool.
+
+Every knob is read from an ``IIMS_*`` environment variable:
+
+    IIMS_BIND               listen address (default 0.0.0.0:5000)
+    IIMS_WORKERS            worker processes (default 2 * CPUs + 1)
+    IIMS_THREADS            threads per worker (default 4)
+    IIMS_KEEPALIVE          seconds to hold idle keep-alive connections (default 5)
+    IIMS_WORKER_TIMEOUT     seconds before a silent worker is killed (default 30)
+    IIMS_GRACEFUL_TIMEOUT   seconds workers get to finish requests on reload/stop (default 30)
+    IIMS_MAX_REQUESTS       recycle a worker after this many requests, 0 disables (default 0)
+    IIMS_ACCESS_LOG         access log path, "-" for stdout, empty to disable (default -)
+
+Send SIGHUP to the master for a graceful reload: new workers are started and the
+old ones finish in-flight requests within IIMS_GRACEFUL_TIMEOUT. Because the app
+is preloaded, HUP picks up new settings but not new code; restart (or USR2) for that.
+
+Usage:
+    gunicorn --config gunicorn.conf.py server:app
+"""
+import multiprocessing
+import os
+
+# The master migrates the schema once before forking, so workers skip it
+os.environ.setdefault("IIMS_DATABASE_INIT", "manual")
+
+bind = os.environ.get("IIMS_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("IIMS_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.environ.get("IIMS_THREADS", "4"))
+worker_class = "gthread"
+keepalive = int(os.environ.get("IIMS_KEEPALIVE", "5"))
+timeout = int(os.environ.get("IIMS_WORKER_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("IIMS_GRACEFUL_TIMEOUT", "30"))
+max_requests = int(os.environ.get("IIMS_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+# Import the app in the master so workers share its code pages and, when
+# IIMS_SECRET_KEY is unset, the same token signing key
+preload_app = True
+accesslog = os.environ.get("IIMS_ACCESS_LOG", "-") or None
+
+
+def on_starting(server):
+    """Run the once-per-deployment schema initialization in the master."""
+    from server import app, db, initialize_database
+
+    with app.app_context():
+        applied = initialize_database()
+        # Workers must not inherit the connections the migration opened
+        for engine in db.engines.values():
+            engine.dispose()
+    if applied:
+        server.log.info("Applied schema migrations: %s", ", ".join(str(version) for version in applied))
+
+
+def post_fork(server, worker):
+    """Drop any pooled connection inherited from the master without closing it for the master."""
+    from server import app, db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    """Flush queued audit entries before a worker goes away."""
+    from server import audit_writer
+
+    audit_writer.stop()
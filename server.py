@@ -1,42 +1,220 @@
-from flask import Flask, request, jsonify, send_from_directory, Response
+from flask import (
+    Flask, Blueprint, current_app, g, has_app_context, has_request_context, request, jsonify, send_from_directory, Response,
+    stream_with_context,
+)
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import click
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import or_, func
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy import or_, func, case, event, insert, select, update, delete, tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.pool import StaticPool
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from datetime import datetime, timedelta, date
+import atexit
+import gzip
+import hashlib
+import itertools
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
+import queue
+import secrets
+import tempfile
+import threading
+import time
 import uuid
+import zlib
 import os
 import csv
 import io
 
-app = Flask(__name__)
-CORS(app)
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding
+    orjson = None
 
-DATABASE_URL = os.environ.get("IIMS_DATABASE_URL", "sqlite:///ims.db")
-app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-engine_options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
-connect_args = engine_options.get("connect_args", {})
-if DATABASE_URL.startswith("sqlite"):
-    connect_args.setdefault("check_same_thread", False)
-    if DATABASE_URL.rstrip("/").endswith(":memory:"):
-        engine_options.setdefault("poolclass", StaticPool)
-engine_options["connect_args"] = connect_args
+try:
+    import msgpack
+except ImportError:  # optional: MessagePack responses for clients that ask for them
+    msgpack = None
 
-db = SQLAlchemy(app)
+def default_config():
+    """Application settings read from ``IIMS_*`` environment variables."""
+    return {
+        "SQLALCHEMY_DATABASE_URI": os.environ.get("IIMS_DATABASE_URL", "sqlite:///ims.db"),
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        # Optional read replica for GET handlers and reports
+        "READ_DATABASE_URL": os.environ.get("IIMS_READ_DATABASE_URL", ""),
+        # After a write, a client reads from the primary for this many seconds (0 disables)
+        "READ_YOUR_WRITES_SECONDS": float(os.environ.get("IIMS_READ_YOUR_WRITES_SECONDS", "5")),
+        # Signs auth tokens; a random key only validates tokens inside this process,
+        # so set IIMS_SECRET_KEY when running more than one worker
+        "SECRET_KEY": os.environ.get("IIMS_SECRET_KEY") or secrets.token_hex(32),
+        "AUTH_TOKEN_TTL": int(os.environ.get("IIMS_AUTH_TOKEN_TTL", str(8 * 3600))),
+        "AUTH_CACHE_SIZE": int(os.environ.get("IIMS_AUTH_CACHE_SIZE", "1024")),
+        "AUTH_CACHE_TTL": float(os.environ.get("IIMS_AUTH_CACHE_TTL", "60")),
+        # "lazy" initializes the schema on the first request; "manual" leaves it to
+        # a deploy step (flask --app server schema upgrade)
+        "DATABASE_INIT": os.environ.get("IIMS_DATABASE_INIT", "lazy").strip().lower(),
+        "REPORT_CACHE_TTL": float(os.environ.get("IIMS_REPORT_CACHE_TTL", "60")),
+        # More pending changes than this and /api/sync tells the client to reload
+        "SYNC_MAX_CHANGES": int(os.environ.get("IIMS_SYNC_MAX_CHANGES", "5000")),
+        # "auto" encodes JSON with orjson when it is installed; "json" forces the standard library
+        "JSON_BACKEND": os.environ.get("IIMS_JSON_BACKEND", "auto"),
+        "BULK_MAX_OPERATIONS": int(os.environ.get("IIMS_BULK_MAX_OPERATIONS", "5000")),
+        "TELEMETRY_MAX_SAMPLES": int(os.environ.get("IIMS_TELEMETRY_MAX_SAMPLES", "10000")),
+        # "async" queues audit entries for the background writer; "sync" commits each one immediately
+        "AUDIT_MODE": os.environ.get("IIMS_AUDIT_MODE", "async").strip().lower(),
+        "AUDIT_BATCH_SIZE": int(os.environ.get("IIMS_AUDIT_BATCH_SIZE", "200")),
+        "AUDIT_FLUSH_INTERVAL": float(os.environ.get("IIMS_AUDIT_FLUSH_INTERVAL", "1.0")),
+        # Entries older than this many days are moved to gzip files by `flask audit archive`
+        "AUDIT_RETENTION_DAYS": int(os.environ.get("IIMS_AUDIT_RETENTION_DAYS", "90")),
+        # Defaults to <instance path>/audit-archive
+        "AUDIT_ARCHIVE_DIR": os.environ.get("IIMS_AUDIT_ARCHIVE_DIR", ""),
+        # Dashboard SSE: recompute at most every interval (sooner after a relevant commit)
+        "DASHBOARD_STREAM_INTERVAL": float(os.environ.get("IIMS_DASHBOARD_STREAM_INTERVAL", "5")),
+        "DASHBOARD_STREAM_KEEPALIVE": float(os.environ.get("IIMS_DASHBOARD_STREAM_KEEPALIVE", "15")),
+        # Each open stream holds a worker thread: cap them per process (0 = no cap) and
+        # end each after a while so EventSource reconnects and threads rotate
+        "DASHBOARD_STREAM_MAX_SUBSCRIBERS": int(os.environ.get("IIMS_DASHBOARD_STREAM_MAX_SUBSCRIBERS", "2")),
+        "DASHBOARD_STREAM_MAX_SECONDS": float(os.environ.get("IIMS_DASHBOARD_STREAM_MAX_SECONDS", "300")),
+        # Applied to every new SQLite connection (see apply_sqlite_pragmas)
+        "SQLITE_JOURNAL_MODE": os.environ.get("IIMS_SQLITE_JOURNAL_MODE", "WAL"),
+        "SQLITE_SYNCHRONOUS": os.environ.get("IIMS_SQLITE_SYNCHRONOUS", "NORMAL"),
+        "SQLITE_BUSY_TIMEOUT_MS": int(os.environ.get("IIMS_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "SQLITE_MMAP_SIZE": int(os.environ.get("IIMS_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Negative values are KiB: -65536 is a 64 MiB page cache per connection
+        "SQLITE_CACHE_SIZE": int(os.environ.get("IIMS_SQLITE_CACHE_SIZE", "-65536")),
+        "DB_POOL_SIZE": int(os.environ.get("IIMS_DB_POOL_SIZE", "10")),
+        "DB_MAX_OVERFLOW": int(os.environ.get("IIMS_DB_MAX_OVERFLOW", "20")),
+        "DB_POOL_TIMEOUT": float(os.environ.get("IIMS_DB_POOL_TIMEOUT", "10")),
+    }
+
+
+def _is_memory_database(database_url):
+    return database_url.rstrip("/").endswith(":memory:")
+
+
+def configure_engine_options(config):
+    """Fill in engine and pool options for the configured database URL.
+
+    File databases get a connection pool sized for concurrent readers: with
+    WAL every pooled connection can read while one of them writes.
+    """
+    database_url = config["SQLALCHEMY_DATABASE_URI"]
+    engine_options = config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    connect_args = engine_options.get("connect_args", {})
+    if database_url.startswith("sqlite"):
+        connect_args.setdefault("check_same_thread", False)
+        if _is_memory_database(database_url):
+            engine_options.setdefault("poolclass", StaticPool)
+    if engine_options.get("poolclass") is None:
+        engine_options.setdefault("pool_size", config["DB_POOL_SIZE"])
+        engine_options.setdefault("max_overflow", config["DB_MAX_OVERFLOW"])
+        engine_options.setdefault("pool_timeout", config["DB_POOL_TIMEOUT"])
+    engine_options["connect_args"] = connect_args
+
+
+def sqlite_pragmas(config, database_url=None):
+    """The PRAGMA statements run on each new SQLite connection."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+    # In-memory databases cannot use WAL
+    if not _is_memory_database(database_url or config["SQLALCHEMY_DATABASE_URI"]):
+        pragmas.insert(0, f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, config):
+    """Apply ``sqlite_pragmas`` whenever the engine's pool opens a connection."""
+    pragmas = sqlite_pragmas(config, engine.url.render_as_string(hide_password=False))
+
+    @event.listens_for(engine, "connect")
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+REPLICA_BIND_KEY = "replica"
+READ_PRIMARY_COOKIE = "iims_read_primary_until"
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """Session that sends SELECTs to the replica when the request allows it.
+
+    Flushes and DML always go to the primary, and once a request has written
+    its remaining reads do too, so it never reads back a stale copy of its
+    own rows.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and getattr(clause, "is_select", False)
+                and has_app_context() and g.get("read_from_replica")):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _read_own_writes_from_primary(session, flush_context):
+    if has_app_context():
+        g.read_from_replica = False
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+api = Blueprint("api", __name__, cli_group=None)
+
+
+@api.before_request
+def route_reads():
+    """Serve GET/HEAD requests from the replica unless the client just wrote."""
+    primary_until = request.cookies.get(READ_PRIMARY_COOKIE, "")
+    try:
+        sticky = float(primary_until) > time.time()
+    except ValueError:
+        sticky = False
+    g.read_from_replica = request.method in ("GET", "HEAD") and not sticky
+
+
+@api.after_request
+def stick_to_primary_after_write(response):
+    """Give a client that just wrote read-your-writes on the primary for a while."""
+    seconds = current_app.config["READ_YOUR_WRITES_SECONDS"]
+    if (seconds > 0 and REPLICA_BIND_KEY in current_app.config["SQLALCHEMY_BINDS"]
+            and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400):
+        response.set_cookie(READ_PRIMARY_COOKIE, str(time.time() + seconds), max_age=int(seconds) + 1,
+                            httponly=True, samesite="Lax")
+    return response
 
 
 class Asset(db.Model):
     __tablename__ = "assets"
+    __table_args__ = (
+        # Employee views filter on the assignee and sort by asset ID
+        db.Index("ix_assets_assigned_user_asset_id", "assigned_user", "asset_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     asset_id = db.Column(db.String(64), unique=True, nullable=False)
-    asset_type = db.Column(db.String(64), nullable=False)
+    asset_type = db.Column(db.String(64), nullable=False, index=True)
     assigned_user = db.Column(db.String(128), nullable=False)
     purchase_date = db.Column(db.Date, nullable=False)
-    warranty_expiry_date = db.Column(db.Date, nullable=False)
-    status = db.Column(db.String(32), default="Active", nullable=False)
-    department = db.Column(db.String(64), default="IT", nullable=False)
+    warranty_expiry_date = db.Column(db.Date, nullable=False, index=True)
+    status = db.Column(db.String(32), default="Active", nullable=False, index=True)
+    department = db.Column(db.String(64), default="IT", nullable=False, index=True)
 
     def to_dict(self):
         return {
@@ -59,7 +237,7 @@ class AssetComplaint(db.Model):
     employee_name = db.Column(db.String(128), nullable=False)
     employee_username = db.Column(db.String(64))
     status = db.Column(db.String(32), nullable=False, default="Open")
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
 
     def to_dict(self):
         return {
@@ -82,7 +260,7 @@ class License(db.Model):
     license_key = db.Column(db.String(128), nullable=False)
     total_seats = db.Column(db.Integer, nullable=False)
     used_seats = db.Column(db.Integer, default=0, nullable=False)
-    expiry_date = db.Column(db.Date, nullable=False)
+    expiry_date = db.Column(db.Date, nullable=False, index=True)
     compliance_status = db.Column(db.String(32), default="Compliant", nullable=False)
 
     def to_dict(self):
@@ -105,7 +283,7 @@ class HardwareHealthRecord(db.Model):
     cpu_load = db.Column(db.Integer, nullable=False)
     memory_util = db.Column(db.Integer, nullable=False)
     is_overheating = db.Column(db.Boolean, default=False, nullable=False)
-    last_check = db.Column(db.DateTime, nullable=False)
+    last_check = db.Column(db.DateTime, nullable=False, index=True)
 
     def to_dict(self):
         return {
@@ -117,14 +295,37 @@ class HardwareHealthRecord(db.Model):
         }
 
 
+class HardwareTelemetrySample(db.Model):
+    __tablename__ = "hardware_telemetry"
+
+    device_id = db.Column(db.String(64), primary_key=True)
+    timestamp = db.Column(db.DateTime, primary_key=True)
+    cpu_load = db.Column(db.Integer, nullable=False)
+    memory_util = db.Column(db.Integer, nullable=False)
+    is_overheating = db.Column(db.Boolean, default=False, nullable=False)
+
+    def to_dict(self):
+        return {
+            "deviceId": self.device_id,
+            "timestamp": self.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            "cpuLoad": self.cpu_load,
+            "memoryUtil": self.memory_util,
+            "isOverheating": self.is_overheating,
+        }
+
+
 class BackupJob(db.Model):
     __tablename__ = "backup_jobs"
+    __table_args__ = (
+        # Covers the stale-backup report (run date range, distinct asset IDs)
+        db.Index("ix_backup_jobs_last_run_date_asset_id", "last_run_date", "asset_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.String(64), unique=True, nullable=False)
     asset_id = db.Column(db.String(64), nullable=False)
     last_run_date = db.Column(db.DateTime, nullable=False)
-    status = db.Column(db.String(32), nullable=False)
+    status = db.Column(db.String(32), nullable=False, index=True)
     alert_reason = db.Column(db.String(256))
     technician_comment = db.Column(db.String(512))
 
@@ -144,7 +345,7 @@ class NetworkDevice(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     device_id = db.Column(db.String(64), unique=True, nullable=False)
-    bandwidth_mb = db.Column(db.Integer, nullable=False)
+    bandwidth_mb = db.Column(db.Integer, nullable=False, index=True)
     is_downtime = db.Column(db.Boolean, default=False, nullable=False)
     abnormal_traffic = db.Column(db.Boolean, default=False, nullable=False)
 
@@ -159,9 +360,13 @@ class NetworkDevice(db.Model):
 
 class AuditLog(db.Model):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Action-filtered audit queries read newest entries first
+        db.Index("ix_audit_logs_action_timestamp", "action", "timestamp"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     user_role = db.Column(db.String(32), nullable=False)
     action = db.Column(db.String(64), nullable=False)
     details = db.Column(db.String(256), nullable=False)
@@ -177,9 +382,13 @@ class AuditLog(db.Model):
 
 class AssetLog(db.Model):
     __tablename__ = "asset_logs"
+    __table_args__ = (
+        # Per-asset history reads newest entries for one asset
+        db.Index("ix_asset_logs_asset_id_timestamp", "asset_id", "timestamp"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     asset_id = db.Column(db.String(64), nullable=False)
     action = db.Column(db.String(32), nullable=False)
     details = db.Column(db.String(256))
@@ -198,6 +407,46 @@ class AssetLog(db.Model):
         }
 
 
+class AssetSnapshot(db.Model):
+    """Compact copy of the fields AssetLog tracks, taken at one point in time.
+
+    ``payload`` is zlib-compressed JSON ``[[asset_id, asset_type, assigned_user], ...]``.
+    Every asset log with an id above ``last_log_id`` happened after the copy.
+    """
+    __tablename__ = "asset_snapshots"
+
+    id = db.Column(db.Integer, primary_key=True)
+    taken_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    last_log_id = db.Column(db.Integer, nullable=False, default=0)
+    asset_count = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(db.LargeBinary, nullable=False)
+
+    def assets(self):
+        rows = json.loads(zlib.decompress(self.payload))
+        return {asset_id: (asset_type, assigned_user) for asset_id, asset_type, assigned_user in rows}
+
+
+class ChangeRecord(db.Model):
+    """One upsert or delete of a synced record, numbered by a monotonic ``seq``.
+
+    Sync cursors assume SQLite's single-writer model: write transactions are
+    serialized, so sequence numbers become visible in order and no lower
+    ``seq`` can commit after a higher one has been read. Databases with
+    concurrent writers (e.g. PostgreSQL) break that assumption and need a
+    cursor held below every in-flight sequence number before sync can rely
+    on them.
+    """
+    __tablename__ = "change_log"
+    # AUTOINCREMENT: sequence numbers are never reused, even after deletes
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(16), nullable=False)
+    record_key = db.Column(db.String(64), nullable=False)
+    op = db.Column(db.String(8), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
 class IntegrationStatus(db.Model):
     __tablename__ = "integration_statuses"
 
@@ -234,11 +483,162 @@ class User(db.Model):
         }
 
 
-# Current user session (mock session storage)
-current_role = None
-current_user = None
-current_user_name = None
-is_authenticated = False
+class RevokedToken(db.Model):
+    """An auth token rejected before its expiry, kept until it would have expired anyway."""
+    __tablename__ = "revoked_tokens"
+
+    token_hash = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class SchemaVersion(db.Model):
+    __tablename__ = "schema_version"
+
+    version = db.Column(db.Integer, primary_key=True)
+
+
+class KpiCounter(db.Model):
+    __tablename__ = "kpi_counters"
+
+    name = db.Column(db.String(128), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "value": self.value,
+        }
+
+
+# ==================== AUTHENTICATION ====================
+
+AUTH_COOKIE_NAME = "iims_token"
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _token_serializer():
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="iims-auth")
+
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_auth_token(user):
+    """Sign a bearer token that identifies ``user``.
+
+    A random nonce keeps two logins within the same second from sharing a
+    token, so revoking one never revokes the other.
+    """
+    return _token_serializer().dumps({"username": user.username, "nonce": secrets.token_urlsafe(8)})
+
+
+def resolve_auth_token(token):
+    """Return the identity for a token, or None if it is invalid, expired or revoked.
+
+    Lookups are cached per token so the users and revoked_tokens tables are
+    read once per token and cache TTL rather than on every request. A token
+    revoked in another worker is therefore rejected here within
+    ``AUTH_CACHE_TTL`` seconds.
+    """
+    cache = current_app.extensions["auth_cache"]
+    identity = cache.get(token)
+    if identity is not None:
+        return identity
+
+    max_age = current_app.config["AUTH_TOKEN_TTL"]
+    try:
+        payload, signed_at = _token_serializer().loads(token, max_age=max_age, return_timestamp=True)
+    except BadSignature:
+        return None
+    if db.session.get(RevokedToken, _token_hash(token)) is not None:
+        return None
+    user = User.query.filter_by(username=payload.get("username")).first()
+    if user is None:
+        return None
+    identity = {"username": user.username, "role": user.role, "name": user.name}
+    remaining = max_age - (datetime.now(signed_at.tzinfo) - signed_at).total_seconds()
+    cache.set(token, identity, ttl=remaining)
+    return identity
+
+
+def revoke_auth_token(token):
+    """Reject ``token`` in every worker from now on, until it would have expired.
+
+    The worker handling the revocation drops it from its cache at once;
+    other workers stop accepting it when their cached lookup expires.
+    Expired revocations are pruned on the way.
+    """
+    max_age = current_app.config["AUTH_TOKEN_TTL"]
+    try:
+        _, signed_at = _token_serializer().loads(token, max_age=max_age, return_timestamp=True)
+    except BadSignature:
+        return
+    now = datetime.utcnow()
+    db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+    db.session.merge(RevokedToken(token_hash=_token_hash(token),
+                                  expires_at=signed_at.replace(tzinfo=None) + timedelta(seconds=max_age)))
+    db.session.commit()
+    current_app.extensions["auth_cache"].pop(token)
+
+
+def _request_token():
+    header = request.headers.get("Authorization", "")
+    scheme, _, credentials = header.partition(" ")
+    if scheme.lower() == "bearer" and credentials.strip():
+        return credentials.strip()
+    return request.cookies.get(AUTH_COOKIE_NAME)
+
+
+@api.before_request
+def load_current_user():
+    """Resolve the caller from the bearer token or auth cookie into ``g``."""
+    g.auth_token = _request_token()
+    identity = resolve_auth_token(g.auth_token) if g.auth_token else None
+    g.current_user = identity["username"] if identity else None
+    g.current_role = identity["role"] if identity else None
+    g.current_user_name = identity["name"] if identity else None
+    g.is_authenticated = identity is not None
 
 
 def _parse_date(date_str, field_name):
@@ -263,16 +663,709 @@ def _to_bool(value):
     return bool(value)
 
 
+def _chunks(values, size):
+    """Yield successive ``size``-length slices of ``values``."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows fetched per round trip by streamed responses
+STREAM_BATCH_ROWS = 1000
+# Encoded bytes buffered before a streamed chunk is handed to the server
+STREAM_CHUNK_BYTES = 64 * 1024
+# Encoded bytes a streamed MessagePack array keeps in memory before spooling to disk
+STREAM_SPOOL_BYTES = 1024 * 1024
+# Accept types answered with MessagePack, in order of preference
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _page_args(cursor=int):
+    """Read keyset pagination arguments (limit/after) from the query string.
+
+    ``cursor`` decodes ``after``; it defaults to an integer primary key.
+    Returns None when the client did not ask for pagination so that existing
+    callers keep receiving a plain list.
+    """
+    raw_limit = request.args.get('limit')
+    raw_after = request.args.get('after')
+    if raw_limit is None and raw_after is None:
+        return None
+    try:
+        limit = int(raw_limit) if raw_limit else DEFAULT_PAGE_SIZE
+        after = cursor(raw_after) if raw_after else None
+    except ValueError:
+        if cursor is not int:
+            raise ValueError("limit must be an integer and after a cursor returned by this endpoint.")
+        raise ValueError("limit and after must be integers.")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer.")
+    return min(limit, MAX_PAGE_SIZE), after
+
+
+def negotiated_msgpack_mimetype():
+    """Return the MessagePack type a GET request's ``Accept`` prefers over JSON, else None.
+
+    Always None when the optional msgpack package is not installed, so such
+    clients get JSON.
+    """
+    if msgpack is None or not has_request_context() or request.method not in ("GET", "HEAD"):
+        return None
+    best = request.accept_mimetypes.best_match(("application/json",) + MSGPACK_MIMETYPES)
+    return best if best in MSGPACK_MIMETYPES else None
+
+
+def vary_on_accept(response):
+    """Mark a GET response as negotiated so caches key it on ``Accept``."""
+    if msgpack is not None and has_request_context() and request.method in ("GET", "HEAD"):
+        response.vary.add("Accept")
+    return response
+
+
+class NegotiatingJSONProvider(DefaultJSONProvider):
+    """JSON provider whose ``jsonify()`` answers in MessagePack when the client prefers it.
+
+    The object is packed with the same ``default`` hook as JSON (dates in
+    HTTP format, decimals as strings), so both encodings share one schema.
+    """
+
+    def response(self, *args, **kwargs):
+        mimetype = negotiated_msgpack_mimetype()
+        if mimetype is None:
+            return vary_on_accept(super().response(*args, **kwargs))
+        data = msgpack.packb(self._prepare_response_obj(args, kwargs), default=self.default)
+        return vary_on_accept(self._app.response_class(data, mimetype=mimetype))
+
+
+class OrjsonProvider(NegotiatingJSONProvider):
+    """Flask JSON provider backed by orjson, used when it is installed.
+
+    Output matches the default provider except that non-ASCII text is emitted
+    as UTF-8 rather than ``\\u`` escapes. Dates still go through Flask's
+    ``default`` hook, so they keep the HTTP date format.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def configure_json_provider(flask_app):
+    """Install the JSON backend chosen by ``JSON_BACKEND`` (auto, orjson or json)."""
+    backend = flask_app.config["JSON_BACKEND"]
+    if backend == "json" or (backend == "auto" and orjson is None):
+        flask_app.json = NegotiatingJSONProvider(flask_app)
+        return
+    if orjson is None:
+        raise RuntimeError("JSON_BACKEND is 'orjson' but the orjson package is not installed.")
+    flask_app.json = OrjsonProvider(flask_app)
+
+
+class RowSerializer:
+    """Build a model's ``to_dict()`` output from selected column tuples.
+
+    ``fields`` lists ``(key, column, kind)`` where ``kind`` is ``"date"`` or
+    ``"datetime"`` for values ``to_dict()`` formats with ``strftime``. SQLite
+    stores those as ISO text, so there they are trimmed to shape in the SELECT
+    and no ORM object or ``datetime`` is built for a row.
+    """
+
+    FORMATS = {"date": ("%Y-%m-%d", 10), "datetime": ("%Y-%m-%d %H:%M:%S", 19)}
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.keys = tuple(key for key, _, _ in fields)
+
+    def project(self, keys):
+        """Return a serializer for just ``keys``, in the order given."""
+        by_key = {field[0]: field for field in self.fields}
+        unknown = [key for key in keys if key not in by_key]
+        if unknown:
+            raise ValueError(
+                f"Unknown field(s): {', '.join(unknown)}. Available fields: {', '.join(self.keys)}."
+            )
+        return RowSerializer([by_key[key] for key in dict.fromkeys(keys)])
+
+    def prepare(self):
+        """Return ``(columns, convert)`` where ``convert(rows)`` gives the dicts."""
+        keys = self.keys
+        columns, values = self.prepare_values()
+        return columns, lambda rows: [dict(zip(keys, row)) for row in values(rows)]
+
+    def prepare_values(self):
+        """Return ``(columns, values)`` where ``values(rows)`` gives value tuples in ``keys`` order."""
+        if db.engine.dialect.name == "sqlite":
+            columns = [
+                column if kind is None else func.substr(type_coerce(column, db.String), 1, self.FORMATS[kind][1])
+                for _, column, kind in self.fields
+            ]
+            return columns, lambda rows: rows
+
+        formats = [self.FORMATS[kind][0] if kind else None for _, _, kind in self.fields]
+
+        def values(rows):
+            return [
+                tuple(value.strftime(fmt) if fmt and value is not None else value for value, fmt in zip(row, formats))
+                for row in rows
+            ]
+        return [column for _, column, _ in self.fields], values
+
+
+# Read-only list fast paths; each must produce exactly the model's to_dict()
+ROW_SERIALIZERS = {
+    Asset: RowSerializer([
+        ("assetId", Asset.asset_id, None),
+        ("assetType", Asset.asset_type, None),
+        ("assignedUser", Asset.assigned_user, None),
+        ("purchaseDate", Asset.purchase_date, "date"),
+        ("warrantyExpiryDate", Asset.warranty_expiry_date, "date"),
+        ("status", Asset.status, None),
+        ("department", Asset.department, None),
+    ]),
+    AssetComplaint: RowSerializer([
+        ("id", AssetComplaint.id, None),
+        ("assetId", AssetComplaint.asset_id, None),
+        ("issue", AssetComplaint.issue, None),
+        ("employeeName", AssetComplaint.employee_name, None),
+        ("employeeUsername", AssetComplaint.employee_username, None),
+        ("status", AssetComplaint.status, None),
+        ("createdAt", AssetComplaint.created_at, "datetime"),
+    ]),
+    License: RowSerializer([
+        ("licenseId", License.license_id, None),
+        ("softwareName", License.software_name, None),
+        ("licenseKey", License.license_key, None),
+        ("totalSeats", License.total_seats, None),
+        ("usedSeats", License.used_seats, None),
+        ("expiryDate", License.expiry_date, "date"),
+        ("complianceStatus", License.compliance_status, None),
+    ]),
+    HardwareHealthRecord: RowSerializer([
+        ("deviceId", HardwareHealthRecord.device_id, None),
+        ("cpuLoad", HardwareHealthRecord.cpu_load, None),
+        ("memoryUtil", HardwareHealthRecord.memory_util, None),
+        ("isOverheating", HardwareHealthRecord.is_overheating, None),
+        ("lastCheck", HardwareHealthRecord.last_check, "datetime"),
+    ]),
+    BackupJob: RowSerializer([
+        ("jobId", BackupJob.job_id, None),
+        ("assetId", BackupJob.asset_id, None),
+        ("lastRunDate", BackupJob.last_run_date, "datetime"),
+        ("status", BackupJob.status, None),
+        ("alertReason", BackupJob.alert_reason, None),
+        ("technicianComment", BackupJob.technician_comment, None),
+    ]),
+    NetworkDevice: RowSerializer([
+        ("deviceId", NetworkDevice.device_id, None),
+        ("bandwidthMB", NetworkDevice.bandwidth_mb, None),
+        ("isDowntime", NetworkDevice.is_downtime, None),
+        ("abnormalTraffic", NetworkDevice.abnormal_traffic, None),
+    ]),
+    AuditLog: RowSerializer([
+        ("timestamp", AuditLog.timestamp, "datetime"),
+        ("userRole", AuditLog.user_role, None),
+        ("action", AuditLog.action, None),
+        ("details", AuditLog.details, None),
+    ]),
+    AssetLog: RowSerializer([
+        ("timestamp", AssetLog.timestamp, "datetime"),
+        ("assetId", AssetLog.asset_id, None),
+        ("action", AssetLog.action, None),
+        ("details", AssetLog.details, None),
+        ("assetType", AssetLog.asset_type, None),
+        ("assignedUser", AssetLog.assigned_user, None),
+    ]),
+}
+
+
+def json_array_chunks(batches, chunk_bytes=STREAM_CHUNK_BYTES):
+    """Encode batches of records as one JSON array, yielding chunks of roughly ``chunk_bytes``.
+
+    Each batch is encoded by one provider call in jsonify()'s compact form and
+    spliced into the array without its brackets; chunks are never smaller
+    than one encoded batch.
+    """
+    dumps = current_app.json.dumps
+    parts, size, separator = ["["], 1, ""
+    for batch in batches:
+        if not batch:
+            continue
+        encoded = dumps(batch, separators=(",", ":"))[1:-1]
+        parts.append(separator)
+        parts.append(encoded)
+        size += len(encoded) + 1
+        separator = ","
+        if size >= chunk_bytes:
+            yield "".join(parts)
+            parts, size = [], 0
+    parts.append("]\n")
+    yield "".join(parts)
+
+
+def msgpack_array_chunks(batches, chunk_bytes=STREAM_CHUNK_BYTES):
+    """Encode batches of records as one MessagePack array, yielding chunks of ``chunk_bytes``.
+
+    The array header carries the element count, so encoded records are
+    spooled (in memory up to ``STREAM_SPOOL_BYTES``, then to a temporary
+    file) until the last batch; memory stays flat, but nothing is sent
+    before the query finishes.
+    """
+    packer = msgpack.Packer(default=current_app.json.default)
+    count = 0
+    with tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_BYTES) as spool:
+        for batch in batches:
+            count += len(batch)
+            # Pack the batch as one array and drop its header; the records follow it
+            header = len(packer.pack_array_header(len(batch)))
+            spool.write(packer.pack(batch)[header:])
+        spool.seek(0)
+        chunk = packer.pack_array_header(count) + spool.read(chunk_bytes)
+        while chunk:
+            yield chunk
+            chunk = spool.read(chunk_bytes)
+
+
+def json_array_response(query, serializer=None):
+    """Stream a query's results as a JSON array, ``STREAM_BATCH_ROWS`` rows per batch.
+
+    With a ``RowSerializer`` only its columns are selected and rows are never
+    hydrated into ORM objects; otherwise each object's ``to_dict()`` is used.
+    The body matches the equivalent ``jsonify()`` list, or is a MessagePack
+    array when the client prefers that.
+    """
+    options = {"yield_per": STREAM_BATCH_ROWS}
+    if serializer is None:
+        result = db.session.execute(query.statement, execution_options=options).scalars()
+        batches = ([record.to_dict() for record in batch] for batch in result.partitions())
+    else:
+        columns, convert = serializer.prepare()
+        result = db.session.execute(query.with_entities(*columns).statement, execution_options=options)
+        batches = (convert(batch) for batch in result.partitions())
+    mimetype = negotiated_msgpack_mimetype()
+    if mimetype is not None:
+        return vary_on_accept(Response(stream_with_context(msgpack_array_chunks(batches)), mimetype=mimetype))
+    return vary_on_accept(
+        Response(stream_with_context(json_array_chunks(batches)), mimetype=current_app.json.mimetype)
+    )
+
+
+def _projection_args(serializer):
+    """Read the ``fields`` projection and response ``format`` from the query string.
+
+    Returns ``(serializer, columnar)``: ``fields`` (comma separated
+    ``to_dict()`` keys) narrows the serializer so only those columns are
+    selected, and ``format=columnar`` asks for one array per column.
+    """
+    raw_fields = request.args.get('fields')
+    response_format = request.args.get('format', 'rows')
+    if response_format not in ('rows', 'columnar'):
+        raise ValueError("format must be 'rows' or 'columnar'.")
+    if serializer is None:
+        if raw_fields is not None or response_format != 'rows':
+            raise ValueError("This endpoint does not support fields or format.")
+        return None, False
+    if raw_fields is not None:
+        keys = [key.strip() for key in raw_fields.split(',') if key.strip()]
+        if not keys:
+            raise ValueError("fields must list at least one field.")
+        serializer = serializer.project(keys)
+    return serializer, response_format == 'columnar'
+
+
+def columnar_payload(keys, rows, next_cursor=None):
+    """Shape value tuples as ``{"columns": [...], "data": [[...], ...], "nextCursor": ...}``.
+
+    ``data`` holds one array per column, in ``columns`` order, so key names
+    appear once per response instead of once per row.
+    """
+    data = [list(column) for column in zip(*rows)] if rows else [[] for _ in keys]
+    return {"columns": list(keys), "data": data, "nextCursor": next_cursor}
+
+
+def list_response(query, model):
+    """Serialize a list query, paginating on the primary key when requested.
+
+    Paginated responses have the shape ``{"items": [...], "nextCursor": str|None}``
+    where ``nextCursor`` is passed back as ``after`` to fetch the next page.
+    ``fields`` and ``format=columnar`` (see ``_projection_args``) apply to
+    both shapes; a columnar response is built in memory, so pair it with
+    ``limit`` on large tables.
+    """
+    try:
+        page = _page_args()
+        serializer, columnar = _projection_args(ROW_SERIALIZERS.get(model))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    query = query.order_by(model.id.asc())
+    if page is None and not columnar:
+        return json_array_response(query, serializer)
+
+    limit, after = page or (None, None)
+    if after is not None:
+        query = query.filter(model.id > after)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    if serializer is None:
+        records = query.all()
+        ids, items = [record.id for record in records], [record.to_dict() for record in records]
+    else:
+        columns, values = serializer.prepare_values()
+        rows = query.with_entities(model.id, *columns).all()
+        ids, items = [row[0] for row in rows], values([row[1:] for row in rows])
+    next_cursor = None
+    if limit is not None and len(ids) > limit:
+        next_cursor = str(ids[limit - 1])
+        items = items[:limit]
+    if columnar:
+        return jsonify(columnar_payload(serializer.keys, items, next_cursor))
+    return jsonify({
+        "items": [dict(zip(serializer.keys, row)) for row in items] if serializer else items,
+        "nextCursor": next_cursor,
+    })
+
+
+# Queued by AuditLogWriter.flush() to make the writer thread stop batching and write
+_AUDIT_FLUSH_MARKER = object()
+
+
+class AuditLogWriter:
+    """Background writer that batches queued audit entries into bulk inserts.
+
+    A daemon thread flushes when ``AUDIT_BATCH_SIZE`` entries are waiting or
+    ``AUDIT_FLUSH_INTERVAL`` seconds have passed since the first one arrived.
+    The thread is started lazily per process so forked workers get their own.
+    """
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._batches = 0
+        self._entries = 0
+        self._dropped = 0
+        self._flush_ms_total = 0.0
+        self._flush_ms_last = 0.0
+        self._flush_ms_max = 0.0
+
+    def enqueue(self, entry):
+        self._ensure_started()
+        self._queue.put(entry)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Forked child: entries queued in the parent belong to the parent
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+
+    def _collect_batch(self):
+        interval = self.app.config["AUDIT_FLUSH_INTERVAL"]
+        batch = []
+        deadline = None
+        while len(batch) < self.app.config["AUDIT_BATCH_SIZE"]:
+            timeout = interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if entry is _AUDIT_FLUSH_MARKER:
+                self._queue.task_done()
+                break
+            batch.append(entry)
+            if deadline is None:
+                deadline = time.monotonic() + interval
+        return batch
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(AuditLog.__table__.insert(), batch)
+        except Exception:
+            self._dropped += len(batch)
+            self.app.logger.exception("Failed to write %d audit log entries", len(batch))
+        else:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._batches += 1
+            self._entries += len(batch)
+            self._flush_ms_last = elapsed_ms
+            self._flush_ms_total += elapsed_ms
+            self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _drain(self):
+        """Write everything left in the queue from the calling thread."""
+        batch = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _AUDIT_FLUSH_MARKER:
+                self._queue.task_done()
+            else:
+                batch.append(entry)
+        for chunk in _chunks(batch, self.app.config["AUDIT_BATCH_SIZE"]):
+            self._write(chunk)
+
+    def flush(self):
+        """Write everything queued so far and wait until it is committed."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(_AUDIT_FLUSH_MARKER)
+        else:
+            self._drain()
+        self._queue.join()
+
+    def stop(self):
+        """Durably flush pending entries and stop the writer thread.
+
+        The thread finishes the batch it is writing and exits without taking
+        anything else off the queue, so the rest is written here once it has
+        gone rather than waited for with ``join()``.
+        """
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            # Wakes a thread blocked waiting for entries
+            self._queue.put(_AUDIT_FLUSH_MARKER)
+            thread.join()
+        self._drain()
+
+    def stats(self):
+        return {
+            "mode": self.app.config["AUDIT_MODE"],
+            "queueDepth": self._queue.qsize(),
+            "batchesWritten": self._batches,
+            "entriesWritten": self._entries,
+            "droppedEntries": self._dropped,
+            "lastFlushMs": round(self._flush_ms_last, 3),
+            "avgFlushMs": round(self._flush_ms_total / self._batches, 3) if self._batches else 0,
+            "maxFlushMs": round(self._flush_ms_max, 3),
+        }
+
+
+def get_audit_writer():
+    """The audit writer of the current application."""
+    return current_app.extensions["audit_writer"]
+
+
 def add_audit_log(action, details, user_role, commit=True):
-    """Persist entry to audit log."""
-    log_entry = AuditLog(action=action, details=details, user_role=user_role, timestamp=datetime.utcnow())
+    """Record an audit log entry.
+
+    With ``commit=False`` the entry joins the caller's transaction. Otherwise it
+    is handed to the background writer, or committed immediately when
+    ``AUDIT_MODE`` is "sync" (for deployments that require synchronous audit).
+    """
+    entry = {"action": action, "details": details, "user_role": user_role, "timestamp": datetime.utcnow()}
+    if commit and current_app.config["AUDIT_MODE"] != "sync":
+        get_audit_writer().enqueue(entry)
+        return AuditLog(**entry).to_dict()
+    log_entry = AuditLog(**entry)
     db.session.add(log_entry)
     if commit:
         db.session.commit()
     return log_entry.to_dict()
 
 
-def add_asset_log(asset_id, action, details, user_role, asset_type=None, assigned_user=None):
+# ==================== AUDIT LOG RETENTION ====================
+
+LOG_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def encode_log_cursor(timestamp, entry_id):
+    """Keyset cursor for time-ordered logs: the (timestamp, id) of an entry served."""
+    return f"{timestamp.strftime(LOG_TIMESTAMP_FORMAT)}~{entry_id}"
+
+
+def decode_log_cursor(cursor):
+    try:
+        raw_timestamp, raw_id = cursor.split("~", 1)
+        return datetime.strptime(raw_timestamp, LOG_TIMESTAMP_FORMAT), int(raw_id)
+    except ValueError:
+        raise ValueError("Invalid cursor.")
+
+
+class AuditLogArchive:
+    """Gzipped JSON-lines files of archived audit entries, one file per day.
+
+    Each archiving run appends a new gzip member, which ``gzip.open`` reads
+    back as one stream, so files never have to be rewritten.
+    """
+
+    FILE_PREFIX = "audit-"
+    FILE_SUFFIX = ".jsonl.gz"
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path_for(self, day):
+        return os.path.join(self.directory, f"{self.FILE_PREFIX}{day.isoformat()}{self.FILE_SUFFIX}")
+
+    def days(self):
+        """Days that have an archive file, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.FILE_PREFIX) and name.endswith(self.FILE_SUFFIX):
+                try:
+                    found.append(date.fromisoformat(name[len(self.FILE_PREFIX):-len(self.FILE_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(found)
+
+    def append(self, records):
+        """Append ``records`` (dicts with an ISO ``timestamp``) to their day files."""
+        os.makedirs(self.directory, exist_ok=True)
+        by_day = {}
+        for record in records:
+            by_day.setdefault(record["timestamp"][:10], []).append(record)
+        for day, day_records in by_day.items():
+            with gzip.open(self.path_for(date.fromisoformat(day)), "at", encoding="utf-8") as handle:
+                for record in day_records:
+                    handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def read_day(self, day):
+        with gzip.open(self.path_for(day), "rt", encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+
+    def iter_newest_first(self, since=None, until=None):
+        """Yield archived records newest first, skipping day files outside the range."""
+        for day in reversed(self.days()):
+            if (until is not None and day > until.date()) or (since is not None and day < since.date()):
+                continue
+            records = self.read_day(day)
+            records.sort(key=lambda record: (record["timestamp"], record["id"]), reverse=True)
+            yield from records
+
+
+def get_audit_archive():
+    return AuditLogArchive(current_app.config["AUDIT_ARCHIVE_DIR"])
+
+
+def archive_audit_logs(retention_days=None, chunk_size=1000):
+    """Move audit entries older than the retention window into the archive.
+
+    Each chunk is durably appended to its day file before it is deleted and
+    committed; a crash in between leaves a duplicate that readers drop by id.
+    Returns the number of entries moved.
+    """
+    get_audit_writer().flush()
+    if retention_days is None:
+        retention_days = current_app.config["AUDIT_RETENTION_DAYS"]
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    archive = get_audit_archive()
+    moved = 0
+    while True:
+        entries = (
+            AuditLog.query.filter(AuditLog.timestamp < cutoff)
+            .order_by(AuditLog.timestamp.asc(), AuditLog.id.asc())
+            .limit(chunk_size)
+            .all()
+        )
+        if not entries:
+            return moved
+        archive.append([
+            {
+                "id": entry.id,
+                "timestamp": entry.timestamp.strftime(LOG_TIMESTAMP_FORMAT),
+                "userRole": entry.user_role,
+                "action": entry.action,
+                "details": entry.details,
+            }
+            for entry in entries
+        ])
+        db.session.execute(delete(AuditLog).where(AuditLog.id.in_([entry.id for entry in entries])))
+        db.session.commit()
+        moved += len(entries)
+
+
+def audit_log_query(since=None, until=None, actions=None, cursor=None):
+    """Live audit entries matching the filters, newest first."""
+    query = AuditLog.query
+    if since is not None:
+        query = query.filter(AuditLog.timestamp >= since)
+    if until is not None:
+        query = query.filter(AuditLog.timestamp <= until)
+    if actions:
+        query = query.filter(AuditLog.action.in_(actions))
+    if cursor is not None:
+        query = query.filter(tuple_(AuditLog.timestamp, AuditLog.id) < cursor)
+    return query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+
+
+def query_audit_log(since=None, until=None, actions=None, limit=None, cursor=None, include_archived=False):
+    """Return ``(entries, next_cursor)`` newest first, keyset-paginated on (timestamp, id).
+
+    With ``include_archived`` the newest matches from the archive files are
+    merged in, so a page can span the live table and the archive.
+    """
+    query = audit_log_query(since, until, actions, cursor)
+    fetch = None if limit is None else limit + 1
+    if fetch is not None:
+        query = query.limit(fetch)
+    rows = {entry.id: (entry.timestamp, entry.id, entry.to_dict()) for entry in query.all()}
+
+    if include_archived:
+        matched = 0
+        for record in get_audit_archive().iter_newest_first(since, until):
+            timestamp = datetime.strptime(record["timestamp"], LOG_TIMESTAMP_FORMAT)
+            if ((since is not None and timestamp < since) or (until is not None and timestamp > until)
+                    or (actions and record["action"] not in actions)
+                    or (cursor is not None and (timestamp, record["id"]) >= cursor)
+                    or record["id"] in rows):
+                continue
+            rows[record["id"]] = (timestamp, record["id"], {
+                "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                "userRole": record["userRole"],
+                "action": record["action"],
+                "details": record["details"],
+                "archived": True,
+            })
+            matched += 1
+            if fetch is not None and matched >= fetch:
+                break
+
+    ordered = sorted(rows.values(), key=lambda row: (row[0], row[1]), reverse=True)
+    if fetch is None:
+        return [row[2] for row in ordered], None
+    next_cursor = encode_log_cursor(*ordered[limit - 1][:2]) if len(ordered) > limit else None
+    return [row[2] for row in ordered[:limit]], next_cursor
+
+
+def add_asset_log(asset_id, action, details, user_role, asset_type=None, assigned_user=None, commit=True):
     """Persist asset-specific change log."""
     entry = AssetLog(
         asset_id=asset_id,
@@ -284,48 +1377,676 @@ def add_asset_log(asset_id, action, details, user_role, asset_type=None, assigne
         timestamp=datetime.utcnow(),
     )
     db.session.add(entry)
-    db.session.commit()
+    if commit:
+        db.session.commit()
     return entry.to_dict()
 
 
+# ==================== INVENTORY HISTORY ====================
+
+def take_asset_snapshot(commit=True):
+    """Materialize the asset table as an ``AssetSnapshot`` and return it.
+
+    The log watermark is read before the assets. A write that commits in
+    between is then both in the copy and replayed after it, which is harmless
+    because every asset log row carries the asset's full tracked state.
+    """
+    last_log_id = db.session.query(func.max(AssetLog.id)).scalar() or 0
+    rows = (
+        db.session.query(Asset.asset_id, Asset.asset_type, Asset.assigned_user)
+        .order_by(Asset.asset_id)
+        .all()
+    )
+    snapshot = AssetSnapshot(
+        taken_at=datetime.utcnow(),
+        last_log_id=last_log_id,
+        asset_count=len(rows),
+        payload=zlib.compress(json.dumps([list(row) for row in rows], separators=(",", ":")).encode("utf-8")),
+    )
+    db.session.add(snapshot)
+    if commit:
+        db.session.commit()
+    return snapshot
+
+
+def inventory_as_of(at):
+    """Reconstruct ``{asset_id: (asset_type, assigned_user)}`` as it stood at ``at``.
+
+    Starts from the newest snapshot taken at or before ``at`` and replays only
+    the asset logs recorded after it, stopping at the next snapshot's
+    watermark, so the cost is the delta between snapshots rather than the full
+    log. Before the first snapshot the log is replayed from empty, which only
+    knows about assets that have log entries. Returns ``(assets, snapshot,
+    deltas_replayed)``.
+    """
+    snapshot = (
+        AssetSnapshot.query.filter(AssetSnapshot.taken_at <= at)
+        .order_by(AssetSnapshot.taken_at.desc())
+        .first()
+    )
+    following = (
+        db.session.query(AssetSnapshot.last_log_id)
+        .filter(AssetSnapshot.taken_at > at)
+        .order_by(AssetSnapshot.taken_at.asc())
+        .limit(1)
+        .scalar()
+    )
+    assets = snapshot.assets() if snapshot else {}
+    deltas = db.session.query(AssetLog.asset_id, AssetLog.action, AssetLog.asset_type, AssetLog.assigned_user)
+    deltas = deltas.filter(AssetLog.id > (snapshot.last_log_id if snapshot else 0), AssetLog.timestamp <= at)
+    if following is not None:
+        deltas = deltas.filter(AssetLog.id <= following)
+    replayed = 0
+    for asset_id, action, asset_type, assigned_user in deltas.order_by(AssetLog.id.asc()):
+        replayed += 1
+        if action == "DELETE":
+            assets.pop(asset_id, None)
+            continue
+        # Legacy entries predate these columns; NULL means unknown, so the
+        # previous value carries forward
+        previous_type, previous_user = assets.get(asset_id, (None, None))
+        assets[asset_id] = (
+            previous_type if asset_type is None else asset_type,
+            previous_user if assigned_user is None else assigned_user,
+        )
+    return assets, snapshot, replayed
+
+
+# ==================== CHANGE SYNC ====================
+
+# Sync entity name -> (model, natural key column)
+SYNC_ENTITIES = {
+    "assets": (Asset, "asset_id"),
+    "licenses": (License, "license_id"),
+}
+_SYNC_MODELS = {model: (entity, key) for entity, (model, key) in SYNC_ENTITIES.items()}
+
+
+def sync_change_row(entity, record_key, op, changed_at=None):
+    """Row for ``insert(ChangeRecord)`` on write paths that bypass the ORM unit of work."""
+    return {"entity": entity, "record_key": record_key, "op": op, "changed_at": changed_at or datetime.utcnow()}
+
+
+@event.listens_for(db.session, "before_flush")
+def _record_sync_changes(session, flush_context, instances):
+    changes = []
+    for obj in session.new:
+        if type(obj) in _SYNC_MODELS:
+            changes.append((obj, "upsert"))
+    for obj in session.dirty:
+        if type(obj) in _SYNC_MODELS and session.is_modified(obj):
+            changes.append((obj, "upsert"))
+    for obj in session.deleted:
+        if type(obj) in _SYNC_MODELS:
+            changes.append((obj, "delete"))
+    for obj, op in changes:
+        entity, key = _SYNC_MODELS[type(obj)]
+        session.add(ChangeRecord(entity=entity, record_key=getattr(obj, key), op=op))
+
+
+def changes_since(since, latest):
+    """Collapse the change log between two sequence numbers into current records.
+
+    Returns ``{entity: {"upserted": [record dicts], "deleted": [keys]}}``. A
+    key changed several times appears once with its latest state; an upserted
+    record that no longer exists is reported as deleted.
+    """
+    final = {entity: {} for entity in SYNC_ENTITIES}
+    rows = (
+        db.session.query(ChangeRecord.entity, ChangeRecord.record_key, ChangeRecord.op)
+        .filter(ChangeRecord.seq > since, ChangeRecord.seq <= latest)
+        .order_by(ChangeRecord.seq.asc())
+    )
+    for entity, record_key, op in rows:
+        if entity in final:
+            final[entity][record_key] = op
+
+    delta = {}
+    for entity, (model, key) in SYNC_ENTITIES.items():
+        upserted_keys = [record_key for record_key, op in final[entity].items() if op == "upsert"]
+        records = {}
+        for chunk in _chunks(upserted_keys, 500):
+            for record in model.query.filter(getattr(model, key).in_(chunk)).order_by(model.id.asc()):
+                records[getattr(record, key)] = record.to_dict()
+        delta[entity] = {
+            "upserted": list(records.values()),
+            "deleted": [record_key for record_key in final[entity] if record_key not in records],
+        }
+    return delta
+
+
+def prune_change_log(keep=None, chunk_size=5000):
+    """Delete change log rows older than the newest ``keep`` sequence numbers.
+
+    ``keep`` defaults to ``SYNC_MAX_CHANGES``: clients further behind than
+    that are told to reset anyway, so older rows are never read. The newest
+    row always stays so the sequence keeps counting from it. Each chunk
+    commits on its own. Returns the number of rows deleted.
+    """
+    if keep is None:
+        keep = current_app.config["SYNC_MAX_CHANGES"]
+    latest = db.session.query(func.max(ChangeRecord.seq)).scalar() or 0
+    cutoff = latest - max(keep, 1)
+    deleted = 0
+    while True:
+        oldest = db.session.query(func.min(ChangeRecord.seq)).scalar()
+        if oldest is None or oldest > cutoff:
+            return deleted
+        upper = min(cutoff, oldest + chunk_size - 1)
+        deleted += db.session.execute(delete(ChangeRecord).where(ChangeRecord.seq <= upper)).rowcount
+        db.session.commit()
+
+
+# ==================== STREAMING EXPORTS ====================
+
+# Export name -> (model, [(CSV header, column)]), streamed in primary key order
+EXPORTS = {
+    "assets": (Asset, [
+        ("Asset ID", Asset.asset_id),
+        ("Asset Type", Asset.asset_type),
+        ("Assigned User", Asset.assigned_user),
+        ("Purchase Date", Asset.purchase_date),
+        ("Warranty Expiry Date", Asset.warranty_expiry_date),
+        ("Department", Asset.department),
+        ("Status", Asset.status),
+    ]),
+    "licenses": (License, [
+        ("License ID", License.license_id),
+        ("Software Name", License.software_name),
+        ("License Key", License.license_key),
+        ("Total Seats", License.total_seats),
+        ("Used Seats", License.used_seats),
+        ("Expiry Date", License.expiry_date),
+        ("Compliance Status", License.compliance_status),
+    ]),
+    "audit-log": (AuditLog, [
+        ("ID", AuditLog.id),
+        ("Timestamp", AuditLog.timestamp),
+        ("User Role", AuditLog.user_role),
+        ("Action", AuditLog.action),
+        ("Details", AuditLog.details),
+    ]),
+    "asset-logs": (AssetLog, [
+        ("ID", AssetLog.id),
+        ("Timestamp", AssetLog.timestamp),
+        ("Asset ID", AssetLog.asset_id),
+        ("Action", AssetLog.action),
+        ("Details", AssetLog.details),
+        ("Asset Type", AssetLog.asset_type),
+        ("Assigned User", AssetLog.assigned_user),
+        ("Performed By", AssetLog.performed_by),
+    ]),
+}
+
+
+def stream_rows(statement):
+    """Yield result rows of ``statement`` without buffering the whole result."""
+    result = db.session.execute(statement.execution_options(yield_per=STREAM_BATCH_ROWS, stream_results=True))
+    try:
+        for row in result:
+            yield [value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else value for value in row]
+    finally:
+        result.close()
+
+
+def csv_chunks(rows, compress=False, chunk_bytes=STREAM_CHUNK_BYTES):
+    """Encode ``rows`` as CSV, yielding byte chunks of roughly ``chunk_bytes``.
+
+    With ``compress`` the chunks form one gzip stream. Only one chunk is held
+    at a time, so memory does not grow with the number of rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def drain():
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_bytes:
+            chunk = drain()
+            if chunk:
+                yield chunk
+    tail = drain()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+
+def csv_response(filename, rows):
+    """Stream ``rows`` as a CSV attachment, gzipped when the client asks for it.
+
+    ``?gzip=true`` downloads ``<filename>.gz``; otherwise ``Accept-Encoding:
+    gzip`` compresses the transfer with ``Content-Encoding``.
+    """
+    headers = {"Content-Disposition": f"attachment; filename={filename}", "Vary": "Accept-Encoding"}
+    mimetype = "text/csv"
+    compress = False
+    if _to_bool(request.args.get("gzip", False)):
+        compress = True
+        mimetype = "application/gzip"
+        headers["Content-Disposition"] = f"attachment; filename={filename}.gz"
+    elif "gzip" in request.accept_encodings:
+        compress = True
+        headers["Content-Encoding"] = "gzip"
+    return Response(stream_with_context(csv_chunks(rows, compress)), mimetype=mimetype, headers=headers)
+
+
+# Request payload key -> (Asset column, change-log label)
+ASSET_PAYLOAD_FIELDS = {
+    "assetType": ("asset_type", "type"),
+    "assignedUser": ("assigned_user", "user"),
+    "purchaseDate": ("purchase_date", "purchase"),
+    "warrantyExpiryDate": ("warranty_expiry_date", "warranty"),
+    "status": ("status", "status"),
+    "department": ("department", "department"),
+}
+ASSET_DATE_FIELDS = {"purchaseDate", "warrantyExpiryDate"}
+
+
+def describe_asset_changes(data, asset):
+    """Summarize which asset fields an update payload touched for the asset log."""
+    changes = [
+        f"{label} -> {getattr(asset, column)}"
+        for key, (column, label) in ASSET_PAYLOAD_FIELDS.items()
+        if key in data
+    ]
+    return "; ".join(changes) if changes else "Asset updated"
+
+
+def _add_contributions(totals, contributions):
+    for name, amount in contributions.items():
+        totals[name] = totals.get(name, 0) + amount
+
+
+def _plan_bulk_asset_operation(op, existing, seen):
+    """Validate one bulk operation and return ``(action, asset_id, current, fields)``.
+
+    ``existing`` maps asset IDs referenced by the batch to loaded assets and
+    ``seen`` collects IDs already claimed by earlier operations in the batch.
+    """
+    if not isinstance(op, dict):
+        raise ValueError("Operation must be an object.")
+    action = op.get('action')
+    if action not in ("create", "update", "delete"):
+        raise ValueError("action must be one of create, update or delete.")
+
+    asset_id = op.get('assetId')
+    if asset_id is not None and not isinstance(asset_id, str):
+        raise ValueError("assetId must be a string.")
+    if action == 'create' and not asset_id:
+        asset_id = f"AST-{str(uuid.uuid4())[:8]}"
+    if not asset_id:
+        raise ValueError("assetId is required.")
+    if asset_id in seen:
+        raise ValueError(f"Asset {asset_id} appears more than once in this batch.")
+    seen.add(asset_id)
+
+    current = existing.get(asset_id)
+    if action == 'create':
+        if current:
+            raise ValueError(f"Asset {asset_id} already exists.")
+        missing = [key for key in ("assetType", "assignedUser", "purchaseDate", "warrantyExpiryDate") if not op.get(key)]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}.")
+    elif not current:
+        raise ValueError(f"Asset {asset_id} not found.")
+
+    fields = {}
+    if action != 'delete':
+        for key, (column, _) in ASSET_PAYLOAD_FIELDS.items():
+            if key not in op:
+                continue
+            if op[key] is None:
+                raise ValueError(f"{key} cannot be null.")
+            if not isinstance(op[key], str):
+                raise ValueError(f"{key} must be a string.")
+            fields[column] = _parse_date(op[key], key) if key in ASSET_DATE_FIELDS else op[key]
+    if action == 'update' and not fields:
+        raise ValueError(f"Update must set at least one of: {', '.join(ASSET_PAYLOAD_FIELDS)}.")
+    if action == 'create':
+        fields.setdefault("status", "Active")
+        fields.setdefault("department", "IT")
+    return action, asset_id, current, fields
+
+
+def _parse_telemetry_sample(sample):
+    """Validate one telemetry sample and return it as a hardware_telemetry row."""
+    if not isinstance(sample, dict):
+        raise ValueError("Sample must be an object.")
+    device_id = sample.get('deviceId')
+    if not device_id or sample.get('cpuLoad') is None or sample.get('memoryUtil') is None:
+        raise ValueError("deviceId, cpuLoad, and memoryUtil are required")
+    timestamp = sample.get('timestamp')
+    try:
+        cpu_load = int(sample['cpuLoad'])
+        memory_util = int(sample['memoryUtil'])
+    except (TypeError, ValueError):
+        raise ValueError("cpuLoad and memoryUtil must be integers.")
+    return {
+        "device_id": device_id,
+        "timestamp": _parse_datetime(timestamp, 'timestamp') if timestamp else datetime.utcnow().replace(microsecond=0),
+        "cpu_load": cpu_load,
+        "memory_util": memory_util,
+        "is_overheating": _to_bool(sample.get('isOverheating', False)),
+    }
+
+
+# INSERTs that skip rows whose primary key is already stored, per dialect
+IGNORING_INSERTS = {
+    "sqlite": lambda table: sqlite_insert(table).on_conflict_do_nothing(),
+    "postgresql": lambda table: postgresql_insert(table).on_conflict_do_nothing(),
+    "mysql": lambda table: insert(table).prefix_with("IGNORE"),
+}
+
+
+def store_telemetry_samples(rows):
+    """Insert telemetry rows, skipping (device, timestamp) pairs already stored.
+
+    Agents retry batches, so duplicates are expected. Dialects without an
+    ignoring INSERT look the batch's keys up first. Returns the number of
+    rows stored.
+    """
+    table = HardwareTelemetrySample.__table__
+    ignoring_insert = IGNORING_INSERTS.get(db.session.get_bind().dialect.name)
+    if ignoring_insert is not None:
+        result = db.session.execute(ignoring_insert(table), rows)
+        return result.rowcount if result.rowcount >= 0 else len(rows)
+
+    fresh = {(row["device_id"], row["timestamp"]): row for row in rows}
+    timestamps = [row["timestamp"] for row in rows]
+    for device_ids in _chunks(list({row["device_id"] for row in rows}), 500):
+        stored = db.session.execute(
+            select(table.c.device_id, table.c.timestamp)
+            .where(table.c.device_id.in_(device_ids), table.c.timestamp.between(min(timestamps), max(timestamps)))
+        )
+        for key in stored:
+            fresh.pop(tuple(key), None)
+    if fresh:
+        db.session.execute(insert(table), list(fresh.values()))
+    return len(fresh)
+
+
+def refresh_latest_hardware_samples(rows, uow):
+    """Fold telemetry rows into ``hardware_health_records`` (one row per device).
+
+    Only samples newer than the stored ``last_check`` replace the latest view,
+    so late or replayed batches never move a device backwards in time.
+    """
+    newest = {}
+    for row in rows:
+        current = newest.get(row["device_id"])
+        if current is None or row["timestamp"] >= current["timestamp"]:
+            newest[row["device_id"]] = row
+
+    records = {}
+    for chunk in _chunks(list(newest), 500):
+        for record in HardwareHealthRecord.query.filter(HardwareHealthRecord.device_id.in_(chunk)):
+            records[record.device_id] = record
+
+    refreshed = 0
+    for device_id, row in newest.items():
+        record = records.get(device_id)
+        if record is None:
+            uow.add(HardwareHealthRecord(
+                device_id=device_id,
+                cpu_load=row["cpu_load"],
+                memory_util=row["memory_util"],
+                is_overheating=row["is_overheating"],
+                last_check=row["timestamp"],
+            ))
+        elif row["timestamp"] >= record.last_check:
+            uow.track(record)
+            record.cpu_load = row["cpu_load"]
+            record.memory_util = row["memory_util"]
+            record.is_overheating = row["is_overheating"]
+            record.last_check = row["timestamp"]
+        else:
+            continue
+        refreshed += 1
+    return refreshed
+
+
 def can_perform_crud(role):
     """Check if role can perform CRUD operations."""
     return role in ["Admin", "IT Staff"]
 
 
+HARDWARE_ALERT_PREDICATE = or_(HardwareHealthRecord.cpu_load > 85, HardwareHealthRecord.is_overheating.is_(True))
+NETWORK_EVENT_PREDICATE = or_(NetworkDevice.is_downtime.is_(True), NetworkDevice.abnormal_traffic.is_(True))
+
+# Upper bound for date-bucketed counter names (ISO dates sort lexically)
+KPI_DATE_FLOOR = "0000-00-00"
+
+
+def kpi_contributions(obj):
+    """Return the counter deltas a single row contributes to ``kpi_counters``.
+
+    Date buckets (``licenses.expiry.<date>``, ``assets.warranty.<date>``) let
+    "expiring within N days" be answered by summing a range of counter rows.
+    """
+    if isinstance(obj, Asset):
+        return {
+            "assets.total": 1,
+            f"assets.department.{obj.department or 'Unknown'}": 1,
+            f"assets.status.{obj.status}": 1,
+            f"assets.warranty.{obj.warranty_expiry_date.isoformat()}": 1,
+        }
+    if isinstance(obj, License):
+        return {
+            "licenses.total": 1,
+            f"licenses.compliance.{obj.compliance_status}": 1,
+            f"licenses.expiry.{obj.expiry_date.isoformat()}": 1,
+        }
+    if isinstance(obj, HardwareHealthRecord):
+        contributions = {
+            "hardware.total": 1,
+            "hardware.cpu_load_sum": int(obj.cpu_load),
+            "hardware.memory_util_sum": int(obj.memory_util),
+        }
+        if int(obj.cpu_load) > 85 or obj.is_overheating:
+            contributions["hardware.alerts"] = 1
+        return contributions
+    if isinstance(obj, NetworkDevice):
+        contributions = {"network.total": 1}
+        if obj.is_downtime or obj.abnormal_traffic:
+            contributions["network.events"] = 1
+        return contributions
+    if isinstance(obj, BackupJob):
+        return {
+            "backups.total": 1,
+            f"backups.status.{obj.status}": 1,
+        }
+    return {}
+
+
+def adjust_kpi_counters(before=None, after=None):
+    """Apply the difference between two contribution maps to ``kpi_counters``.
+
+    Pass ``before`` for deletes, ``after`` for creates and both for updates.
+    Increments are done in SQL so concurrent writers do not lose updates, and
+    nothing is committed here: callers commit together with the domain write.
+    """
+    deltas = dict(after or {})
+    for name, amount in (before or {}).items():
+        deltas[name] = deltas.get(name, 0) - amount
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        updated = (
+            KpiCounter.query.filter(KpiCounter.name == name)
+            .update({KpiCounter.value: KpiCounter.value + delta}, synchronize_session=False)
+        )
+        if not updated:
+            db.session.add(KpiCounter(name=name, value=delta))
+
+
+def kpi_totals(**selectors):
+    """Sum counters for every keyword selector in a single SELECT.
+
+    A selector is either a list of exact counter names or a ``(low, high)``
+    tuple matching an inclusive range of names.
+    """
+    conditions = []
+    for selector in selectors.values():
+        if isinstance(selector, tuple):
+            conditions.append(KpiCounter.name.between(*selector))
+        else:
+            conditions.append(KpiCounter.name.in_(selector))
+    row = (
+        db.session.query(*[
+            func.coalesce(func.sum(case((condition, KpiCounter.value), else_=0)), 0)
+            for condition in conditions
+        ])
+        .filter(or_(*conditions))
+        .one()
+    )
+    return dict(zip(selectors, row))
+
+
+def kpi_breakdown(prefix):
+    """Return ``{suffix: value}`` for non-zero counters under ``prefix``."""
+    # A key range (not LIKE) so the primary key index is used
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    rows = (
+        KpiCounter.query.filter(KpiCounter.name >= prefix, KpiCounter.name < upper_bound, KpiCounter.value != 0)
+        .order_by(KpiCounter.name.asc())
+        .all()
+    )
+    return {row.name[len(prefix):]: row.value for row in rows}
+
+
+KPI_SOURCE_MODELS = [Asset, License, HardwareHealthRecord, NetworkDevice, BackupJob]
+
+
+def compute_kpi_counters():
+    """Recount every KPI counter from the source tables."""
+    expected = {}
+    for model in KPI_SOURCE_MODELS:
+        for record in model.query.yield_per(1000):
+            for name, amount in kpi_contributions(record).items():
+                expected[name] = expected.get(name, 0) + amount
+    return {name: value for name, value in expected.items() if value}
+
+
+def rebuild_kpi_counters(commit=True):
+    """Replace the stored counters with a full recount."""
+    expected = compute_kpi_counters()
+    KpiCounter.query.delete()
+    db.session.add_all(KpiCounter(name=name, value=value) for name, value in expected.items())
+    if commit:
+        db.session.commit()
+    return expected
+
+
+def check_kpi_counters():
+    """Compare stored counters with a full recount.
+
+    Returns ``{name: {"stored": x, "expected": y}}`` for every mismatch.
+    """
+    expected = compute_kpi_counters()
+    stored = {row.name: row.value for row in KpiCounter.query.filter(KpiCounter.value != 0)}
+    return {
+        name: {"stored": stored.get(name, 0), "expected": expected.get(name, 0)}
+        for name in sorted(set(expected) | set(stored))
+        if stored.get(name, 0) != expected.get(name, 0)
+    }
+
+
+class UnitOfWork:
+    """Collects a domain write with its audit and asset log rows for one commit.
+
+    Use through ``unit_of_work()``. Objects passed to ``add``/``track``/``delete``
+    also have their KPI counter contributions reconciled before the commit.
+    """
+
+    def __init__(self, user_role):
+        self.user_role = user_role
+        self._tracked = []
+        self._deleted = set()
+
+    def add(self, obj):
+        db.session.add(obj)
+        self._tracked.append((obj, {}))
+        return obj
+
+    def track(self, obj):
+        """Snapshot an object's counters before it is modified in place."""
+        self._tracked.append((obj, kpi_contributions(obj)))
+        return obj
+
+    def delete(self, obj):
+        self._tracked.append((obj, kpi_contributions(obj)))
+        self._deleted.add(id(obj))
+        db.session.delete(obj)
+
+    def audit(self, action, details):
+        add_audit_log(action, details, self.user_role, commit=False)
+
+    def asset_log(self, asset, action, details):
+        add_asset_log(
+            asset.asset_id,
+            action,
+            details,
+            self.user_role,
+            asset_type=asset.asset_type,
+            assigned_user=asset.assigned_user,
+            commit=False,
+        )
+
+    def apply_counters(self):
+        before, after = {}, {}
+        for obj, previous in self._tracked:
+            _add_contributions(before, previous)
+            if id(obj) not in self._deleted:
+                _add_contributions(after, kpi_contributions(obj))
+        adjust_kpi_counters(before=before, after=after)
+
+
+@contextmanager
+def unit_of_work(user_role):
+    """Commit everything recorded in the block once, or roll it all back."""
+    uow = UnitOfWork(user_role)
+    try:
+        yield uow
+        uow.apply_counters()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
 def calculate_dashboard_metrics():
     """Calculate dashboard metrics from all database tables."""
-    total_assets = Asset.query.count()
-    
     today = date.today()
     expiry_threshold = today + timedelta(days=90)
     license_alert_threshold = today + timedelta(days=7)
-    licenses_expiring_soon = (
-        License.query.filter(License.expiry_date <= expiry_threshold).count()
-    )
 
-    hardware_alerts = HardwareHealthRecord.query.filter(
-        or_(HardwareHealthRecord.cpu_load > 85, HardwareHealthRecord.is_overheating.is_(True))
-    ).count()
-
-    backup_failures = BackupJob.query.filter(BackupJob.status.in_(["Failure", "Missed"])).count()
+    totals = kpi_totals(
+        total_assets=["assets.total"],
+        licenses_expiring_soon=(f"licenses.expiry.{KPI_DATE_FLOOR}", f"licenses.expiry.{expiry_threshold.isoformat()}"),
+        backup_failures=["backups.status.Failure", "backups.status.Missed"],
+        hardware_alerts=["hardware.alerts"],
+        network_events=["network.events"],
+    )
 
-    network_events = NetworkDevice.query.filter(
-        or_(NetworkDevice.is_downtime.is_(True), NetworkDevice.abnormal_traffic.is_(True))
-    ).count()
-    
     hardware_alert_details = [
         hw.to_dict()
-        for hw in HardwareHealthRecord.query.filter(
-            or_(HardwareHealthRecord.cpu_load > 85, HardwareHealthRecord.is_overheating.is_(True))
-        ).order_by(HardwareHealthRecord.last_check.desc()).limit(20)
+        for hw in HardwareHealthRecord.query.filter(HARDWARE_ALERT_PREDICATE)
+        .order_by(HardwareHealthRecord.last_check.desc())
+        .limit(20)
     ]
 
     network_alert_details = [
         net.to_dict()
-        for net in NetworkDevice.query.filter(
-            or_(NetworkDevice.is_downtime.is_(True), NetworkDevice.abnormal_traffic.is_(True))
-        ).order_by(NetworkDevice.device_id.asc()).limit(20)
+        for net in NetworkDevice.query.filter(NETWORK_EVENT_PREDICATE)
+        .order_by(NetworkDevice.device_id.asc())
+        .limit(20)
     ]
 
     license_alert_details = []
@@ -343,12 +2064,12 @@ def calculate_dashboard_metrics():
         license_alert_details.append(license_dict)
 
     return {
-        "totalAssets": total_assets,
-        "licensesExpiringSoon": licenses_expiring_soon,
-        "hardwareHealthAlerts": hardware_alerts,
+        "totalAssets": totals["total_assets"],
+        "licensesExpiringSoon": totals["licenses_expiring_soon"],
+        "hardwareHealthAlerts": totals["hardware_alerts"],
         "hardwareAlertDetails": hardware_alert_details,
-        "backupFailures": backup_failures,
-        "networkEvents": network_events,
+        "backupFailures": totals["backup_failures"],
+        "networkEvents": totals["network_events"],
         "networkAlertDetails": network_alert_details,
         "licenseAlertDetails": license_alert_details,
     }
@@ -364,58 +2085,70 @@ def generate_report_snapshot():
     start_of_week = datetime.combine(start_of_week_date, datetime.min.time())
     start_of_today = datetime.combine(today, datetime.min.time())
     stale_backup_threshold = now - timedelta(days=7)
+    yesterday = today - timedelta(days=1)
+
+    totals = kpi_totals(
+        total_assets=["assets.total"],
+        assets_under_maintenance=["assets.status.Maintenance"],
+        assets_expiring_soon=(f"assets.warranty.{KPI_DATE_FLOOR}", f"assets.warranty.{warranty_threshold.isoformat()}"),
+        total_licenses=["licenses.total"],
+        unauthorized_licenses=["licenses.compliance.Unauthorized"],
+        licenses_expiring_soon=(f"licenses.expiry.{KPI_DATE_FLOOR}", f"licenses.expiry.{license_threshold.isoformat()}"),
+        expired_licenses=(f"licenses.expiry.{KPI_DATE_FLOOR}", f"licenses.expiry.{yesterday.isoformat()}"),
+        hardware_count=["hardware.total"],
+        cpu_load_sum=["hardware.cpu_load_sum"],
+        memory_util_sum=["hardware.memory_util_sum"],
+        backup_success=["backups.status.Success"],
+        backup_failure=["backups.status.Failure"],
+        backup_missed=["backups.status.Missed"],
+    )
 
     # Assets
-    total_assets = Asset.query.count()
-    assets_per_department = {
-        (dept or "Unknown"): count
-        for dept, count in db.session.query(Asset.department, func.count())
-        .group_by(Asset.department)
-        .all()
-    }
-    assets_under_maintenance = Asset.query.filter(Asset.status == "Maintenance").count()
-    assets_expiring_soon = Asset.query.filter(
-        Asset.warranty_expiry_date <= warranty_threshold
-    ).count()
+    total_assets = totals["total_assets"]
+    assets_per_department = kpi_breakdown("assets.department.")
+    assets_under_maintenance = totals["assets_under_maintenance"]
+    assets_expiring_soon = totals["assets_expiring_soon"]
 
     # Licenses
-    total_licenses = License.query.count()
-    active_licenses = License.query.filter(License.compliance_status != "Unauthorized").count()
-    licenses_expiring_soon = License.query.filter(
-        License.expiry_date <= license_threshold
-    ).count()
-    expired_licenses = License.query.filter(License.expiry_date < today).count()
+    total_licenses = totals["total_licenses"]
+    active_licenses = total_licenses - totals["unauthorized_licenses"]
+    licenses_expiring_soon = totals["licenses_expiring_soon"]
+    expired_licenses = totals["expired_licenses"]
 
     # Hardware & Network
-    hardware_records = HardwareHealthRecord.query.all()
-    hardware_count = len(hardware_records)
-    avg_cpu = round(sum(h.cpu_load for h in hardware_records) / hardware_count, 2) if hardware_count else 0
-    avg_memory = round(sum(h.memory_util for h in hardware_records) / hardware_count, 2) if hardware_count else 0
+    hardware_count = totals["hardware_count"]
+    avg_cpu = round(totals["cpu_load_sum"] / hardware_count, 2) if hardware_count else 0
+    avg_memory = round(totals["memory_util_sum"] / hardware_count, 2) if hardware_count else 0
     # Disk usage data not tracked; reuse memory metrics as an approximation for visual parity
     avg_disk = avg_memory
 
-    alerts_today = HardwareHealthRecord.query.filter(
-        HardwareHealthRecord.last_check >= start_of_today,
-        or_(HardwareHealthRecord.cpu_load > 85, HardwareHealthRecord.is_overheating.is_(True))
-    ).count()
-    alerts_this_week = HardwareHealthRecord.query.filter(
-        HardwareHealthRecord.last_check >= start_of_week,
-        or_(HardwareHealthRecord.cpu_load > 85, HardwareHealthRecord.is_overheating.is_(True))
-    ).count()
-
     top_network_devices = [
         {"deviceId": dev.device_id, "bandwidthMB": dev.bandwidth_mb}
         for dev in NetworkDevice.query.order_by(NetworkDevice.bandwidth_mb.desc()).limit(5)
     ]
 
+    # Time-windowed metrics depend on "now", so they are counted from the tables
+    backups_this_week, alerts_today, alerts_this_week = db.session.query(
+        db.session.query(func.count(BackupJob.id))
+        .filter(BackupJob.last_run_date >= start_of_week)
+        .scalar_subquery(),
+        db.session.query(func.count(HardwareHealthRecord.id))
+        .filter(HardwareHealthRecord.last_check >= start_of_today, HARDWARE_ALERT_PREDICATE)
+        .scalar_subquery(),
+        db.session.query(func.count(HardwareHealthRecord.id))
+        .filter(HardwareHealthRecord.last_check >= start_of_week, HARDWARE_ALERT_PREDICATE)
+        .scalar_subquery(),
+    ).one()
+
     # Backup & Recovery
-    backups_this_week = BackupJob.query.filter(BackupJob.last_run_date >= start_of_week).count()
-    backup_success = BackupJob.query.filter(BackupJob.status == "Success").count()
-    backup_failure = BackupJob.query.filter(BackupJob.status == "Failure").count()
-    backup_missed = BackupJob.query.filter(BackupJob.status == "Missed").count()
+    backup_success = totals["backup_success"]
+    backup_failure = totals["backup_failure"]
+    backup_missed = totals["backup_missed"]
     stale_backups = {
-        job.asset_id
-        for job in BackupJob.query.filter(BackupJob.last_run_date < stale_backup_threshold).all()
+        asset_id
+        for (asset_id,) in db.session.query(BackupJob.asset_id)
+        .filter(BackupJob.last_run_date < stale_backup_threshold)
+        .distinct()
     }
 
     # Departmental asset usage (duplicate of assets_per_department but surfaced separately)
@@ -455,30 +2188,436 @@ def generate_report_snapshot():
         "generatedAt": now.strftime("%Y-%m-%d %H:%M:%S"),
     }
 
-def ensure_backup_comment_column():
-    """Ensure technician_comment column exists on backup_jobs table."""
-    inspector = db.inspect(db.engine)
-    columns = [col["name"] for col in inspector.get_columns("backup_jobs")]
-    if "technician_comment" not in columns:
-        with db.engine.connect() as connection:
-            connection.execute(db.text("ALTER TABLE backup_jobs ADD COLUMN technician_comment VARCHAR(512)"))
-            connection.commit()
-
-
-def ensure_asset_log_columns():
-    """Ensure new columns exist on asset_logs table."""
-    inspector = db.inspect(db.engine)
-    columns = [col["name"] for col in inspector.get_columns("asset_logs")]
-    statements = []
-    if "asset_type" not in columns:
-        statements.append("ALTER TABLE asset_logs ADD COLUMN asset_type VARCHAR(64)")
-    if "assigned_user" not in columns:
-        statements.append("ALTER TABLE asset_logs ADD COLUMN assigned_user VARCHAR(128)")
-    if statements:
+
+class ReportCache:
+    """Per-app, per-worker cache of generated reports keyed by report type.
+
+    Entries expire after ``REPORT_CACHE_TTL`` seconds and are dropped as soon
+    as a transaction touching one of the report source tables commits in
+    this process. Writes served by other gunicorn workers do not reach it, so
+    across workers a report may be up to one TTL stale.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, report_type, ttl):
+        with self._lock:
+            entry = self._entries.get(report_type)
+            if entry is None:
+                return None
+            stored_at, report = entry
+            if ttl <= 0 or time.monotonic() - stored_at > ttl:
+                del self._entries[report_type]
+                return None
+            return report
+
+    def set(self, report_type, report):
+        with self._lock:
+            self._entries[report_type] = (time.monotonic(), report)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+REPORT_BUILDERS = {
+    "overview": generate_report_snapshot,
+}
+
+# Tables whose writes make cached reports stale
+REPORT_SOURCE_TABLES = {
+    "assets",
+    "licenses",
+    "hardware_health_records",
+    "network_devices",
+    "backup_jobs",
+}
+
+
+def get_report_cache():
+    """The report cache of the current application."""
+    return current_app.extensions["report_cache"]
+
+
+def get_report(report_type="overview"):
+    """Return ``(report, cache_hit)``, building the report on a cache miss.
+
+    Misses follow the request's read routing: they are built from the read
+    replica unless the client is sticky to the primary after a write. A
+    cached report is therefore at most replica lag plus one TTL old.
+    """
+    cache = get_report_cache()
+    report = cache.get(report_type, current_app.config["REPORT_CACHE_TTL"])
+    if report is not None:
+        return report, True
+    report = REPORT_BUILDERS[report_type]()
+    cache.set(report_type, report)
+    return report, False
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_flushed_tables(session, flush_context):
+    touched = session.info.setdefault("touched_tables", set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        touched.add(getattr(obj, "__tablename__", None))
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def _track_bulk_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault("touched_tables", set()).add(table.name)
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_reports_on_commit(session):
+    touched = session.info.pop("touched_tables", set())
+    if touched & REPORT_SOURCE_TABLES and has_app_context():
+        get_report_cache().invalidate()
+        current_app.extensions["dashboard_broadcaster"].request_refresh()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_tracked_tables(session):
+    session.info.pop("touched_tables", None)
+
+
+def report_csv_rows(report):
+    """Yield the consolidated report as CSV rows, one section after another."""
+    yield ["Report Generated At", report["generatedAt"]]
+    yield []
+
+    yield ["Assets Report"]
+    yield ["Metric", "Value"]
+    assets_section = report["assetsReport"]
+    yield ["Total Assets", assets_section["totalAssets"]]
+    yield ["Assets Under Maintenance", assets_section["assetsUnderMaintenance"]]
+    yield ["Assets Expiring Warranty Within 30 Days", assets_section["assetsExpiringWarrantySoon"]]
+    yield ["Assets Per Department"]
+    for dept, count in assets_section["assetsPerDepartment"].items():
+        yield [f"  {dept}", count]
+    yield []
+
+    yield ["Software License Report"]
+    licenses_section = report["softwareLicenseReport"]
+    yield ["Metric", "Value"]
+    yield ["Total Licensed Software", licenses_section["totalLicensedSoftware"]]
+    yield ["Active Licenses", licenses_section["activeLicenses"]]
+    yield ["Licenses Expiring Within 30 Days", licenses_section["licensesExpiringIn30Days"]]
+    yield ["Expired Licenses", licenses_section["expiredLicenses"]]
+    yield []
+
+    yield ["Hardware & Network Monitoring Report"]
+    hardware_section = report["hardwareNetworkReport"]
+    yield ["Metric", "Value"]
+    yield ["Average CPU Load (%)", hardware_section["averageCpuLoad"]]
+    yield ["Average RAM Utilization (%)", hardware_section["averageMemoryUtilization"]]
+    yield ["Average Disk Utilization (%)", hardware_section["averageDiskUtilization"]]
+    yield ["Alerts Triggered Today", hardware_section["alertsToday"]]
+    yield ["Alerts Triggered This Week", hardware_section["alertsThisWeek"]]
+    yield ["Top Devices by Bandwidth"]
+    for device in hardware_section["topBandwidthDevices"]:
+        yield [f"  {device['deviceId']}", f"{device['bandwidthMB']} MB"]
+    yield []
+
+    yield ["Backup & Recovery Report"]
+    backup_section = report["backupRecoveryReport"]
+    yield ["Metric", "Value"]
+    yield ["Backups Run This Week", backup_section["backupsRunThisWeek"]]
+    yield ["Successful Backups", backup_section["successfulBackups"]]
+    yield ["Failed Backups", backup_section["failedBackups"]]
+    yield ["Missed Backups", backup_section["missedBackups"]]
+    yield ["Systems Without Recent Backup (>7 days)"]
+    if backup_section["systemsWithoutRecentBackup"]:
+        for system in backup_section["systemsWithoutRecentBackup"]:
+            yield [f"  {system}"]
+    else:
+        yield ["  None"]
+    yield []
+
+    yield ["Department Asset Report"]
+    dept_section = report["departmentAssetReport"]["assetsPerDepartment"]
+    yield ["Department", "Asset Count"]
+    for dept, count in dept_section.items():
+        yield [dept, count]
+
+
+# ==================== LIVE DASHBOARD STREAM ====================
+
+class DashboardBroadcaster:
+    """Compute dashboard metrics once per tick and fan changes out to subscribers.
+
+    Each subscriber is a small queue of ``(event, data)`` pairs: a full
+    ``snapshot`` when it joins (or falls behind), then ``delta`` events that
+    carry only the fields that changed. The ticker thread sleeps while nobody
+    is subscribed, so database load depends on the tick rate, not on viewers.
+    """
+
+    def __init__(self, flask_app, backlog=16):
+        self.app = flask_app
+        self.backlog = backlog
+        self._subscribers = set()
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.ticks = 0
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="iims-dashboard-stream", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.app.config["DASHBOARD_STREAM_INTERVAL"])
+            self._wake.clear()
+            if not self._subscribers:
+                continue
+            try:
+                self.publish()
+            except Exception:
+                self.app.logger.exception("Failed to publish dashboard metrics")
+
+    def subscribe(self, limit=None):
+        """Register a subscriber; returns ``(queue, current snapshot)``.
+
+        Returns None instead when ``limit`` subscribers are already open.
+        """
+        if limit and len(self._subscribers) >= limit:
+            return None
+        # Nobody kept the snapshot fresh while the stream was idle
+        if self._snapshot is None or not self._subscribers:
+            self.publish()
+        subscriber = queue.Queue(maxsize=self.backlog)
+        with self._lock:
+            if limit and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(subscriber)
+            snapshot = self._snapshot
+        self._ensure_thread()
+        return subscriber, snapshot
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def request_refresh(self):
+        """Recompute on the next loop iteration instead of waiting for the tick."""
+        if self._subscribers:
+            self._wake.set()
+
+    def publish(self):
+        """Compute the metrics once and push the changed fields to every subscriber."""
+        with self.app.app_context():
+            metrics = calculate_dashboard_metrics()
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = metrics
+            subscribers = list(self._subscribers)
+            self.ticks += 1
+        if previous is None:
+            changes = metrics
+        else:
+            changes = {key: value for key, value in metrics.items() if previous.get(key) != value}
+        if changes:
+            for subscriber in subscribers:
+                try:
+                    subscriber.put_nowait(("delta", changes))
+                except queue.Full:
+                    # A slow client gets one fresh snapshot instead of a growing backlog
+                    while True:
+                        try:
+                            subscriber.get_nowait()
+                        except queue.Empty:
+                            break
+                    subscriber.put_nowait(("snapshot", metrics))
+        return metrics
+
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+# ==================== SCHEMA MIGRATIONS ====================
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register an ordered schema migration step."""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda step: step[0])
+        return func
+    return register
+
+
+def _column_names(table_name):
+    return {col["name"] for col in db.inspect(db.session.connection()).get_columns(table_name)}
+
+
+def add_missing_columns(table_name, column_ddl):
+    """Add columns given as ``{name: "TYPE"}`` that the table does not have yet."""
+    existing = _column_names(table_name)
+    for name, ddl in column_ddl.items():
+        if name not in existing:
+            db.session.execute(db.text(f"ALTER TABLE {table_name} ADD COLUMN {name} {ddl}"))
+
+
+def create_missing_indexes(*models):
+    """Create every index declared on ``models`` that the database lacks."""
+    connection = db.session.connection()
+    for model in models:
+        for index in model.__table__.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+def backfill_in_chunks(table_name, where, assignments, params=None, chunk_size=1000):
+    """Run ``UPDATE table SET assignments`` over matching rows in id-ordered chunks.
+
+    Each chunk commits on its own, so a large backfill never holds one long
+    write transaction and can resume where it stopped: ``where`` should stop
+    matching rows once they are updated. Returns the number of rows updated.
+    """
+    params = dict(params or {})
+    last_id, updated = 0, 0
+    while True:
+        ids = db.session.execute(
+            db.text(f"SELECT id FROM {table_name} WHERE id > :last_id AND ({where}) ORDER BY id LIMIT :limit"),
+            {**params, "last_id": last_id, "limit": chunk_size},
+        ).scalars().all()
+        if not ids:
+            return updated
+        db.session.execute(
+            db.text(f"UPDATE {table_name} SET {assignments} WHERE id >= :first_id AND id <= :last_id AND ({where})"),
+            {**params, "first_id": ids[0], "last_id": ids[-1]},
+        )
+        db.session.commit()
+        updated += len(ids)
+        last_id = ids[-1]
+
+
+@migration(1, "Add backup_jobs.technician_comment")
+def _migrate_backup_comment_column():
+    add_missing_columns("backup_jobs", {"technician_comment": "VARCHAR(512)"})
+
+
+@migration(2, "Add asset_logs.asset_type and asset_logs.assigned_user")
+def _migrate_asset_log_columns():
+    add_missing_columns("asset_logs", {"asset_type": "VARCHAR(64)", "assigned_user": "VARCHAR(128)"})
+
+
+@migration(3, "Leave asset log details of legacy entries unknown")
+def _keep_legacy_asset_log_details_unknown():
+    """Intentionally empty: legacy asset_logs rows keep NULL details.
+
+    This step used to backfill them with each asset's current type and
+    assignee, which invented history that the as-of replay then trusted. No
+    source holds the real values, so there is nothing to backfill; the step
+    stays registered so version numbers remain stable. Data backfills belong
+    in ``backfill_in_chunks``.
+    """
+
+
+@migration(4, "Backfill kpi_counters from the source tables")
+def _backfill_kpi_counters():
+    rebuild_kpi_counters(commit=False)
+
+
+@migration(5, "Index hot filter and sort columns")
+def _create_hot_path_indexes():
+    create_missing_indexes(Asset, AssetComplaint, License, HardwareHealthRecord, BackupJob,
+                           NetworkDevice, AuditLog, AssetLog)
+
+
+@migration(6, "Index audit log actions by time")
+def _create_audit_action_index():
+    create_missing_indexes(AuditLog)
+
+
+@migration(7, "Snapshot the asset inventory as the as-of baseline")
+def _take_baseline_asset_snapshot():
+    take_asset_snapshot(commit=False)
+
+
+@migration(8, "Add the change_log sync table")
+def _create_change_log():
+    ChangeRecord.__table__.create(db.session.connection(), checkfirst=True)
+
+
+@migration(9, "Add the revoked_tokens table")
+def _create_revoked_tokens():
+    RevokedToken.__table__.create(db.session.connection(), checkfirst=True)
+
+
+LATEST_SCHEMA_VERSION = max(version for version, _, _ in MIGRATIONS)
+
+
+def current_schema_version():
+    """Return the stored schema version, or None if the database is unversioned."""
+    try:
         with db.engine.connect() as connection:
-            for stmt in statements:
-                connection.execute(db.text(stmt))
-            connection.commit()
+            return connection.execute(db.text("SELECT version FROM schema_version")).scalar()
+    except DBAPIError:
+        return None
+
+
+def _stamp_schema_version(version):
+    db.session.execute(db.text("DELETE FROM schema_version"))
+    db.session.execute(db.text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": version})
+
+
+def migrate_database():
+    """Bring the schema up to ``LATEST_SCHEMA_VERSION``.
+
+    The fast path reads one integer and returns without any reflection. A new
+    database gets ``create_all()`` and is stamped current; an unversioned
+    legacy database is treated as version 0 and runs every step. Seed data is
+    only considered the first time a database is versioned, never on the fast
+    path. Returns the list of applied migration versions.
+    """
+    version = current_schema_version()
+    if version == LATEST_SCHEMA_VERSION:
+        return []
+
+    if version is None:
+        fresh = not db.inspect(db.engine).has_table(Asset.__tablename__)
+        # Primary only: a read replica receives the schema through replication
+        db.create_all(bind_key=None)
+        if fresh:
+            _stamp_schema_version(LATEST_SCHEMA_VERSION)
+            db.session.commit()
+            seed_initial_data()
+            take_asset_snapshot()
+            return []
+    else:
+        db.create_all(bind_key=None)
+
+    applied = []
+    for step_version, description, step in MIGRATIONS:
+        if version is not None and step_version <= version:
+            continue
+        step()
+        _stamp_schema_version(step_version)
+        db.session.commit()
+        current_app.logger.info("Applied schema migration %s: %s", step_version, description)
+        applied.append(step_version)
+    if version is None:
+        seed_initial_data()
+    return applied
 
 
 def seed_initial_data():
@@ -752,50 +2891,96 @@ def seed_initial_data():
 
     if seeded:
         add_audit_log("SYSTEM", "IIMS System seeded", "System", commit=False)
+        db.session.flush()
+        rebuild_kpi_counters(commit=False)
         db.session.commit()
 
 
 def initialize_database(reset=False):
-    """Create tables and seed data."""
-    with app.app_context():
-        if reset:
-            db.drop_all()
-        db.create_all()
-        ensure_backup_comment_column()
-        ensure_asset_log_columns()
-        seed_initial_data()
+    """Migrate the schema (seeding a new database) inside the current app context."""
+    get_report_cache().invalidate()
+    get_audit_writer().flush()
+    if reset:
+        db.drop_all(bind_key=None)
+    applied = migrate_database()
+    current_app.extensions["database_ready"].set()
+    return applied
 
 
-# Ensure database is initialized when the module is imported
-initialize_database()
+_database_init_lock = threading.Lock()
+
+
+def ensure_database_initialized():
+    """Initialize the database once per application, on its first request."""
+    if current_app.extensions["database_ready"].is_set():
+        return
+    with _database_init_lock:
+        if not current_app.extensions["database_ready"].is_set():
+            initialize_database()
 
 
 # ==================== API ENDPOINTS ====================
 
-@app.route('/api/role', methods=['GET', 'POST'])
+@api.route('/api/role', methods=['GET', 'POST'])
 def role():
-    """Get or set current user role"""
-    global current_role
+    """Get current user role (roles are assigned by signing in)"""
     if request.method == 'POST':
-        data = request.json
-        current_role = data.get('role', 'Admin')
-        return jsonify({"role": current_role})
-    return jsonify({"role": current_role})
+        return jsonify({"error": "Role is determined by the signed-in user"}), 400
+    return jsonify({"role": g.current_role})
 
-@app.route('/api/dashboard/metrics', methods=['GET'])
+@api.route('/api/dashboard/metrics', methods=['GET'])
 def dashboard_metrics():
     """Get dashboard metrics"""
     return jsonify(calculate_dashboard_metrics())
 
-@app.route('/api/assets', methods=['GET', 'POST'])
+@api.route('/api/dashboard/metrics/stream', methods=['GET'])
+def dashboard_metrics_stream():
+    """Server-Sent Events feed: a metrics snapshot, then only the fields that change.
+
+    Streams are capped per process (503 beyond ``DASHBOARD_STREAM_MAX_SUBSCRIBERS``)
+    and closed after ``DASHBOARD_STREAM_MAX_SECONDS``; EventSource then
+    reconnects, so a worker thread is never held for good.
+    """
+    broadcaster = current_app.extensions["dashboard_broadcaster"]
+    keepalive = current_app.config["DASHBOARD_STREAM_KEEPALIVE"]
+    max_seconds = current_app.config["DASHBOARD_STREAM_MAX_SECONDS"]
+    subscription = broadcaster.subscribe(limit=current_app.config["DASHBOARD_STREAM_MAX_SUBSCRIBERS"])
+    if subscription is None:
+        return (jsonify({"error": "Too many open dashboard streams; poll /api/dashboard/metrics instead"}),
+                503, {"Retry-After": "30"})
+    subscriber, snapshot = subscription
+
+    def events():
+        deadline = time.monotonic() + max_seconds if max_seconds > 0 else None
+        try:
+            yield _sse_event("snapshot", snapshot)
+            while True:
+                timeout = keepalive
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        return
+                try:
+                    event_name, data = subscriber.get(timeout=timeout)
+                except queue.Empty:
+                    if deadline is None or time.monotonic() < deadline:
+                        yield ": keep-alive\n\n"
+                    continue
+                yield _sse_event(event_name, data)
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@api.route('/api/assets', methods=['GET', 'POST'])
 def assets():
     """CRUD operations for assets"""
-    global current_role, current_user_name
     
     if request.method == 'GET':
         query = Asset.query
-        if current_role == "Employee" and current_user_name:
-            query = query.filter(Asset.assigned_user == current_user_name)
+        if g.current_role == "Employee" and g.current_user_name:
+            query = query.filter(Asset.assigned_user == g.current_user_name)
         else:
             employee_filter = request.args.get('assignedUser')
             type_filter = request.args.get('assetType')
@@ -803,11 +2988,10 @@ def assets():
                 query = query.filter(Asset.assigned_user == employee_filter)
             if type_filter:
                 query = query.filter(Asset.asset_type == type_filter)
-        records = query.all()
-        return jsonify([asset.to_dict() for asset in records])
+        return list_response(query, Asset)
     
     elif request.method == 'POST':
-        if not can_perform_crud(current_role):
+        if not can_perform_crud(g.current_role):
             return jsonify({"error": "Insufficient permissions"}), 403
         
         data = request.json
@@ -829,17 +3013,10 @@ def assets():
                 status=data.get('status', 'Active'),
                 department=data.get('department', 'IT'),
             )
-            db.session.add(asset)
-            db.session.commit()
-            add_audit_log("CREATE", f"Created asset {asset.asset_id}", current_role)
-            add_asset_log(
-                asset.asset_id,
-                "CREATE",
-                f"{asset.asset_type} assigned to {asset.assigned_user}",
-                current_role,
-                asset_type=asset.asset_type,
-                assigned_user=asset.assigned_user,
-            )
+            with unit_of_work(g.current_role) as uow:
+                uow.add(asset)
+                uow.audit("CREATE", f"Created asset {asset.asset_id}")
+                uow.asset_log(asset, "CREATE", f"{asset.asset_type} assigned to {asset.assigned_user}")
             return jsonify(asset.to_dict()), 201
         
         elif action == 'update':
@@ -847,49 +3024,31 @@ def assets():
             asset = Asset.query.filter_by(asset_id=asset_id).first()
             if not asset:
                 return jsonify({"error": "Asset not found"}), 404
+            try:
+                purchase_date = _parse_date(data['purchaseDate'], 'purchaseDate') if 'purchaseDate' in data else None
+                warranty_expiry_date = (
+                    _parse_date(data['warrantyExpiryDate'], 'warrantyExpiryDate')
+                    if 'warrantyExpiryDate' in data else None
+                )
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
 
-            if 'assetType' in data:
-                asset.asset_type = data['assetType']
-            if 'assignedUser' in data:
-                asset.assigned_user = data['assignedUser']
-            if 'purchaseDate' in data:
-                try:
-                    asset.purchase_date = _parse_date(data['purchaseDate'], 'purchaseDate')
-                except ValueError as exc:
-                    return jsonify({"error": str(exc)}), 400
-            if 'warrantyExpiryDate' in data:
-                try:
-                    asset.warranty_expiry_date = _parse_date(data['warrantyExpiryDate'], 'warrantyExpiryDate')
-                except ValueError as exc:
-                    return jsonify({"error": str(exc)}), 400
-            if 'status' in data:
-                asset.status = data['status']
-            if 'department' in data:
-                asset.department = data['department']
-            db.session.commit()
-            add_audit_log("UPDATE", f"Updated asset {asset_id}", current_role)
-            changes = []
-            if 'assetType' in data:
-                changes.append(f"type -> {asset.asset_type}")
-            if 'assignedUser' in data:
-                changes.append(f"user -> {asset.assigned_user}")
-            if 'purchaseDate' in data:
-                changes.append(f"purchase -> {asset.purchase_date}")
-            if 'warrantyExpiryDate' in data:
-                changes.append(f"warranty -> {asset.warranty_expiry_date}")
-            if 'status' in data:
-                changes.append(f"status -> {asset.status}")
-            if 'department' in data:
-                changes.append(f"department -> {asset.department}")
-            detail_message = "; ".join(changes) if changes else "Asset updated"
-            add_asset_log(
-                asset_id,
-                "UPDATE",
-                detail_message,
-                current_role,
-                asset_type=asset.asset_type,
-                assigned_user=asset.assigned_user,
-            )
+            with unit_of_work(g.current_role) as uow:
+                uow.track(asset)
+                if 'assetType' in data:
+                    asset.asset_type = data['assetType']
+                if 'assignedUser' in data:
+                    asset.assigned_user = data['assignedUser']
+                if purchase_date:
+                    asset.purchase_date = purchase_date
+                if warranty_expiry_date:
+                    asset.warranty_expiry_date = warranty_expiry_date
+                if 'status' in data:
+                    asset.status = data['status']
+                if 'department' in data:
+                    asset.department = data['department']
+                uow.audit("UPDATE", f"Updated asset {asset_id}")
+                uow.asset_log(asset, "UPDATE", describe_asset_changes(data, asset))
             return jsonify(asset.to_dict())
         
         elif action == 'delete':
@@ -897,74 +3056,189 @@ def assets():
             asset = Asset.query.filter_by(asset_id=asset_id).first()
             if not asset:
                 return jsonify({"error": "Asset not found"}), 404
-            db.session.delete(asset)
-            db.session.commit()
-            add_audit_log("DELETE", f"Deleted asset {asset_id}", current_role)
-            add_asset_log(
-                asset_id,
-                "DELETE",
-                "Asset removed from inventory",
-                current_role,
-                asset_type=asset.asset_type,
-                assigned_user=asset.assigned_user,
-            )
+            with unit_of_work(g.current_role) as uow:
+                uow.delete(asset)
+                uow.audit("DELETE", f"Deleted asset {asset_id}")
+                uow.asset_log(asset, "DELETE", "Asset removed from inventory")
             return jsonify(asset.to_dict())
 
-@app.route('/api/assets/export', methods=['GET'])
+@api.route('/api/assets/bulk', methods=['POST'])
+def assets_bulk():
+    """Apply a batch of asset create/update/delete operations in one transaction.
+
+    Every operation is validated before anything is written; if any fails the
+    whole batch is rejected with per-item errors. Assets, audit entries and
+    asset log entries are then written with executemany-style statements and
+    committed once.
+    """
+    if not can_perform_crud(g.current_role):
+        return jsonify({"error": "Insufficient permissions"}), 403
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    operations = payload.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    max_operations = current_app.config["BULK_MAX_OPERATIONS"]
+    if len(operations) > max_operations:
+        return jsonify({"error": f"A batch may contain at most {max_operations} operations"}), 413
+
+    started = time.perf_counter()
+    referenced_ids = list({
+        op['assetId'] for op in operations
+        if isinstance(op, dict) and isinstance(op.get('assetId'), str) and op['assetId']
+    })
+    existing = {}
+    for chunk in _chunks(referenced_ids, 500):
+        for asset in Asset.query.filter(Asset.asset_id.in_(chunk)):
+            existing[asset.asset_id] = asset
+
+    planned, results, seen = [], [], set()
+    for index, op in enumerate(operations):
+        action = op.get('action') if isinstance(op, dict) else None
+        if not isinstance(action, str):
+            action = None
+        try:
+            plan = _plan_bulk_asset_operation(op, existing, seen)
+        except ValueError as exc:
+            asset_id = op.get('assetId') if isinstance(op, dict) else None
+            if not isinstance(asset_id, str):
+                asset_id = None
+            results.append({"index": index, "action": action, "assetId": asset_id, "status": "error", "error": str(exc)})
+            continue
+        planned.append((op, plan))
+        results.append({"index": index, "action": action, "assetId": plan[1], "status": "valid"})
+
+    if any(result["status"] == "error" for result in results):
+        return jsonify({"error": "Validation failed; no operations were applied", "results": results}), 400
+
+    now = datetime.utcnow()
+    creates, updates, deletes = [], [], []
+    audit_rows, asset_log_rows, change_rows = [], [], []
+    kpi_before, kpi_after = {}, {}
+    for (op, (action, asset_id, current, fields)), result in zip(planned, results):
+        if action == 'create':
+            row = dict(fields, asset_id=asset_id)
+            creates.append(row)
+            state = Asset(**row)
+            _add_contributions(kpi_after, kpi_contributions(state))
+            audit_details = f"Created asset {asset_id}"
+            log_details = f"{state.asset_type} assigned to {state.assigned_user}"
+        elif action == 'update':
+            updates.append(dict(fields, id=current.id))
+            state = Asset(**{
+                column: fields.get(column, getattr(current, column))
+                for column, _ in ASSET_PAYLOAD_FIELDS.values()
+            }, asset_id=asset_id)
+            _add_contributions(kpi_before, kpi_contributions(current))
+            _add_contributions(kpi_after, kpi_contributions(state))
+            audit_details = f"Updated asset {asset_id}"
+            log_details = describe_asset_changes(op, state)
+        else:
+            deletes.append(current.id)
+            state = current
+            _add_contributions(kpi_before, kpi_contributions(current))
+            audit_details = f"Deleted asset {asset_id}"
+            log_details = "Asset removed from inventory"
+
+        audit_rows.append({
+            "action": action.upper(),
+            "details": audit_details,
+            "user_role": g.current_role,
+            "timestamp": now,
+        })
+        change_rows.append(sync_change_row("assets", asset_id, "delete" if action == 'delete' else "upsert", now))
+        asset_log_rows.append({
+            "asset_id": asset_id,
+            "action": action.upper(),
+            "details": log_details,
+            "asset_type": state.asset_type,
+            "assigned_user": state.assigned_user,
+            "performed_by": g.current_role or "System",
+            "timestamp": now,
+        })
+        result["status"] = {"create": "created", "update": "updated", "delete": "deleted"}[action]
+
+    try:
+        if creates:
+            db.session.execute(insert(Asset), creates)
+        if updates:
+            db.session.execute(update(Asset), updates)
+        for chunk in _chunks(deletes, 500):
+            db.session.execute(delete(Asset).where(Asset.id.in_(chunk)))
+        db.session.execute(insert(AuditLog), audit_rows)
+        db.session.execute(insert(AssetLog), asset_log_rows)
+        db.session.execute(insert(ChangeRecord), change_rows)
+        adjust_kpi_counters(before=kpi_before, after=kpi_after)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Batch conflicts with existing assets; no operations were applied"}), 409
+
+    elapsed = time.perf_counter() - started
+    return jsonify({
+        "results": results,
+        "summary": {
+            "operations": len(planned),
+            "created": len(creates),
+            "updated": len(updates),
+            "deleted": len(deletes),
+            "elapsedMs": round(elapsed * 1000, 2),
+            "operationsPerSecond": round(len(planned) / elapsed, 1) if elapsed else None,
+        },
+    })
+
+@api.route('/api/assets/export', methods=['GET'])
 def export_employee_assets():
     """Allow employees to download their asset list as CSV."""
-    global current_role, current_user_name, current_user, is_authenticated
 
-    if not is_authenticated or current_role != "Employee":
+    if not g.is_authenticated or g.current_role != "Employee":
         return jsonify({"error": "Insufficient permissions"}), 403
 
-    target_user = (current_user_name or current_user or "").strip()
-    query = Asset.query
+    target_user = (g.current_user_name or g.current_user or "").strip()
+    _, columns = EXPORTS["assets"]
+    statement = select(*[column for _, column in columns]).order_by(Asset.asset_id.asc())
     if target_user:
-        query = query.filter(Asset.assigned_user == target_user)
-    assets = query.order_by(Asset.asset_id.asc()).all()
-
-    csv_buffer = io.StringIO()
-    writer = csv.writer(csv_buffer)
-    writer.writerow(["Asset ID", "Asset Type", "Assigned User", "Purchase Date", "Warranty Expiry Date", "Department", "Status"])
-    for asset in assets:
-        writer.writerow([
-            asset.asset_id,
-            asset.asset_type,
-            asset.assigned_user,
-            asset.purchase_date.strftime("%Y-%m-%d"),
-            asset.warranty_expiry_date.strftime("%Y-%m-%d"),
-            asset.department,
-            asset.status,
-        ])
+        statement = statement.where(Asset.assigned_user == target_user)
 
-    csv_buffer.seek(0)
     sanitized_user = target_user.lower().replace(" ", "_") if target_user else "employee"
     filename = f"{sanitized_user or 'employee'}_report.csv"
-    return Response(
-        csv_buffer.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    rows = itertools.chain([[header for header, _ in columns]], stream_rows(statement))
+    return csv_response(filename, rows)
+
+@api.route('/api/export/<dataset>', methods=['GET'])
+def export_dataset(dataset):
+    """Admin-only streaming CSV export of a whole table."""
+    if g.current_role != "Admin":
+        return jsonify({"error": "Insufficient permissions"}), 403
+    if dataset not in EXPORTS:
+        return jsonify({"error": f"Unknown export. Choose one of: {', '.join(EXPORTS)}"}), 404
+    if dataset == "audit-log":
+        get_audit_writer().flush()
 
-@app.route('/api/complaints', methods=['GET', 'POST'])
+    model, columns = EXPORTS[dataset]
+    statement = select(*[column for _, column in columns]).order_by(model.id.asc())
+    rows = itertools.chain([[header for header, _ in columns]], stream_rows(statement))
+    return csv_response(f"{dataset}.csv", rows)
+
+@api.route('/api/complaints', methods=['GET', 'POST'])
 def complaints():
     """Employee asset complaints (submit) and IT staff review (list)."""
-    global current_role, current_user_name, current_user, is_authenticated
 
     if request.method == 'GET':
-        if not is_authenticated or current_role not in ["IT Staff", "Admin"]:
+        if not g.is_authenticated or g.current_role not in ["IT Staff", "Admin"]:
             return jsonify({"error": "Insufficient permissions"}), 403
-        complaints = AssetComplaint.query.order_by(AssetComplaint.created_at.desc()).all()
-        return jsonify([complaint.to_dict() for complaint in complaints])
+        return json_array_response(AssetComplaint.query.order_by(AssetComplaint.created_at.desc()),
+                                   ROW_SERIALIZERS[AssetComplaint])
 
-    if not is_authenticated:
+    if not g.is_authenticated:
         return jsonify({"error": "Insufficient permissions"}), 403
 
     data = request.json or {}
 
     # Employee submission
-    if current_role == "Employee":
+    if g.current_role == "Employee":
         asset_id = data.get('assetId')
         issue = (data.get('issue') or '').strip()
 
@@ -972,8 +3246,8 @@ def complaints():
             return jsonify({"error": "Asset and issue are required"}), 400
 
         asset = Asset.query.filter_by(asset_id=asset_id).first()
-        employee_name = current_user_name or ""
-        employee_username = current_user
+        employee_name = g.current_user_name or ""
+        employee_username = g.current_user
         if not asset or (employee_name and asset.assigned_user != employee_name):
             return jsonify({"error": "Invalid asset selection"}), 400
 
@@ -984,14 +3258,14 @@ def complaints():
             employee_username=employee_username,
             status="Open",
         )
-        db.session.add(complaint)
-        db.session.commit()
-        add_audit_log("COMPLAINT", f"Complaint submitted for asset {asset_id}", current_role)
+        with unit_of_work(g.current_role) as uow:
+            uow.add(complaint)
+            uow.audit("COMPLAINT", f"Complaint submitted for asset {asset_id}")
 
         return jsonify(complaint.to_dict()), 201
 
     # IT Staff/Admin status update
-    if current_role not in ["IT Staff", "Admin"]:
+    if g.current_role not in ["IT Staff", "Admin"]:
         return jsonify({"error": "Insufficient permissions"}), 403
 
     # Prevent IT Staff/Admin from trying to create complaints
@@ -1013,22 +3287,20 @@ def complaints():
         "closed": "Closed",
     }[new_status.lower()]
 
-    complaint.status = normalized
-    db.session.commit()
-    add_audit_log("COMPLAINT_UPDATE", f"Complaint {complaint_id} set to {normalized}", current_role)
+    with unit_of_work(g.current_role) as uow:
+        complaint.status = normalized
+        uow.audit("COMPLAINT_UPDATE", f"Complaint {complaint_id} set to {normalized}")
     return jsonify(complaint.to_dict())
 
-@app.route('/api/licenses', methods=['GET', 'POST'])
+@api.route('/api/licenses', methods=['GET', 'POST'])
 def licenses():
     """CRUD operations for licenses"""
-    global current_role
     
     if request.method == 'GET':
-        licenses = License.query.all()
-        return jsonify([license.to_dict() for license in licenses])
+        return list_response(License.query, License)
     
     elif request.method == 'POST':
-        if not can_perform_crud(current_role):
+        if not can_perform_crud(g.current_role):
             return jsonify({"error": "Insufficient permissions"}), 403
         
         data = request.json
@@ -1049,9 +3321,9 @@ def licenses():
                 expiry_date=expiry_date,
                 compliance_status=data.get('complianceStatus', 'Compliant'),
             )
-            db.session.add(license_obj)
-            db.session.commit()
-            add_audit_log("CREATE", f"Created license {license_obj.license_id}", current_role)
+            with unit_of_work(g.current_role) as uow:
+                uow.add(license_obj)
+                uow.audit("CREATE", f"Created license {license_obj.license_id}")
             return jsonify(license_obj.to_dict()), 201
         
         elif action == 'update':
@@ -1059,24 +3331,26 @@ def licenses():
             license_obj = License.query.filter_by(license_id=license_id).first()
             if not license_obj:
                 return jsonify({"error": "License not found"}), 404
+            try:
+                expiry_date = _parse_date(data['expiryDate'], 'expiryDate') if 'expiryDate' in data else None
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
 
-            if 'softwareName' in data:
-                license_obj.software_name = data['softwareName']
-            if 'licenseKey' in data:
-                license_obj.license_key = data['licenseKey']
-            if 'totalSeats' in data:
-                license_obj.total_seats = data['totalSeats']
-            if 'usedSeats' in data:
-                license_obj.used_seats = data['usedSeats']
-            if 'expiryDate' in data:
-                try:
-                    license_obj.expiry_date = _parse_date(data['expiryDate'], 'expiryDate')
-                except ValueError as exc:
-                    return jsonify({"error": str(exc)}), 400
-            if 'complianceStatus' in data:
-                license_obj.compliance_status = data['complianceStatus']
-            db.session.commit()
-            add_audit_log("UPDATE", f"Updated license {license_id}", current_role)
+            with unit_of_work(g.current_role) as uow:
+                uow.track(license_obj)
+                if 'softwareName' in data:
+                    license_obj.software_name = data['softwareName']
+                if 'licenseKey' in data:
+                    license_obj.license_key = data['licenseKey']
+                if 'totalSeats' in data:
+                    license_obj.total_seats = data['totalSeats']
+                if 'usedSeats' in data:
+                    license_obj.used_seats = data['usedSeats']
+                if expiry_date:
+                    license_obj.expiry_date = expiry_date
+                if 'complianceStatus' in data:
+                    license_obj.compliance_status = data['complianceStatus']
+                uow.audit("UPDATE", f"Updated license {license_id}")
             return jsonify(license_obj.to_dict())
         
         elif action == 'delete':
@@ -1084,20 +3358,18 @@ def licenses():
             license_obj = License.query.filter_by(license_id=license_id).first()
             if not license_obj:
                 return jsonify({"error": "License not found"}), 404
-            db.session.delete(license_obj)
-            db.session.commit()
-            add_audit_log("DELETE", f"Deleted license {license_id}", current_role)
+            with unit_of_work(g.current_role) as uow:
+                uow.delete(license_obj)
+                uow.audit("DELETE", f"Deleted license {license_id}")
             return jsonify(license_obj.to_dict())
 
-@app.route('/api/monitoring/hardware', methods=['GET', 'POST', 'DELETE'])
+@api.route('/api/monitoring/hardware', methods=['GET', 'POST', 'DELETE'])
 def hardware_health():
     """Get hardware health monitoring data"""
     if request.method == 'GET':
-        records = HardwareHealthRecord.query.all()
-        return jsonify([record.to_dict() for record in records])
+        return list_response(HardwareHealthRecord.query, HardwareHealthRecord)
 
-    global current_role, is_authenticated
-    if not is_authenticated or current_role != "Admin":
+    if not g.is_authenticated or g.current_role != "Admin":
         return jsonify({"error": "Insufficient permissions"}), 403
 
     if request.method == 'POST':
@@ -1123,9 +3395,9 @@ def hardware_health():
             is_overheating=is_overheating,
             last_check=parsed_last_check,
         )
-        db.session.add(record)
-        db.session.commit()
-        add_audit_log("CREATE_HARDWARE", f"Hardware record added for {device_id}", current_role)
+        with unit_of_work(g.current_role) as uow:
+            uow.add(record)
+            uow.audit("CREATE_HARDWARE", f"Hardware record added for {device_id}")
         return jsonify(record.to_dict()), 201
 
     device_id = request.args.get('deviceId')
@@ -1136,20 +3408,71 @@ def hardware_health():
     if not record:
         return jsonify({"error": "Hardware record not found"}), 404
 
-    db.session.delete(record)
-    db.session.commit()
-    add_audit_log("DELETE_HARDWARE", f"Hardware record {device_id} removed", current_role)
+    with unit_of_work(g.current_role) as uow:
+        uow.delete(record)
+        uow.audit("DELETE_HARDWARE", f"Hardware record {device_id} removed")
     return jsonify({"success": True})
 
-@app.route('/api/monitoring/network', methods=['GET', 'POST', 'DELETE'])
+@api.route('/api/monitoring/hardware/telemetry', methods=['GET', 'POST'])
+def hardware_telemetry():
+    """Time-series hardware telemetry: batch ingest (POST) and per-device history (GET)."""
+    if request.method == 'GET':
+        device_id = request.args.get('deviceId')
+        if not device_id:
+            return jsonify({"error": "deviceId query parameter is required"}), 400
+        query = HardwareTelemetrySample.query.filter(HardwareTelemetrySample.device_id == device_id)
+        try:
+            if request.args.get('since'):
+                query = query.filter(HardwareTelemetrySample.timestamp >= _parse_datetime(request.args['since'], 'since'))
+            if request.args.get('until'):
+                query = query.filter(HardwareTelemetrySample.timestamp <= _parse_datetime(request.args['until'], 'until'))
+            page = _page_args()
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        limit = page[0] if page else DEFAULT_PAGE_SIZE
+        samples = query.order_by(HardwareTelemetrySample.timestamp.desc()).limit(limit).all()
+        return jsonify([sample.to_dict() for sample in reversed(samples)])
+
+    if not g.is_authenticated or g.current_role != "Admin":
+        return jsonify({"error": "Insufficient permissions"}), 403
+
+    samples = (request.json or {}).get('samples')
+    if not isinstance(samples, list) or not samples:
+        return jsonify({"error": "samples must be a non-empty list"}), 400
+    max_samples = current_app.config["TELEMETRY_MAX_SAMPLES"]
+    if len(samples) > max_samples:
+        return jsonify({"error": f"A batch may contain at most {max_samples} samples"}), 413
+
+    started = time.perf_counter()
+    rows, errors = [], []
+    for index, sample in enumerate(samples):
+        try:
+            rows.append(_parse_telemetry_sample(sample))
+        except ValueError as exc:
+            errors.append({"index": index, "error": str(exc)})
+    if errors:
+        return jsonify({"error": "Validation failed; no samples were stored", "errors": errors}), 400
+
+    with unit_of_work(g.current_role) as uow:
+        stored = store_telemetry_samples(rows)
+        refreshed = refresh_latest_hardware_samples(rows, uow)
+        uow.audit("TELEMETRY_INGEST", f"Ingested {len(rows)} telemetry samples")
+
+    elapsed = time.perf_counter() - started
+    return jsonify({
+        "received": len(rows),
+        "stored": stored,
+        "devicesRefreshed": refreshed,
+        "elapsedMs": round(elapsed * 1000, 2),
+    }), 201
+
+@api.route('/api/monitoring/network', methods=['GET', 'POST', 'DELETE'])
 def network_usage():
     """Get network usage monitoring data"""
     if request.method == 'GET':
-        devices = NetworkDevice.query.all()
-        return jsonify([device.to_dict() for device in devices])
+        return list_response(NetworkDevice.query, NetworkDevice)
 
-    global current_role, is_authenticated
-    if not is_authenticated or current_role != "Admin":
+    if not g.is_authenticated or g.current_role != "Admin":
         return jsonify({"error": "Insufficient permissions"}), 403
 
     if request.method == 'POST':
@@ -1168,9 +3491,9 @@ def network_usage():
             is_downtime=is_downtime,
             abnormal_traffic=abnormal_traffic,
         )
-        db.session.add(entry)
-        db.session.commit()
-        add_audit_log("CREATE_NETWORK", f"Network device {device_id} added", current_role)
+        with unit_of_work(g.current_role) as uow:
+            uow.add(entry)
+            uow.audit("CREATE_NETWORK", f"Network device {device_id} added")
         return jsonify(entry.to_dict()), 201
 
     device_id = request.args.get('deviceId')
@@ -1181,22 +3504,20 @@ def network_usage():
     if not entry:
         return jsonify({"error": "Network record not found"}), 404
 
-    db.session.delete(entry)
-    db.session.commit()
-    add_audit_log("DELETE_NETWORK", f"Network device {device_id} removed", current_role)
+    with unit_of_work(g.current_role) as uow:
+        uow.delete(entry)
+        uow.audit("DELETE_NETWORK", f"Network device {device_id} removed")
     return jsonify({"success": True})
 
-@app.route('/api/monitoring/backup', methods=['GET'])
+@api.route('/api/monitoring/backup', methods=['GET'])
 def backup_recovery():
     """Get backup and recovery monitoring data"""
-    jobs = BackupJob.query.all()
-    return jsonify([job.to_dict() for job in jobs])
+    return list_response(BackupJob.query, BackupJob)
 
-@app.route('/api/monitoring/backup/comment', methods=['POST'])
+@api.route('/api/monitoring/backup/comment', methods=['POST'])
 def backup_comment():
     """Allow IT Staff to add or update backup technician comments."""
-    global current_role, is_authenticated
-    if not is_authenticated or current_role != "IT Staff":
+    if not g.is_authenticated or g.current_role != "IT Staff":
         return jsonify({"error": "Insufficient permissions"}), 403
 
     payload = request.json or {}
@@ -1210,31 +3531,121 @@ def backup_comment():
     if not job:
         return jsonify({"error": "Backup job not found"}), 404
 
-    job.technician_comment = comment.strip() or None
-    db.session.commit()
-    add_audit_log("BACKUP_COMMENT", f"Updated backup comment for {job_id}", current_role)
+    with unit_of_work(g.current_role) as uow:
+        job.technician_comment = comment.strip() or None
+        uow.audit("BACKUP_COMMENT", f"Updated backup comment for {job_id}")
     return jsonify(job.to_dict())
 
-@app.route('/api/assets/logs', methods=['GET'])
+@api.route('/api/assets/logs', methods=['GET'])
 def asset_logs():
     """Admin-only access to asset change logs."""
-    global current_role, is_authenticated
-    if not is_authenticated or current_role != "Admin":
+    if not g.is_authenticated or g.current_role != "Admin":
+        return jsonify({"error": "Insufficient permissions"}), 403
+
+    return json_array_response(AssetLog.query.order_by(AssetLog.timestamp.desc()), ROW_SERIALIZERS[AssetLog])
+
+@api.route('/api/assets/<asset_id>/history', methods=['GET'])
+def asset_history(asset_id):
+    """Change timeline for one asset.
+
+    Pages run newest first; pass ``nextCursor`` back as ``after`` for older
+    entries. To poll for new entries, pass ``latestCursor`` back as ``since``:
+    that returns only newer entries, oldest first, and a fresh ``latestCursor``.
+    Both walk the (asset_id, timestamp) index.
+    """
+    if g.current_role not in ["IT Staff", "Admin"]:
+        return jsonify({"error": "Insufficient permissions"}), 403
+    try:
+        page = _page_args(cursor=decode_log_cursor)
+        since = decode_log_cursor(request.args['since']) if request.args.get('since') else None
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    limit, after = page or (DEFAULT_PAGE_SIZE, None)
+
+    key = tuple_(AssetLog.timestamp, AssetLog.id)
+    query = AssetLog.query.filter(AssetLog.asset_id == asset_id)
+    if since is not None:
+        query = query.filter(key > since).order_by(AssetLog.timestamp.asc(), AssetLog.id.asc())
+    else:
+        if after is not None:
+            query = query.filter(key < after)
+        query = query.order_by(AssetLog.timestamp.desc(), AssetLog.id.desc())
+    logs = query.limit(limit + 1).all()
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+
+    if since is not None:
+        latest_cursor = encode_log_cursor(logs[-1].timestamp, logs[-1].id) if logs else request.args['since']
+        next_cursor = latest_cursor if has_more else None
+    else:
+        latest_cursor = None
+        if logs and after is None:
+            latest_cursor = encode_log_cursor(logs[0].timestamp, logs[0].id)
+        next_cursor = encode_log_cursor(logs[-1].timestamp, logs[-1].id) if has_more else None
+    return jsonify({
+        "assetId": asset_id,
+        "items": [log.to_dict() for log in logs],
+        "nextCursor": next_cursor,
+        "latestCursor": latest_cursor,
+    })
+
+@api.route('/api/sync', methods=['GET'])
+def sync():
+    """Assets and licenses changed after change sequence ``since``.
+
+    Without ``since`` only the current sequence is returned; clients read it
+    before a full load and pass it back later. ``reset: true`` means the
+    client must reload the full lists instead: it is too far behind, the
+    changes it missed were pruned, or ``since`` is ahead of the log. The
+    cursor is only gap-free under SQLite's single-writer model (see
+    ``ChangeRecord``); a replica replays commits in the same order.
+    """
+    if g.current_role not in ["IT Staff", "Admin"]:
         return jsonify({"error": "Insufficient permissions"}), 403
+    latest = db.session.query(func.max(ChangeRecord.seq)).scalar() or 0
+    if request.args.get('since') is None:
+        return jsonify({"seq": latest})
+    try:
+        since = int(request.args['since'])
+    except ValueError:
+        return jsonify({"error": "since must be an integer."}), 400
+
+    pending = latest - since
+    oldest = db.session.query(func.min(ChangeRecord.seq)).scalar()
+    pruned = oldest is not None and since < oldest - 1
+    if pending < 0 or pending > current_app.config["SYNC_MAX_CHANGES"] or pruned:
+        return jsonify({"seq": latest, "reset": True})
+    return jsonify({"seq": latest, "reset": False, **changes_since(since, latest)})
+
+@api.route('/api/inventory/as-of', methods=['GET'])
+def inventory_at():
+    """Reconstruct the asset inventory (type and assignee) at a past moment"""
+    if g.current_role not in ["IT Staff", "Admin"]:
+        return jsonify({"error": "Insufficient permissions"}), 403
+    try:
+        at = _parse_datetime(request.args.get('at'), 'at')
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
 
-    logs = AssetLog.query.order_by(AssetLog.timestamp.desc()).all()
-    return jsonify([log.to_dict() for log in logs])
+    assets, snapshot, replayed = inventory_as_of(at)
+    return jsonify({
+        "asOf": at.strftime("%Y-%m-%d %H:%M:%S"),
+        "snapshotTakenAt": snapshot.taken_at.strftime("%Y-%m-%d %H:%M:%S") if snapshot else None,
+        "deltasReplayed": replayed,
+        "assets": [
+            {"assetId": asset_id, "assetType": asset_type, "assignedUser": assigned_user}
+            for asset_id, (asset_type, assigned_user) in sorted(assets.items())
+        ],
+    })
 
-@app.route('/api/users', methods=['GET', 'POST'])
+@api.route('/api/users', methods=['GET', 'POST'])
 def manage_users():
     """Admin-only user management endpoint."""
-    global current_role, is_authenticated
-    if not is_authenticated or current_role != "Admin":
+    if not g.is_authenticated or g.current_role != "Admin":
         return jsonify({"error": "Insufficient permissions"}), 403
 
     if request.method == 'GET':
-        users = User.query.all()
-        return jsonify([user.to_dict() for user in users])
+        return list_response(User.query, User)
 
     data = request.json or {}
     username = (data.get('username') or '').strip().lower()
@@ -1259,16 +3670,15 @@ def manage_users():
         name=name or username,
         requires_mfa=bool(requires_mfa),
     )
-    db.session.add(user)
-    db.session.commit()
-    add_audit_log("CREATE_USER", f"User {username} created with role {role}", current_role)
+    with unit_of_work(g.current_role) as uow:
+        uow.add(user)
+        uow.audit("CREATE_USER", f"User {username} created with role {role}")
     return jsonify(user.to_dict()), 201
 
-@app.route('/api/users/<username>/assets', methods=['GET'])
+@api.route('/api/users/<username>/assets', methods=['GET'])
 def user_assets(username):
     """Admin-only view of assets assigned to a specific user."""
-    global current_role, is_authenticated
-    if not is_authenticated or current_role != "Admin":
+    if not g.is_authenticated or g.current_role != "Admin":
         return jsonify({"error": "Insufficient permissions"}), 403
 
     user = User.query.filter_by(username=username.lower()).first()
@@ -1287,101 +3697,66 @@ def user_assets(username):
 
     return jsonify([asset.to_dict() for asset in assets])
 
-@app.route('/api/reports/overview', methods=['GET'])
+@api.route('/api/reports/overview', methods=['GET'])
 def reports_overview():
     """Admin-only consolidated reporting endpoint."""
-    global current_role, is_authenticated
-    if not is_authenticated or current_role != "Admin":
+    if not g.is_authenticated or g.current_role != "Admin":
         return jsonify({"error": "Insufficient permissions"}), 403
-    report = generate_report_snapshot()
-    add_audit_log("REPORT_GENERATE", "Generated consolidated operational report", current_role)
+    report, cache_hit = get_report("overview")
+    cache_status = "hit" if cache_hit else "miss"
+    add_audit_log("REPORT_GENERATE", "Generated consolidated operational report", g.current_role)
 
     response_format = request.args.get("format", "json").strip().lower()
     if response_format == "csv":
-        csv_buffer = io.StringIO()
-        writer = csv.writer(csv_buffer)
-
-        writer.writerow(["Report Generated At", report["generatedAt"]])
-        writer.writerow([])
-
-        writer.writerow(["Assets Report"])
-        writer.writerow(["Metric", "Value"])
-        assets_section = report["assetsReport"]
-        writer.writerow(["Total Assets", assets_section["totalAssets"]])
-        writer.writerow(["Assets Under Maintenance", assets_section["assetsUnderMaintenance"]])
-        writer.writerow(["Assets Expiring Warranty Within 30 Days", assets_section["assetsExpiringWarrantySoon"]])
-        writer.writerow(["Assets Per Department"])
-        for dept, count in assets_section["assetsPerDepartment"].items():
-            writer.writerow([f"  {dept}", count])
-        writer.writerow([])
-
-        writer.writerow(["Software License Report"])
-        licenses_section = report["softwareLicenseReport"]
-        writer.writerow(["Metric", "Value"])
-        writer.writerow(["Total Licensed Software", licenses_section["totalLicensedSoftware"]])
-        writer.writerow(["Active Licenses", licenses_section["activeLicenses"]])
-        writer.writerow(["Licenses Expiring Within 30 Days", licenses_section["licensesExpiringIn30Days"]])
-        writer.writerow(["Expired Licenses", licenses_section["expiredLicenses"]])
-        writer.writerow([])
-
-        writer.writerow(["Hardware & Network Monitoring Report"])
-        hardware_section = report["hardwareNetworkReport"]
-        writer.writerow(["Metric", "Value"])
-        writer.writerow(["Average CPU Load (%)", hardware_section["averageCpuLoad"]])
-        writer.writerow(["Average RAM Utilization (%)", hardware_section["averageMemoryUtilization"]])
-        writer.writerow(["Average Disk Utilization (%)", hardware_section["averageDiskUtilization"]])
-        writer.writerow(["Alerts Triggered Today", hardware_section["alertsToday"]])
-        writer.writerow(["Alerts Triggered This Week", hardware_section["alertsThisWeek"]])
-        writer.writerow(["Top Devices by Bandwidth"])
-        for device in hardware_section["topBandwidthDevices"]:
-            writer.writerow([f"  {device['deviceId']}", f"{device['bandwidthMB']} MB"])
-        writer.writerow([])
-
-        writer.writerow(["Backup & Recovery Report"])
-        backup_section = report["backupRecoveryReport"]
-        writer.writerow(["Metric", "Value"])
-        writer.writerow(["Backups Run This Week", backup_section["backupsRunThisWeek"]])
-        writer.writerow(["Successful Backups", backup_section["successfulBackups"]])
-        writer.writerow(["Failed Backups", backup_section["failedBackups"]])
-        writer.writerow(["Missed Backups", backup_section["missedBackups"]])
-        writer.writerow(["Systems Without Recent Backup (>7 days)"])
-        if backup_section["systemsWithoutRecentBackup"]:
-            for system in backup_section["systemsWithoutRecentBackup"]:
-                writer.writerow([f"  {system}"])
-        else:
-            writer.writerow(["  None"])
-        writer.writerow([])
-
-        writer.writerow(["Department Asset Report"])
-        dept_section = report["departmentAssetReport"]["assetsPerDepartment"]
-        writer.writerow(["Department", "Asset Count"])
-        for dept, count in dept_section.items():
-            writer.writerow([dept, count])
-
-        csv_buffer.seek(0)
-        return Response(
-            csv_buffer.getvalue(),
-            mimetype="text/csv",
-            headers={
-                "Content-Disposition": "attachment; filename=operational-report.csv"
-            }
-        )
+        response = csv_response("operational-report.csv", report_csv_rows(report))
+        response.headers["X-Report-Cache"] = cache_status
+        return response
 
-    return jsonify(report)
+    response = jsonify({**report, "cacheStatus": cache_status})
+    response.headers["X-Report-Cache"] = cache_status
+    return response
 
-@app.route('/api/audit-log', methods=['GET'])
+@api.route('/api/audit-log', methods=['GET'])
 def audit_log():
-    """Get audit log (Admin/IT Staff only)"""
-    global current_role
-    if current_role != "Admin":
+    """Get audit log (Admin only), filtered by since/until/action and paged with limit/after"""
+    if g.current_role != "Admin":
+        return jsonify({"error": "Insufficient permissions"}), 403
+    get_audit_writer().flush()
+    args = request.args
+    try:
+        since = _parse_datetime(args['since'], 'since') if args.get('since') else None
+        until = _parse_datetime(args['until'], 'until') if args.get('until') else None
+        page = _page_args(cursor=decode_log_cursor)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    actions = [action.strip() for action in args.get('action', '').split(',') if action.strip()]
+    include_archived = _to_bool(args.get('includeArchived', False))
+    if page is None and not include_archived:
+        return json_array_response(audit_log_query(since, until, actions), ROW_SERIALIZERS[AuditLog])
+    limit, cursor = page or (None, None)
+
+    entries, next_cursor = query_audit_log(
+        since=since,
+        until=until,
+        actions=actions,
+        limit=limit,
+        cursor=cursor,
+        include_archived=include_archived,
+    )
+    if page is None:
+        return jsonify(entries)
+    return jsonify({"items": entries, "nextCursor": next_cursor})
+
+@api.route('/api/audit-log/stats', methods=['GET'])
+def audit_log_stats():
+    """Audit writer health: queue depth and flush latency (Admin only)"""
+    if g.current_role != "Admin":
         return jsonify({"error": "Insufficient permissions"}), 403
-    logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).all()
-    return jsonify([log.to_dict() for log in logs])
+    return jsonify(get_audit_writer().stats())
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
 def login():
     """User authentication endpoint (ITM-SR-002) with MFA for Admin"""
-    global current_role, current_user, current_user_name, is_authenticated
     data = request.json
     username = data.get('username', '').lower()
     password = data.get('password', '')
@@ -1408,40 +3783,44 @@ def login():
                 "message": "MFA code required for Admin login. Use code: 123456"
             }), 401
 
-    current_user = username
-    current_role = user.role
-    current_user_name = user.name
-    is_authenticated = True
-    add_audit_log("LOGIN", f"User {username} logged in", current_role)
-    return jsonify({"success": True, "role": current_role, "name": user.name})
+    token = issue_auth_token(user)
+    token_ttl = current_app.config["AUTH_TOKEN_TTL"]
+    add_audit_log("LOGIN", f"User {username} logged in", user.role)
+    response = jsonify({
+        "success": True,
+        "role": user.role,
+        "name": user.name,
+        "token": token,
+        "expiresIn": token_ttl,
+    })
+    response.set_cookie(AUTH_COOKIE_NAME, token, max_age=token_ttl, httponly=True, samesite="Lax",
+                        secure=request.is_secure)
+    return response
 
-@app.route('/api/auth/logout', methods=['POST'])
+@api.route('/api/auth/logout', methods=['POST'])
 def logout():
     """User logout endpoint"""
-    global current_user, current_role, current_user_name, is_authenticated
-    if current_user:
-        add_audit_log("LOGOUT", f"User {current_user} logged out", current_role)
-    current_user = None
-    current_role = None
-    current_user_name = None
-    is_authenticated = False
-    return jsonify({"success": True})
-
-@app.route('/api/auth/status', methods=['GET'])
+    if g.current_user:
+        add_audit_log("LOGOUT", f"User {g.current_user} logged out", g.current_role)
+    if g.auth_token:
+        revoke_auth_token(g.auth_token)
+    response = jsonify({"success": True})
+    response.delete_cookie(AUTH_COOKIE_NAME)
+    return response
+
+@api.route('/api/auth/status', methods=['GET'])
 def auth_status():
     """Get current authentication status"""
-    global current_role, current_user, is_authenticated
     return jsonify({
-        "authenticated": is_authenticated,
-        "role": current_role,
-        "user": current_user
+        "authenticated": g.is_authenticated,
+        "role": g.current_role,
+        "user": g.current_user
     })
 
-@app.route('/api/monitoring/backup/verify', methods=['POST'])
+@api.route('/api/monitoring/backup/verify', methods=['POST'])
 def backup_verify():
     """Automated backup verification endpoint (ITM-F-041) - Resets status to 'Under Investigation'"""
-    global current_role, is_authenticated
-    if not is_authenticated or current_role not in ["Admin", "IT Staff"]:
+    if not g.is_authenticated or g.current_role not in ["Admin", "IT Staff"]:
         return jsonify({"error": "Insufficient permissions"}), 403
     
     # Find failed/missed backup jobs
@@ -1449,44 +3828,40 @@ def backup_verify():
     
     # Simulate verification process and reset status to 'Under Investigation'
     verification_results = []
-    for job in failed_jobs:
-        previous_status = job.status
-        job.status = "Under Investigation"
-        verification_results.append({
-            "jobId": job.job_id,
-            "assetId": job.asset_id,
-            "previousStatus": previous_status,
-            "newStatus": "Under Investigation",
-            "alertReason": job.alert_reason,
-            "verificationStatus": "Under Investigation",
-            "recommendedAction": "Review backup configuration and retry backup job"
-        })
-    
-    db.session.commit()
-    add_audit_log("VERIFY", f"Backup verification run - {len(failed_jobs)} jobs set to 'Under Investigation'", current_role)
-    
+    with unit_of_work(g.current_role) as uow:
+        for job in failed_jobs:
+            previous_status = job.status
+            uow.track(job)
+            job.status = "Under Investigation"
+            verification_results.append({
+                "jobId": job.job_id,
+                "assetId": job.asset_id,
+                "previousStatus": previous_status,
+                "newStatus": "Under Investigation",
+                "alertReason": job.alert_reason,
+                "verificationStatus": "Under Investigation",
+                "recommendedAction": "Review backup configuration and retry backup job"
+            })
+        uow.audit("VERIFY", f"Backup verification run - {len(failed_jobs)} jobs set to 'Under Investigation'")
+
     return jsonify({
         "verifiedJobs": len(failed_jobs),
         "results": verification_results,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     })
 
-@app.route('/api/integrations/status', methods=['GET'])
+@api.route('/api/integrations/status', methods=['GET'])
 def integration_status():
     """Get external integration status"""
     statuses = IntegrationStatus.query.all()
     return jsonify({status.slug: status.to_dict() for status in statuses})
 
-@app.route('/api/analytics/assets-by-department', methods=['GET'])
+@api.route('/api/analytics/assets-by-department', methods=['GET'])
 def assets_by_department():
     """Get asset distribution by department for analytics (ITM-F-061)"""
-    department_counts = {}
-    for asset in Asset.query.all():
-        dept = asset.department or "Unknown"
-        department_counts[dept] = department_counts.get(dept, 0) + 1
-    return jsonify(department_counts)
+    return jsonify(kpi_breakdown("assets.department."))
 
-@app.route('/api/assets/<asset_id>/qr', methods=['GET'])
+@api.route('/api/assets/<asset_id>/qr', methods=['GET'])
 def generate_qr(asset_id):
     """Generate QR code data for asset (ITM-F-001)"""
     asset = Asset.query.filter_by(asset_id=asset_id).first()
@@ -1501,17 +3876,152 @@ def generate_qr(asset_id):
         "message": "In a real application, scanning this QR code would link to the asset's details page."
     }
     
-    user_role = current_role if current_role else "System"
+    user_role = g.current_role if g.current_role else "System"
     add_audit_log("QR_GENERATE", f"QR code generated for asset {asset_id}", user_role)
     return jsonify(qr_data)
 
-@app.route('/')
+@api.route('/')
 def index():
     """Serve the main HTML file"""
     return send_from_directory(os.path.dirname(os.path.abspath(__file__)), 'index.html')
 
+
+# ==================== CLI COMMANDS ====================
+
+@api.cli.group("kpi")
+def kpi_cli():
+    """Maintain the materialized KPI counters."""
+
+
+@kpi_cli.command("rebuild")
+def kpi_rebuild_command():
+    """Recount every KPI counter from the source tables."""
+    counters = rebuild_kpi_counters()
+    click.echo(f"Rebuilt {len(counters)} KPI counters.")
+
+
+@kpi_cli.command("check")
+def kpi_check_command():
+    """Compare stored KPI counters against a full recount."""
+    mismatches = check_kpi_counters()
+    if not mismatches:
+        click.echo("KPI counters are consistent.")
+        return
+    for name, values in mismatches.items():
+        click.echo(f"{name}: stored={values['stored']} expected={values['expected']}")
+    raise SystemExit(1)
+
+
+
+@api.cli.group("audit")
+def audit_cli():
+    """Audit log retention."""
+
+
+@audit_cli.command("archive")
+@click.option("--days", type=int, default=None, help="Retention window in days (default: AUDIT_RETENTION_DAYS).")
+def audit_archive_command(days):
+    """Move audit entries older than the retention window into gzip archives."""
+    moved = archive_audit_logs(days)
+    click.echo(f"Archived {moved} audit entries to {current_app.config['AUDIT_ARCHIVE_DIR']}.")
+
+
+@api.cli.group("sync")
+def sync_cli():
+    """Delta sync change log."""
+
+
+@sync_cli.command("prune")
+@click.option("--keep", type=int, default=None, help="Sequence numbers to keep (default: SYNC_MAX_CHANGES).")
+def sync_prune_command(keep):
+    """Delete change log rows that no client can still sync from."""
+    deleted = prune_change_log(keep)
+    click.echo(f"Pruned {deleted} change log rows.")
+
+
+@api.cli.group("inventory")
+def inventory_cli():
+    """Inventory history snapshots."""
+
+
+@inventory_cli.command("snapshot")
+def inventory_snapshot_command():
+    """Store a compact snapshot of the asset table for as-of queries."""
+    snapshot = take_asset_snapshot()
+    click.echo(f"Snapshot {snapshot.id}: {snapshot.asset_count} assets, asset logs up to id {snapshot.last_log_id}.")
+
+
+@api.cli.group("schema")
+def schema_cli():
+    """Inspect and upgrade the database schema version."""
+
+
+@schema_cli.command("status")
+def schema_status_command():
+    """Show the stored and latest schema versions."""
+    click.echo(f"Current schema version: {current_schema_version()}")
+    click.echo(f"Latest schema version: {LATEST_SCHEMA_VERSION}")
+
+
+@schema_cli.command("upgrade")
+def schema_upgrade_command():
+    """Apply pending schema migrations (run once per deployment)."""
+    applied = initialize_database()
+    if applied:
+        click.echo(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+    else:
+        click.echo(f"Schema is up to date (version {LATEST_SCHEMA_VERSION}).")
+
+
+# ==================== APPLICATION FACTORY ====================
+
+def create_app(config=None):
+    """Build an IIMS application.
+
+    No database work happens here, so importing the module or booting a worker
+    is cheap. With ``DATABASE_INIT="lazy"`` the schema is checked on the first
+    request; with ``"manual"`` it is left to ``flask schema upgrade``.
+    """
+    flask_app = Flask(__name__)
+    flask_app.config.from_mapping(default_config())
+    if config:
+        flask_app.config.from_mapping(config)
+    configure_engine_options(flask_app.config)
+    if not flask_app.config["AUDIT_ARCHIVE_DIR"]:
+        flask_app.config["AUDIT_ARCHIVE_DIR"] = os.path.join(flask_app.instance_path, "audit-archive")
+    binds = flask_app.config.setdefault("SQLALCHEMY_BINDS", {})
+    if flask_app.config["READ_DATABASE_URL"]:
+        binds[REPLICA_BIND_KEY] = flask_app.config["READ_DATABASE_URL"]
+
+    configure_json_provider(flask_app)
+    CORS(flask_app)
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                install_sqlite_pragmas(engine, flask_app.config)
+    writer = AuditLogWriter(flask_app)
+    flask_app.extensions["audit_writer"] = writer
+    atexit.register(writer.stop)
+    flask_app.extensions["database_ready"] = threading.Event()
+    flask_app.extensions["report_cache"] = ReportCache()
+    flask_app.extensions["dashboard_broadcaster"] = DashboardBroadcaster(flask_app)
+    flask_app.extensions["auth_cache"] = TTLCache(flask_app.config["AUTH_CACHE_SIZE"],
+                                                  flask_app.config["AUTH_CACHE_TTL"])
+    if flask_app.config["DATABASE_INIT"] == "lazy":
+        flask_app.before_request(ensure_database_initialized)
+    flask_app.register_blueprint(api)
+    return flask_app
+
+
+app = create_app()
+audit_writer = app.extensions["audit_writer"]
+
+
 if __name__ == '__main__':
+    # Development server; production runs gunicorn with gunicorn.conf.py
     with app.app_context():
+        initialize_database()
         add_audit_log("SYSTEM", "IIMS System Started", "System")
     app.run(debug=True, port=5000)
 
@@ -9,11 +9,6 @@ class IIMSIntegrationTestCase(unittest.TestCase):
         """Set up test client"""
         self.app = app.test_client()
         self.app.testing = True
-        # Reset authentication state before each test
-        import server
-        server.current_role = None
-        server.current_user = None
-        server.is_authenticated = False
         with app.app_context():
             initialize_database(reset=True)
     
@@ -0,0 +1,193 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from server import (
+    app,
+    db,
+    Asset,
+    AssetLog,
+    LATEST_SCHEMA_VERSION,
+    backfill_in_chunks,
+    check_kpi_counters,
+    create_app,
+    current_schema_version,
+    initialize_database,
+    migrate_database,
+)
+from tests.test_performance import count_queries
+
+
+class IIMSMigrationTestCase(unittest.TestCase):
+    """Schema version tracking and migration steps"""
+
+    def setUp(self):
+        """Start every test from a freshly created database"""
+        with app.app_context():
+            initialize_database(reset=True)
+
+    def test_fresh_database_is_stamped_current(self):
+        """create_all on an empty database records the latest version"""
+        with app.app_context():
+            self.assertEqual(current_schema_version(), LATEST_SCHEMA_VERSION)
+
+    def test_current_schema_takes_fast_path(self):
+        """An up-to-date database costs a single version read and no reflection"""
+        with app.app_context():
+            with count_queries() as statements:
+                applied = migrate_database()
+        self.assertEqual(applied, [])
+        self.assertEqual(statements, ["SELECT version FROM schema_version"])
+
+    def test_legacy_database_runs_every_step(self):
+        """An unversioned database is upgraded column by column without inventing log history"""
+        with app.app_context():
+            db.session.execute(db.text("DROP TABLE schema_version"))
+            db.session.execute(db.text("ALTER TABLE backup_jobs DROP COLUMN technician_comment"))
+            db.session.execute(db.text("DELETE FROM kpi_counters"))
+            db.session.add(AssetLog(asset_id="AST-001", action="UPDATE", details="legacy", performed_by="Admin"))
+            db.session.commit()
+
+            self.assertIsNone(current_schema_version())
+            applied = migrate_database()
+            self.assertEqual(applied, list(range(1, LATEST_SCHEMA_VERSION + 1)))
+            self.assertEqual(current_schema_version(), LATEST_SCHEMA_VERSION)
+
+            columns = {col["name"] for col in db.inspect(db.engine).get_columns("backup_jobs")}
+            self.assertIn("technician_comment", columns)
+            legacy = AssetLog.query.filter_by(details="legacy").one()
+            self.assertIsNone(legacy.asset_type)
+            self.assertIsNone(legacy.assigned_user)
+            self.assertEqual(check_kpi_counters(), {})
+
+    def test_backfill_in_chunks_commits_per_chunk(self):
+        """A backfill updates matching rows in bounded batches, committing each one"""
+        with app.app_context():
+            db.session.add_all(AssetLog(asset_id=f"AST-B{i}", action="UPDATE", details="legacy",
+                                        performed_by="Admin") for i in range(5))
+            db.session.add(AssetLog(asset_id="AST-KEEP", action="UPDATE", details="kept", performed_by="Admin"))
+            db.session.commit()
+
+            with mock.patch.object(db.session, "commit", wraps=db.session.commit) as commit, \
+                    count_queries() as statements:
+                updated = backfill_in_chunks("asset_logs", "details = :details AND asset_type IS NULL",
+                                             "asset_type = :asset_type", {"details": "legacy", "asset_type": "Unknown"},
+                                             chunk_size=2)
+            self.assertEqual(updated, 5)
+            self.assertEqual(commit.call_count, 3)
+            self.assertEqual(sum(statement.startswith("UPDATE") for statement in statements), 3)
+            self.assertEqual(AssetLog.query.filter_by(asset_type="Unknown").count(), 5)
+            self.assertIsNone(AssetLog.query.filter_by(details="kept").one().asset_type)
+            # Matched rows no longer qualify, so a rerun resumes with nothing to do
+            self.assertEqual(backfill_in_chunks("asset_logs", "details = :details AND asset_type IS NULL",
+                                                "asset_type = :asset_type", {"details": "legacy", "asset_type": "x"}), 0)
+
+    def test_schema_cli_reports_status(self):
+        """The schema CLI reports and applies versions"""
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=['schema', 'status'])
+        self.assertIn(f'Current schema version: {LATEST_SCHEMA_VERSION}', result.output)
+        result = runner.invoke(args=['schema', 'upgrade'])
+        self.assertIn('up to date', result.output)
+
+
+class IIMSAppFactoryTestCase(unittest.TestCase):
+    """Application factory and deferred database initialization"""
+
+    def make_app(self, **config):
+        config.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite:///:memory:")
+        config.setdefault("AUDIT_MODE", "sync")
+        return create_app(config)
+
+    def count_all_queries(self):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(Engine, "before_cursor_execute", listener)
+        self.addCleanup(event.remove, Engine, "before_cursor_execute", listener)
+        return statements
+
+    def test_create_app_does_no_database_work(self):
+        """Building an app (a worker boot) issues no SQL at all"""
+        statements = self.count_all_queries()
+        self.make_app()
+        self.assertEqual(statements, [])
+
+    def test_lazy_init_runs_once_on_first_request(self):
+        """The first request creates and seeds the schema, later ones skip the check"""
+        lazy_app = self.make_app()
+        client = lazy_app.test_client()
+        response = client.get('/api/dashboard/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['totalAssets'], 7)
+
+        statements = self.count_all_queries()
+        client.get('/api/auth/status')
+        self.assertFalse(any('schema_version' in statement for statement in statements), statements)
+
+    def test_manual_init_is_left_to_the_cli(self):
+        """With manual init the schema is created by the deploy-time upgrade command"""
+        manual_app = self.make_app(DATABASE_INIT="manual")
+        self.assertFalse(manual_app.before_request_funcs.get(None))
+        result = manual_app.test_cli_runner().invoke(args=['schema', 'upgrade'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with manual_app.app_context():
+            self.assertEqual(current_schema_version(), LATEST_SCHEMA_VERSION)
+            self.assertEqual(Asset.query.count(), 7)
+
+
+
+class IIMSDeploymentTestCase(unittest.TestCase):
+    """Gunicorn master/worker hooks from gunicorn.conf.py"""
+
+    def setUp(self):
+        import runpy
+        directory = tempfile.mkdtemp(prefix='iims-deploy-')
+        self.addCleanup(shutil.rmtree, directory, True)
+        self.deploy_app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'deploy.db')}",
+            "DATABASE_INIT": "manual",
+            "AUDIT_MODE": "sync",
+        })
+        with self.deploy_app.app_context():
+            for engine in db.engines.values():
+                self.addCleanup(engine.dispose)
+        # Loading the config sets IIMS_DATABASE_INIT for the master
+        with mock.patch.dict(os.environ):
+            self.hooks = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py'))
+        patcher = mock.patch('server.app', self.deploy_app)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_master_migrates_and_leaves_no_pooled_connections(self):
+        """The master initializes the schema, then disposes the pools it used before forking"""
+        self.hooks['on_starting'](mock.Mock())
+        with self.deploy_app.app_context():
+            for engine in db.engines.values():
+                self.assertEqual(engine.pool.checkedin(), 0)
+            self.assertEqual(current_schema_version(), LATEST_SCHEMA_VERSION)
+
+    def test_worker_replaces_inherited_pool_without_closing_it(self):
+        """A forked worker gets a fresh pool and leaves the master's connections open"""
+        self.hooks['on_starting'](mock.Mock())
+        with self.deploy_app.app_context():
+            engine = db.engine
+            with engine.connect() as connection:
+                inherited = connection.connection.dbapi_connection
+            inherited_pool = engine.pool
+            self.assertEqual(inherited_pool.checkedin(), 1)
+
+            self.hooks['post_fork'](mock.Mock(), mock.Mock())
+            self.assertIsNot(engine.pool, inherited_pool)
+            self.assertEqual(engine.pool.checkedin(), 0)
+            # Still usable: closing it would have torn down the master's socket/file handle
+            self.assertEqual(inherited.execute("SELECT 1").fetchone(), (1,))
+            inherited.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,478 @@
+import unittest
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from unittest import mock
+
+from sqlalchemy import event
+
+from server import (
+    app,
+    db,
+    Asset,
+    AssetLog,
+    AuditLog,
+    KpiCounter,
+    NegotiatingJSONProvider,
+    OrjsonProvider,
+    READ_PRIMARY_COOKIE,
+    calculate_dashboard_metrics,
+    check_kpi_counters,
+    create_app,
+    generate_report_snapshot,
+    get_report_cache,
+    initialize_database,
+    sqlite_pragmas,
+    unit_of_work,
+)
+
+
+@contextmanager
+def count_queries(current_thread_only=False):
+    """Collect every SQL statement sent to the engine while the block runs."""
+    statements = []
+    thread_id = threading.get_ident()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not current_thread_only or threading.get_ident() == thread_id:
+            statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+class IIMSPerformanceTestCase(unittest.TestCase):
+    """Query budget checks for hot read paths"""
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = app.test_client()
+        self.app.testing = True
+        with app.app_context():
+            initialize_database(reset=True)
+
+    def test_dashboard_metrics_query_count(self):
+        """Dashboard metrics are computed with a fixed number of queries"""
+        with app.app_context():
+            with count_queries() as statements:
+                metrics = calculate_dashboard_metrics()
+        self.assertEqual(len(statements), 4, statements)
+        self.assertEqual(metrics['hardwareHealthAlerts'], len(metrics['hardwareAlertDetails']))
+        self.assertEqual(metrics['networkEvents'], len(metrics['networkAlertDetails']))
+
+    def test_dashboard_metrics_values(self):
+        """Single-pass aggregates match the seeded data"""
+        response = self.app.get('/api/dashboard/metrics')
+        data = json.loads(response.data)
+        self.assertEqual(data['totalAssets'], 7)
+        self.assertEqual(data['hardwareHealthAlerts'], 3)
+        self.assertEqual(data['networkEvents'], 3)
+        self.assertEqual(data['backupFailures'], 3)
+        self.assertEqual(
+            [alert['deviceId'] for alert in data['networkAlertDetails']],
+            ['NET-001', 'NET-003', 'NET-006'],
+        )
+
+    def test_report_snapshot_query_count(self):
+        """Report snapshot uses conditional aggregates instead of per-metric queries"""
+        with app.app_context():
+            with count_queries() as statements:
+                report = generate_report_snapshot()
+        self.assertLessEqual(len(statements), 7, statements)
+        self.assertEqual(report['assetsReport']['totalAssets'], 7)
+        self.assertEqual(report['backupRecoveryReport']['failedBackups'], 2)
+        self.assertEqual(report['hardwareNetworkReport']['averageCpuLoad'], 62.67)
+
+    def test_json_backend_selection(self):
+        """orjson encodes responses by default; JSON_BACKEND=json or a missing orjson keeps the stdlib"""
+        def make_app(**config):
+            return create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'AUDIT_MODE': 'sync', **config})
+
+        std_app = make_app(JSON_BACKEND='json')
+        self.assertIs(type(std_app.json), NegotiatingJSONProvider)
+        std_body = std_app.test_client().get('/api/monitoring/backup').get_json()
+        with mock.patch('server.orjson', None):
+            self.assertIs(type(make_app().json), NegotiatingJSONProvider)
+            with self.assertRaises(RuntimeError):
+                make_app(JSON_BACKEND='orjson')
+
+        fast_app = make_app()
+        self.assertIsInstance(fast_app.json, OrjsonProvider)
+        fast_body = fast_app.test_client().get('/api/monitoring/backup').get_json()
+        self.assertEqual([sorted(job) for job in fast_body], [sorted(job) for job in std_body])
+        self.assertEqual([job['jobId'] for job in fast_body], [job['jobId'] for job in std_body])
+        with fast_app.app_context():
+            self.assertEqual(fast_app.json.dumps({'b': 1, 'a': [1, 2]}), '{"a":[1,2],"b":1}')
+
+    def test_report_cache_hit_and_write_invalidation(self):
+        """Reports are served from cache until a source table changes"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        first = self.app.get('/api/reports/overview')
+        self.assertEqual(first.headers['X-Report-Cache'], 'miss')
+        second = self.app.get('/api/reports/overview')
+        self.assertEqual(second.headers['X-Report-Cache'], 'hit')
+        self.assertEqual(json.loads(second.data)['cacheStatus'], 'hit')
+        self.assertEqual(json.loads(first.data)['generatedAt'], json.loads(second.data)['generatedAt'])
+
+        csv_response = self.app.get('/api/reports/overview?format=csv')
+        self.assertEqual(csv_response.headers['X-Report-Cache'], 'hit')
+
+        self.app.post('/api/assets',
+                     json={
+                         'action': 'create',
+                         'assetId': 'CACHE-001',
+                         'assetType': 'Laptop',
+                         'assignedUser': 'Cache User',
+                         'purchaseDate': '2024-01-01',
+                         'warrantyExpiryDate': '2027-01-01',
+                     })
+        third = self.app.get('/api/reports/overview')
+        self.assertEqual(third.headers['X-Report-Cache'], 'miss')
+        self.assertEqual(json.loads(third.data)['assetsReport']['totalAssets'], 8)
+
+    def test_report_cache_ttl_expiry(self):
+        """A zero TTL disables report caching"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        original_ttl = app.config['REPORT_CACHE_TTL']
+        app.config['REPORT_CACHE_TTL'] = 0
+        try:
+            self.app.get('/api/reports/overview')
+            response = self.app.get('/api/reports/overview')
+            self.assertEqual(response.headers['X-Report-Cache'], 'miss')
+        finally:
+            app.config['REPORT_CACHE_TTL'] = original_ttl
+
+    def test_report_cache_is_per_app(self):
+        """Each app keeps its own report cache, so another database's report is never served"""
+        other_app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'AUDIT_MODE': 'sync'})
+        self.assertIsNot(other_app.extensions['report_cache'], app.extensions['report_cache'])
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        self.assertEqual(self.app.get('/api/reports/overview').headers['X-Report-Cache'], 'miss')
+        other = other_app.test_client()
+        other.post('/api/auth/login',
+                   json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        self.assertEqual(other.get('/api/reports/overview').headers['X-Report-Cache'], 'miss')
+        self.assertEqual(self.app.get('/api/reports/overview').headers['X-Report-Cache'], 'hit')
+
+    def test_kpi_counters_follow_mutations(self):
+        """Counters stay consistent with a full recount across CRUD operations"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        self.app.post('/api/assets',
+                     json={
+                         'action': 'create',
+                         'assetId': 'KPI-001',
+                         'assetType': 'Laptop',
+                         'assignedUser': 'KPI User',
+                         'purchaseDate': '2024-01-01',
+                         'warrantyExpiryDate': '2027-01-01',
+                         'department': 'Legal',
+                     })
+        self.app.post('/api/assets',
+                     json={'action': 'update', 'assetId': 'AST-001', 'department': 'Legal', 'status': 'Maintenance'})
+        self.app.post('/api/assets', json={'action': 'delete', 'assetId': 'AST-002'})
+        self.app.post('/api/licenses',
+                     json={'action': 'update', 'licenseId': 'LIC-001', 'complianceStatus': 'Unauthorized'})
+        self.app.post('/api/monitoring/hardware',
+                     json={'deviceId': 'DEV-KPI', 'cpuLoad': 99, 'memoryUtil': 10})
+        self.app.delete('/api/monitoring/network?deviceId=NET-001')
+        self.app.post('/api/monitoring/backup/verify')
+
+        with app.app_context():
+            self.assertEqual(check_kpi_counters(), {})
+
+        departments = json.loads(self.app.get('/api/analytics/assets-by-department').data)
+        self.assertEqual(departments['Legal'], 2)
+        self.assertNotIn('Sales', departments)
+        metrics = json.loads(self.app.get('/api/dashboard/metrics').data)
+        self.assertEqual(metrics['totalAssets'], 7)
+        self.assertEqual(metrics['hardwareHealthAlerts'], 4)
+        self.assertEqual(metrics['networkEvents'], 2)
+        self.assertEqual(metrics['backupFailures'], 0)
+
+    def test_kpi_cli_check_and_rebuild(self):
+        """The kpi CLI detects drift and repairs it with a rebuild"""
+        runner = app.test_cli_runner()
+        with app.app_context():
+            db.session.get(KpiCounter, 'assets.total').value = 999
+            db.session.commit()
+
+        result = runner.invoke(args=['kpi', 'check'])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn('assets.total: stored=999 expected=7', result.output)
+
+        result = runner.invoke(args=['kpi', 'rebuild'])
+        self.assertEqual(result.exit_code, 0)
+        result = runner.invoke(args=['kpi', 'check'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('consistent', result.output)
+
+    def test_bulk_assets_keep_counters_and_invalidate_reports(self):
+        """Bulk writes update KPI counters and clear cached reports"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        self.app.get('/api/reports/overview')
+        self.app.post('/api/assets/bulk', json={'operations': [
+            {'action': 'create', 'assetId': 'BULK-KPI', 'assetType': 'Laptop', 'assignedUser': 'A',
+             'purchaseDate': '2024-01-01', 'warrantyExpiryDate': '2027-01-01', 'department': 'Ops'},
+            {'action': 'update', 'assetId': 'AST-003', 'department': 'Ops'},
+            {'action': 'delete', 'assetId': 'AST-005'},
+        ]})
+        with app.app_context():
+            self.assertEqual(check_kpi_counters(), {})
+        response = self.app.get('/api/reports/overview')
+        self.assertEqual(response.headers['X-Report-Cache'], 'miss')
+        self.assertEqual(json.loads(response.data)['assetsReport']['assetsPerDepartment']['Ops'], 2)
+
+    def test_asset_mutation_commits_once(self):
+        """Asset, audit and asset log rows are committed in one transaction"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        commits = []
+        with app.app_context():
+            engine = db.engine
+        listener = lambda conn: commits.append(conn)
+        event.listen(engine, "commit", listener)
+        try:
+            response = self.app.post('/api/assets',
+                                    json={
+                                        'action': 'create',
+                                        'assetId': 'UOW-001',
+                                        'assetType': 'Laptop',
+                                        'assignedUser': 'UoW User',
+                                        'purchaseDate': '2024-01-01',
+                                        'warrantyExpiryDate': '2027-01-01',
+                                    })
+        finally:
+            event.remove(engine, "commit", listener)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(commits), 1)
+
+    def test_unit_of_work_rolls_back_everything(self):
+        """A failure inside the unit of work leaves no partial history"""
+        from datetime import date
+        with app.app_context():
+            with self.assertRaises(RuntimeError):
+                with unit_of_work("Admin") as uow:
+                    asset = uow.add(Asset(
+                        asset_id='UOW-FAIL',
+                        asset_type='Laptop',
+                        assigned_user='Nobody',
+                        purchase_date=date(2024, 1, 1),
+                        warranty_expiry_date=date(2027, 1, 1),
+                    ))
+                    uow.audit("CREATE", "Created asset UOW-FAIL")
+                    uow.asset_log(asset, "CREATE", "Laptop assigned to Nobody")
+                    raise RuntimeError("simulated failure")
+            self.assertIsNone(Asset.query.filter_by(asset_id='UOW-FAIL').first())
+            self.assertIsNone(AssetLog.query.filter_by(asset_id='UOW-FAIL').first())
+            self.assertIsNone(AuditLog.query.filter_by(details='Created asset UOW-FAIL').first())
+            self.assertEqual(check_kpi_counters(), {})
+
+    def test_sqlite_connections_are_tuned(self):
+        """File databases use WAL, relaxed fsync and a sized connection pool"""
+        with app.app_context():
+            with db.engine.connect() as connection:
+                pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                self.assertEqual(pragma("journal_mode"), "wal")
+                self.assertEqual(pragma("synchronous"), 1)
+                self.assertEqual(pragma("busy_timeout"), app.config["SQLITE_BUSY_TIMEOUT_MS"])
+                self.assertEqual(pragma("cache_size"), app.config["SQLITE_CACHE_SIZE"])
+            self.assertEqual(db.engine.pool.size(), app.config["DB_POOL_SIZE"])
+
+    def test_memory_database_skips_wal(self):
+        """WAL is not requested for in-memory databases"""
+        config = dict(app.config, SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")
+        self.assertFalse(any("journal_mode" in pragma for pragma in sqlite_pragmas(config)))
+
+    def test_dashboard_stream_computes_once_per_tick(self):
+        """One metrics computation serves every subscriber and only changed fields are pushed"""
+        broadcaster = app.extensions['dashboard_broadcaster']
+        subscribers = [broadcaster.subscribe() for _ in range(3)]
+        try:
+            for subscriber, snapshot in subscribers:
+                self.assertEqual(snapshot['totalAssets'], 7)
+
+            with app.app_context():
+                with count_queries(current_thread_only=True) as statements:
+                    broadcaster.publish()
+            self.assertEqual(len(statements), 4)
+            for subscriber, _ in subscribers:
+                self.assertTrue(subscriber.empty())
+
+            self.app.post('/api/auth/login',
+                         json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+            self.app.post('/api/monitoring/hardware',
+                         json={'deviceId': 'DEV-SSE', 'cpuLoad': 99, 'memoryUtil': 10})
+            broadcaster.publish()
+            for subscriber, _ in subscribers:
+                event_name, changes = subscriber.get_nowait()
+                self.assertEqual(event_name, 'delta')
+                self.assertEqual(changes['hardwareHealthAlerts'], 4)
+                self.assertNotIn('totalAssets', changes)
+        finally:
+            for subscriber, _ in subscribers:
+                broadcaster.unsubscribe(subscriber)
+
+    def test_dashboard_stream_endpoint_sends_snapshot(self):
+        """The SSE endpoint opens with a full snapshot event"""
+        response = self.app.get('/api/dashboard/metrics/stream', buffered=False)
+        try:
+            self.assertEqual(response.mimetype, 'text/event-stream')
+            first_event = next(response.response).decode()
+            self.assertTrue(first_event.startswith('event: snapshot\ndata: '))
+            data = json.loads(first_event.split('data: ', 1)[1])
+            self.assertEqual(data['totalAssets'], 7)
+        finally:
+            response.close()
+        self.assertEqual(app.extensions['dashboard_broadcaster'].subscriber_count(), 0)
+
+
+    def test_dashboard_streams_are_capped_per_process(self):
+        """Beyond the subscriber cap the stream answers 503 instead of taking a thread"""
+        original = app.config['DASHBOARD_STREAM_MAX_SUBSCRIBERS']
+        app.config['DASHBOARD_STREAM_MAX_SUBSCRIBERS'] = 1
+        first = self.app.get('/api/dashboard/metrics/stream', buffered=False)
+        try:
+            next(first.response)
+            refused = self.app.get('/api/dashboard/metrics/stream')
+            self.assertEqual(refused.status_code, 503)
+            self.assertIn('Retry-After', refused.headers)
+        finally:
+            first.close()
+            app.config['DASHBOARD_STREAM_MAX_SUBSCRIBERS'] = original
+        self.assertEqual(app.extensions['dashboard_broadcaster'].subscriber_count(), 0)
+
+    def test_dashboard_stream_ends_after_max_seconds(self):
+        """A stream closes after its time bound so the thread returns to the pool"""
+        original = app.config['DASHBOARD_STREAM_MAX_SECONDS']
+        app.config['DASHBOARD_STREAM_MAX_SECONDS'] = 0.2
+        try:
+            response = self.app.get('/api/dashboard/metrics/stream', buffered=False)
+            events = [chunk.decode() for chunk in response.response]
+            response.close()
+        finally:
+            app.config['DASHBOARD_STREAM_MAX_SECONDS'] = original
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].startswith('event: snapshot'))
+        self.assertEqual(app.extensions['dashboard_broadcaster'].subscriber_count(), 0)
+
+
+class IIMSReadReplicaTestCase(unittest.TestCase):
+    """GET handlers read from the replica, writes and stickiness use the primary"""
+
+    def make_apps(self, **config):
+        directory = tempfile.mkdtemp(prefix='iims-replica-')
+        self.addCleanup(shutil.rmtree, directory, True)
+        primary = os.path.join(directory, 'primary.db')
+        replica = os.path.join(directory, 'replica.db')
+        config.update({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+            'READ_DATABASE_URL': f'sqlite:///{replica}',
+            'DATABASE_INIT': 'manual',
+            'AUDIT_MODE': 'sync',
+        })
+        replicated_app = create_app(config)
+        with replicated_app.app_context():
+            initialize_database()
+            for engine in db.engines.values():
+                self.addCleanup(engine.dispose)
+        # A point-in-time copy stands in for a replica that has not caught up yet
+        source, target = sqlite3.connect(primary), sqlite3.connect(replica)
+        source.backup(target)
+        source.close()
+        target.close()
+        return replicated_app
+
+    def create_asset(self, client, asset_id):
+        client.post('/api/auth/login', json={'username': 'itstaff', 'password': 'it123'})
+        response = client.post('/api/assets', json={
+            'action': 'create',
+            'assetId': asset_id,
+            'assetType': 'Laptop',
+            'assignedUser': 'Replica User',
+            'purchaseDate': '2024-01-01',
+            'warrantyExpiryDate': '2027-01-01',
+        })
+        self.assertEqual(response.status_code, 201)
+
+    def asset_ids(self, client, **kwargs):
+        return [asset['assetId'] for asset in client.get('/api/assets', **kwargs).get_json()]
+
+    def test_get_reads_replica_and_writes_go_to_primary(self):
+        """Without stickiness a GET right after a write sees the lagging replica"""
+        replicated_app = self.make_apps(READ_YOUR_WRITES_SECONDS=0)
+        client = replicated_app.test_client()
+        self.create_asset(client, 'REPL-001')
+        self.assertNotIn('REPL-001', self.asset_ids(client))
+        with replicated_app.app_context():
+            self.assertIsNotNone(Asset.query.filter_by(asset_id='REPL-001').first())
+
+    def test_read_your_writes_after_mutation(self):
+        """A client that just wrote reads from the primary; other clients keep the replica"""
+        replicated_app = self.make_apps(READ_YOUR_WRITES_SECONDS=30)
+        client = replicated_app.test_client()
+        self.create_asset(client, 'REPL-002')
+        self.assertIn('REPL-002', self.asset_ids(client))
+
+        token = client.post('/api/auth/login',
+                            json={'username': 'itstaff', 'password': 'it123'}).get_json()['token']
+        other = replicated_app.test_client()
+        self.assertNotIn('REPL-002', self.asset_ids(other, headers={'Authorization': f'Bearer {token}'}))
+
+    def report_query_engines(self, replicated_app, client):
+        """Build a report on a cold cache; return the engines that read its KPI counters."""
+        with replicated_app.app_context():
+            get_report_cache().invalidate()
+            engines = {'primary': db.engines[None], 'replica': db.engines['replica']}
+        used = []
+        listeners = []
+        for name, engine in engines.items():
+            def listener(conn, cursor, statement, *args, name=name):
+                if 'FROM kpi_counters' in statement:
+                    used.append(name)
+            event.listen(engine, 'before_cursor_execute', listener)
+            listeners.append((engine, listener))
+        try:
+            report = client.get('/api/reports/overview').get_json()
+        finally:
+            for engine, listener in listeners:
+                event.remove(engine, 'before_cursor_execute', listener)
+        return report, set(used)
+
+    def test_report_cache_fills_from_replica_unless_sticky(self):
+        """A report miss reads the replica; a client sticky after a write reads the primary"""
+        replicated_app = self.make_apps(READ_YOUR_WRITES_SECONDS=30)
+        writer = replicated_app.test_client()
+        self.create_asset(writer, 'REPL-003')
+        writer.post('/api/auth/login',
+                    json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        report, engines = self.report_query_engines(replicated_app, writer)
+        self.assertEqual(engines, {'primary'})
+        self.assertEqual(report['assetsReport']['totalAssets'], 8)
+
+        reader = replicated_app.test_client()
+        reader.post('/api/auth/login',
+                    json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        # Logging in is a write, so drop the read-your-writes cookie it earned
+        reader.delete_cookie(READ_PRIMARY_COOKIE)
+        report, engines = self.report_query_engines(replicated_app, reader)
+        self.assertEqual(engines, {'replica'})
+        self.assertEqual(report['assetsReport']['totalAssets'], 7)
+        with replicated_app.app_context():
+            self.assertIsNotNone(AuditLog.query.filter_by(action='REPORT_GENERATE').first())
+
+
+if __name__ == '__main__':
+    unittest.main()
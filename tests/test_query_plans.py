@@ -0,0 +1,300 @@
+import re
+import unittest
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from server import (
+    app,
+    db,
+    Asset,
+    AssetComplaint,
+    AssetLog,
+    AuditLog,
+    BackupJob,
+    HardwareHealthRecord,
+    License,
+    NetworkDevice,
+    initialize_database,
+    rebuild_kpi_counters,
+)
+
+SEED_ROWS = 5000
+HOT_TABLES = {
+    "assets",
+    "asset_complaints",
+    "licenses",
+    "hardware_health_records",
+    "backup_jobs",
+    "network_devices",
+    "audit_logs",
+    "asset_logs",
+    "kpi_counters",
+    "change_log",
+}
+# "SCAN assets", "SCAN TABLE assets AS a", "SCAN assets USING INDEX ix_..."
+SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX \w+)?$")
+WHERE_CLAUSE = re.compile(r"\bWHERE\b")
+LIMIT_CLAUSE = re.compile(r"\bLIMIT\b")
+
+
+@contextmanager
+def capture_selects():
+    """Collect (statement, parameters) for every SELECT sent to the engine."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def query_plan(statement, parameters):
+    """Return the detail column of every EXPLAIN QUERY PLAN row."""
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def full_scans(statement, plan):
+    """Return the hot tables that a statement reads with a full table scan.
+
+    Two kinds of SCAN are bounded rather than full: an unfiltered walk in key
+    order stopped by LIMIT, and a filtered walk along an index that supplies
+    the ORDER BY and is stopped by LIMIT. Anything else visits every row or
+    index entry, including a ``SCAN ... USING INDEX`` with no LIMIT.
+    """
+    filtered = bool(WHERE_CLAUSE.search(statement))
+    limited = bool(LIMIT_CLAUSE.search(statement))
+    scans = []
+    for detail in plan:
+        match = SCAN.match(detail)
+        if not match or match.group(1) not in HOT_TABLES:
+            continue
+        bounded = limited and (match.group(2) is not None or not filtered)
+        if not bounded:
+            scans.append(match.group(1))
+    return scans
+
+
+def seed_large_dataset(rows=SEED_ROWS):
+    """Bulk load enough rows that a missing index shows up as a table scan.
+
+    No ANALYZE is run: sqlite_stat1 only records average rows per key, which
+    makes skewed low-cardinality columns (backup status) look unselective.
+    """
+    now = datetime.utcnow()
+    today = date.today()
+    departments = ["IT", "Finance", "HR", "Sales", "Ops", "Legal"]
+    statuses = ["Active", "Maintenance", "Retired"]
+    db.session.execute(insert(Asset), [
+        {
+            "asset_id": f"BIG-{i:06d}",
+            "asset_type": ["Laptop", "Desktop", "Monitor", "Phone"][i % 4],
+            "assigned_user": f"User {i % 500:03d}",
+            "purchase_date": today - timedelta(days=i % 1000),
+            "warranty_expiry_date": today + timedelta(days=i % 900 - 300),
+            "status": statuses[i % 3],
+            "department": departments[i % 6],
+        }
+        for i in range(rows)
+    ])
+    db.session.execute(insert(AssetComplaint), [
+        {"asset_id": f"BIG-{i:06d}", "issue": "Seeded", "employee_name": f"User {i % 500:03d}",
+         "employee_username": f"user{i % 500}", "status": "Open", "created_at": now - timedelta(minutes=i)}
+        for i in range(rows)
+    ])
+    db.session.execute(insert(License), [
+        {"license_id": f"BIGLIC-{i:06d}", "software_name": "Suite", "license_key": f"KEY-{i}",
+         "total_seats": 10, "used_seats": i % 11, "expiry_date": today + timedelta(days=i % 1000 - 100),
+         "compliance_status": ["Compliant", "Expired", "Unauthorized"][i % 3]}
+        for i in range(rows)
+    ])
+    db.session.execute(insert(HardwareHealthRecord), [
+        {"device_id": f"BIGDEV-{i:06d}", "cpu_load": i % 100, "memory_util": 50,
+         "is_overheating": i % 97 == 0, "last_check": now - timedelta(minutes=i)}
+        for i in range(rows)
+    ])
+    db.session.execute(insert(BackupJob), [
+        {"job_id": f"BIGJOB-{i:06d}", "asset_id": f"BIG-{i:06d}",
+         "last_run_date": now - timedelta(hours=i), "status": {0: "Failure", 1: "Missed"}.get(i % 50, "Success")}
+        for i in range(rows)
+    ])
+    db.session.execute(insert(NetworkDevice), [
+        {"device_id": f"BIGNET-{i:06d}", "bandwidth_mb": i % 2000,
+         "is_downtime": i % 211 == 0, "abnormal_traffic": i % 307 == 0}
+        for i in range(rows)
+    ])
+    db.session.execute(insert(AuditLog), [
+        {"timestamp": now - timedelta(seconds=i), "action": "UPDATE", "details": "Seeded",
+         "user_role": "Admin"}
+        for i in range(rows)
+    ])
+    db.session.execute(insert(AssetLog), [
+        {"timestamp": now - timedelta(seconds=i), "asset_id": f"BIG-{i % 500:06d}", "action": "UPDATE",
+         "details": "Seeded", "performed_by": "Admin", "asset_type": "Laptop",
+         "assigned_user": f"User {i % 500:03d}"}
+        for i in range(rows)
+    ])
+    rebuild_kpi_counters(commit=False)
+    db.session.commit()
+
+
+class IIMSQueryPlanTestCase(unittest.TestCase):
+    """EXPLAIN QUERY PLAN regression checks for hot endpoints"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Seed a large dataset once for the whole suite"""
+        with app.app_context():
+            initialize_database(reset=True)
+            seed_large_dataset()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Leave a small database behind for the other suites"""
+        with app.app_context():
+            initialize_database(reset=True)
+
+    def setUp(self):
+        """Set up test client"""
+        self.app = app.test_client()
+        self.app.testing = True
+
+    def login(self, username, password, mfa_code=None):
+        payload = {'username': username, 'password': password}
+        if mfa_code:
+            payload['mfaCode'] = mfa_code
+        self.app.post('/api/auth/login', json=payload)
+
+    def assertNoFullScans(self, method, url, full_reads=()):
+        """Request an endpoint and check the plan of every SELECT it issued.
+
+        ``full_reads`` lists the tables an unpaginated endpoint is meant to
+        read whole; those scans are allowed only when they walk the table or
+        an index in ORDER BY order, without sorting in a temp b-tree.
+        """
+        with app.app_context():
+            with capture_selects() as captured:
+                response = self.app.open(url, method=method)
+                # Streamed bodies run their queries while being read
+                response.get_data()
+            self.assertLess(response.status_code, 400, f"{method} {url}: {response.status_code}")
+            self.assertTrue(captured, f"{method} {url} issued no queries")
+            for statement, parameters in captured:
+                plan = query_plan(statement, parameters)
+                scans = full_scans(statement, plan)
+                unexpected = [table for table in scans if table not in full_reads]
+                self.assertEqual(unexpected, [], f"{method} {url} scans {unexpected}:\n{statement}")
+                if scans:
+                    sorts = [detail for detail in plan if "TEMP B-TREE" in detail]
+                    self.assertEqual(sorts, [], f"{method} {url} sorts a full read:\n{statement}")
+
+    def test_dashboard_metrics_plan(self):
+        """Dashboard metrics read counters and indexed detail lists"""
+        self.assertNoFullScans('GET', '/api/dashboard/metrics')
+
+    def test_asset_list_plans(self):
+        """Filtered and paged asset lists use indexes"""
+        self.login('itstaff', 'it123')
+        self.assertNoFullScans('GET', '/api/assets?limit=50')
+        self.assertNoFullScans('GET', '/api/assets?limit=50&after=2500')
+        self.assertNoFullScans('GET', '/api/assets?assignedUser=User%20042')
+        self.assertNoFullScans('GET', '/api/assets?assetType=Monitor&limit=50')
+
+    def test_employee_asset_plans(self):
+        """Employee views look assets up by assignee"""
+        self.login('employee', 'emp123')
+        self.assertNoFullScans('GET', '/api/assets/export')
+        self.login('admin', 'admin123', '123456')
+        self.assertNoFullScans('GET', '/api/users/employee/assets')
+
+    def test_log_plans(self):
+        """Unpaginated audit and asset logs stream every row newest first along the timestamp index"""
+        self.login('admin', 'admin123', '123456')
+        self.assertNoFullScans('GET', '/api/audit-log', full_reads={'audit_logs'})
+        self.assertNoFullScans('GET', '/api/assets/logs', full_reads={'asset_logs'})
+
+    def test_audit_log_page_plans(self):
+        """Time-ranged, action-filtered and cursor-paged audit reads use indexes"""
+        self.login('admin', 'admin123', '123456')
+        self.assertNoFullScans('GET', '/api/audit-log?limit=100')
+        self.assertNoFullScans('GET', '/api/audit-log?limit=100&action=UPDATE')
+        page = self.app.get('/api/audit-log?limit=100').get_json()
+        self.assertNoFullScans('GET', f"/api/audit-log?limit=100&after={page['nextCursor']}")
+        self.assertNoFullScans('GET', '/api/audit-log?limit=100&since=2000-01-01%2000:00:00&until=2100-01-01%2000:00:00')
+
+    def test_asset_history_plans(self):
+        """Per-asset history pages and polls walk the (asset_id, timestamp) index"""
+        self.login('itstaff', 'it123')
+        self.assertNoFullScans('GET', '/api/assets/BIG-000042/history?limit=3')
+        page = self.app.get('/api/assets/BIG-000042/history?limit=3').get_json()
+        self.assertNoFullScans('GET', f"/api/assets/BIG-000042/history?limit=3&after={page['nextCursor']}")
+        self.assertNoFullScans('GET', f"/api/assets/BIG-000042/history?since={page['nextCursor']}")
+
+    def test_inventory_as_of_plan(self):
+        """As-of inventory replays asset logs by id range after the nearest snapshot"""
+        self.login('itstaff', 'it123')
+        self.assertNoFullScans('GET', '/api/inventory/as-of?at=2100-01-01%2000:00:00')
+
+    def test_sync_plan(self):
+        """Delta sync reads the change log by sequence range and records by natural key"""
+        self.login('itstaff', 'it123')
+        self.app.post('/api/assets', json={'action': 'update', 'assetId': 'BIG-000042', 'status': 'Retired'})
+        self.assertNoFullScans('GET', '/api/sync?since=1')
+
+    def test_export_plans(self):
+        """Exports read every row, but in index order so nothing is sorted in a temp b-tree"""
+        self.login('admin', 'admin123', '123456')
+        exports = {'assets': 'assets', 'licenses': 'licenses', 'audit-log': 'audit_logs', 'asset-logs': 'asset_logs'}
+        for dataset, table in exports.items():
+            self.assertNoFullScans('GET', f'/api/export/{dataset}', full_reads={table})
+        self.login('employee', 'emp123')
+        self.assertNoFullScans('GET', '/api/assets/export')
+
+    def test_projected_list_plans(self):
+        """Field projections select only the requested columns"""
+        self.login('itstaff', 'it123')
+        self.assertNoFullScans('GET', '/api/assets?fields=assetId,status&limit=50')
+        self.assertNoFullScans('GET', '/api/monitoring/hardware?fields=deviceId&format=columnar&limit=50')
+        with app.app_context():
+            with capture_selects() as captured:
+                self.app.get('/api/assets?fields=assetId,status&limit=50').get_data()
+            statement = captured[-1][0].split(' FROM ')[0]
+            self.assertIn('asset_id', statement)
+            self.assertNotIn('assigned_user', statement)
+            self.assertNotIn('purchase_date', statement)
+
+    def test_complaint_plan(self):
+        """Complaints stream newest first along the created_at index, without a sort"""
+        self.login('itstaff', 'it123')
+        self.assertNoFullScans('GET', '/api/complaints', full_reads={'asset_complaints'})
+
+    def test_monitoring_plans(self):
+        """Paged monitoring lists walk the primary key"""
+        self.login('itstaff', 'it123')
+        self.assertNoFullScans('GET', '/api/licenses?limit=50&after=100')
+        self.assertNoFullScans('GET', '/api/monitoring/hardware?limit=50')
+        self.assertNoFullScans('GET', '/api/monitoring/network?limit=50')
+        self.assertNoFullScans('GET', '/api/monitoring/backup?limit=50')
+
+    def test_report_plans(self):
+        """Overview report windows, breakdowns and top lists use indexes"""
+        self.login('admin', 'admin123', '123456')
+        self.assertNoFullScans('GET', '/api/reports/overview')
+        self.assertNoFullScans('GET', '/api/analytics/assets-by-department')
+
+    def test_backup_verify_plan(self):
+        """Backup verification finds failed jobs by status"""
+        self.login('itstaff', 'it123')
+        self.assertNoFullScans('POST', '/api/monitoring/backup/verify')
+
+
+if __name__ == '__main__':
+    unittest.main()
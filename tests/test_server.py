@@ -17,12 +17,6 @@ class IIMSTestCase(unittest.TestCase):
         """Set up test client"""
         self.app = app.test_client()
         self.app.testing = True
-        # Reset authentication state before each test
-        from server import current_role, current_user, is_authenticated
-        import server
-        server.current_role = None
-        server.current_user = None
-        server.is_authenticated = False
         with app.app_context():
             initialize_database(reset=True)
     
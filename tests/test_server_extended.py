@@ -1,5 +1,6 @@
 import unittest
 import json
+from unittest import mock
 from server import app, Asset, License, initialize_database
 
 class IIMSExtendedTestCase(unittest.TestCase):
@@ -9,11 +10,6 @@ class IIMSExtendedTestCase(unittest.TestCase):
         """Set up test client"""
         self.app = app.test_client()
         self.app.testing = True
-        # Reset authentication state
-        import server
-        server.current_role = None
-        server.current_user = None
-        server.is_authenticated = False
         with app.app_context():
             initialize_database(reset=True)
     
@@ -625,6 +621,767 @@ class IIMSExtendedTestCase(unittest.TestCase):
                                 json={'jobId': 'BK-001', 'comment': 'Should fail'})
         self.assertEqual(response.status_code, 403)
 
+    def test_assets_keyset_pagination(self):
+        """Assets list pages through results with limit/after cursors"""
+        first = json.loads(self.app.get('/api/assets?limit=3').data)
+        self.assertEqual(len(first['items']), 3)
+        self.assertIsNotNone(first['nextCursor'])
+
+        seen = [asset['assetId'] for asset in first['items']]
+        cursor = first['nextCursor']
+        while cursor:
+            page = json.loads(self.app.get(f'/api/assets?limit=3&after={cursor}').data)
+            seen.extend(asset['assetId'] for asset in page['items'])
+            cursor = page['nextCursor']
+
+        full = json.loads(self.app.get('/api/assets').data)
+        self.assertEqual(seen, [asset['assetId'] for asset in full])
+
+    def test_monitoring_lists_support_pagination(self):
+        """Monitoring and license lists accept the same cursor parameters"""
+        for url in ['/api/licenses', '/api/monitoring/hardware',
+                    '/api/monitoring/network', '/api/monitoring/backup']:
+            response = self.app.get(f'{url}?limit=2')
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertEqual(len(data['items']), 2)
+            self.assertIn('nextCursor', data)
+
+    def test_list_field_projection_and_columnar_format(self):
+        """fields narrows list items; format=columnar returns one array per column"""
+        full = json.loads(self.app.get('/api/assets').data)
+        projected = json.loads(self.app.get('/api/assets?fields=status,assetId').data)
+        self.assertEqual(projected, [{'status': a['status'], 'assetId': a['assetId']} for a in full])
+
+        page = json.loads(self.app.get('/api/licenses?fields=licenseId,expiryDate&limit=2').data)
+        self.assertEqual(set(page['items'][0]), {'licenseId', 'expiryDate'})
+        self.assertIsNotNone(page['nextCursor'])
+
+        columnar = json.loads(self.app.get('/api/assets?fields=assetId,status&format=columnar').data)
+        self.assertEqual(columnar['columns'], ['assetId', 'status'])
+        self.assertEqual(columnar['data'], [[a['assetId'] for a in full], [a['status'] for a in full]])
+        self.assertIsNone(columnar['nextCursor'])
+
+        rows = json.loads(self.app.get('/api/monitoring/hardware?limit=2').data)
+        columns = json.loads(self.app.get('/api/monitoring/hardware?limit=2&format=columnar').data)
+        self.assertEqual(columns['nextCursor'], rows['nextCursor'])
+        self.assertEqual([dict(zip(columns['columns'], values)) for values in zip(*columns['data'])],
+                         rows['items'])
+
+    def test_list_projection_rejects_bad_arguments(self):
+        """Unknown fields and formats are rejected with the available fields listed"""
+        response = self.app.get('/api/assets?fields=assetId,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', json.loads(response.data)['error'])
+        self.assertIn('assetType', json.loads(response.data)['error'])
+        self.assertEqual(self.app.get('/api/assets?format=xml').status_code, 400)
+        self.assertEqual(self.app.get('/api/assets?fields=,').status_code, 400)
+
+    def test_pagination_rejects_invalid_cursor(self):
+        """Non-numeric limit or cursor values are rejected"""
+        response = self.app.get('/api/assets?limit=abc')
+        self.assertEqual(response.status_code, 400)
+        response = self.app.get('/api/assets?limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_asset_operations(self):
+        """Bulk endpoint applies creates, updates and deletes in one transaction"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        operations = [
+            {
+                'action': 'create',
+                'assetId': f'BULK-{index:03d}',
+                'assetType': 'Laptop',
+                'assignedUser': 'Bulk User',
+                'purchaseDate': '2024-01-01',
+                'warrantyExpiryDate': '2027-01-01',
+                'department': 'Finance',
+            }
+            for index in range(25)
+        ]
+        operations.append({'action': 'update', 'assetId': 'AST-001', 'status': 'Maintenance'})
+        operations.append({'action': 'delete', 'assetId': 'AST-002'})
+        response = self.app.post('/api/assets/bulk', json={'operations': operations})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['summary']['created'], 25)
+        self.assertEqual(data['summary']['updated'], 1)
+        self.assertEqual(data['summary']['deleted'], 1)
+        self.assertIn('operationsPerSecond', data['summary'])
+        self.assertEqual(data['results'][-1]['status'], 'deleted')
+
+        assets = {asset['assetId']: asset for asset in json.loads(self.app.get('/api/assets').data)}
+        self.assertIn('BULK-024', assets)
+        self.assertNotIn('AST-002', assets)
+        self.assertEqual(assets['AST-001']['status'], 'Maintenance')
+
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        logs = json.loads(self.app.get('/api/assets/logs').data)
+        self.assertTrue(any(log['assetId'] == 'BULK-000' and log['action'] == 'CREATE' for log in logs))
+        self.assertTrue(any(log['assetId'] == 'AST-001' and log['details'] == 'status -> Maintenance' for log in logs))
+        audit = json.loads(self.app.get('/api/audit-log').data)
+        self.assertTrue(any(entry['details'] == 'Deleted asset AST-002' for entry in audit))
+
+    def test_bulk_asset_validation_is_all_or_nothing(self):
+        """One invalid operation rejects the whole batch with per-item errors"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        response = self.app.post('/api/assets/bulk', json={'operations': [
+            {'action': 'create', 'assetId': 'BULK-OK', 'assetType': 'Laptop', 'assignedUser': 'A',
+             'purchaseDate': '2024-01-01', 'warrantyExpiryDate': '2027-01-01'},
+            {'action': 'update', 'assetId': 'MISSING-001', 'status': 'Active'},
+            {'action': 'create', 'assetId': 'AST-003', 'assetType': 'Laptop', 'assignedUser': 'A',
+             'purchaseDate': 'bad-date', 'warrantyExpiryDate': '2027-01-01'},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        results = json.loads(response.data)['results']
+        self.assertEqual([result['status'] for result in results], ['valid', 'error', 'error'])
+        assets = json.loads(self.app.get('/api/assets').data)
+        self.assertFalse(any(asset['assetId'] == 'BULK-OK' for asset in assets))
+
+    def test_bulk_assets_rejects_malformed_payloads(self):
+        """Non-object bodies, non-list operations and non-string fields are 400s, not 500s"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        for body in [[{'action': 'delete', 'assetId': 'AST-001'}], 'operations', 42, None,
+                     {'operations': {'action': 'delete'}}, {'operations': 'AST-001'}]:
+            response = self.app.post('/api/assets/bulk', json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', json.loads(response.data))
+
+        response = self.app.post('/api/assets/bulk', json={'operations': [
+            'delete AST-001',
+            {'action': ['delete'], 'assetId': 'AST-001'},
+            {'action': 'delete', 'assetId': ['AST-001']},
+            {'action': 'update', 'assetId': 'AST-002', 'status': 5},
+            {'action': 'create', 'assetId': {'id': 1}, 'assetType': 'Laptop', 'assignedUser': 'A',
+             'purchaseDate': '2024-01-01', 'warrantyExpiryDate': '2027-01-01'},
+            {'action': 'create', 'assetType': 'Laptop', 'assignedUser': ['A'],
+             'purchaseDate': '2024-01-01', 'warrantyExpiryDate': '2027-01-01'},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        results = json.loads(response.data)['results']
+        self.assertEqual([result['status'] for result in results], ['error'] * 6)
+        self.assertTrue(all(result['assetId'] is None or isinstance(result['assetId'], str) for result in results))
+
+    def test_bulk_assets_rejects_empty_update(self):
+        """An update that sets no field is an error and writes no log entry"""
+        import server
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        with app.app_context():
+            logs_before = server.AssetLog.query.count()
+        response = self.app.post('/api/assets/bulk', json={'operations': [
+            {'action': 'update', 'assetId': 'AST-001'},
+            {'action': 'update', 'assetId': 'AST-002', 'unknownField': 'x'},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        results = json.loads(response.data)['results']
+        self.assertEqual([result['status'] for result in results], ['error', 'error'])
+        self.assertIn('at least one', results[0]['error'])
+        with app.app_context():
+            self.assertEqual(server.AssetLog.query.count(), logs_before)
+
+    def test_bulk_assets_requires_crud_role(self):
+        """Employees cannot use the bulk endpoint"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'employee', 'password': 'emp123'})
+        response = self.app.post('/api/assets/bulk', json={'operations': [{'action': 'delete', 'assetId': 'AST-001'}]})
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_can_ingest_hardware_telemetry(self):
+        """Telemetry batches store every sample and refresh the latest view"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        samples = [
+            {'deviceId': 'DEV-001', 'timestamp': f'2030-01-01 00:0{minute}:00',
+             'cpuLoad': 20 + minute, 'memoryUtil': 40, 'isOverheating': False}
+            for minute in range(5)
+        ]
+        samples.append({'deviceId': 'DEV-TEL-001', 'timestamp': '2030-01-01 00:00:00',
+                        'cpuLoad': 95, 'memoryUtil': 70, 'isOverheating': True})
+        response = self.app.post('/api/monitoring/hardware/telemetry', json={'samples': samples})
+        self.assertEqual(response.status_code, 201)
+        data = json.loads(response.data)
+        self.assertEqual(data['received'], 6)
+        self.assertEqual(data['stored'], 6)
+        self.assertEqual(data['devicesRefreshed'], 2)
+
+        # Re-posting the same batch is idempotent
+        response = self.app.post('/api/monitoring/hardware/telemetry', json={'samples': samples})
+        self.assertEqual(json.loads(response.data)['stored'], 0)
+
+        latest = {record['deviceId']: record for record in json.loads(self.app.get('/api/monitoring/hardware').data)}
+        self.assertEqual(latest['DEV-001']['cpuLoad'], 24)
+        self.assertEqual(latest['DEV-001']['lastCheck'], '2030-01-01 00:04:00')
+        self.assertTrue(latest['DEV-TEL-001']['isOverheating'])
+
+        history = json.loads(self.app.get(
+            '/api/monitoring/hardware/telemetry?deviceId=DEV-001&since=2030-01-01%2000:02:00').data)
+        self.assertEqual([sample['cpuLoad'] for sample in history], [22, 23, 24])
+
+    def test_telemetry_skips_duplicates_on_every_dialect(self):
+        """Retried samples are skipped by ON CONFLICT, or by a key lookup where there is none"""
+        import server
+        from sqlalchemy.dialects import postgresql
+        statement = server.IGNORING_INSERTS['postgresql'](server.HardwareTelemetrySample.__table__)
+        self.assertIn('ON CONFLICT DO NOTHING', str(statement.compile(dialect=postgresql.dialect())))
+
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        samples = [{'deviceId': 'DEV-DUP', 'timestamp': f'2030-02-01 00:0{minute}:00',
+                    'cpuLoad': 30, 'memoryUtil': 40} for minute in range(3)]
+        with mock.patch.dict(server.IGNORING_INSERTS, clear=True):
+            first = self.app.post('/api/monitoring/hardware/telemetry', json={'samples': samples[:2]})
+            self.assertEqual(json.loads(first.data)['stored'], 2)
+            retry = self.app.post('/api/monitoring/hardware/telemetry', json={'samples': samples + samples[2:]})
+            self.assertEqual(retry.status_code, 201)
+            self.assertEqual(json.loads(retry.data)['stored'], 1)
+        history = json.loads(self.app.get('/api/monitoring/hardware/telemetry?deviceId=DEV-DUP').data)
+        self.assertEqual(len(history), 3)
+
+    def test_telemetry_history_rejects_invalid_limits(self):
+        """History limits must be positive integers"""
+        for limit in ('-1', '0', 'ten'):
+            response = self.app.get(f'/api/monitoring/hardware/telemetry?deviceId=DEV-001&limit={limit}')
+            self.assertEqual(response.status_code, 400, limit)
+
+    def test_telemetry_rejects_invalid_samples(self):
+        """Invalid telemetry samples reject the batch"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        response = self.app.post('/api/monitoring/hardware/telemetry',
+                                json={'samples': [{'deviceId': 'DEV-001', 'cpuLoad': 'high', 'memoryUtil': 1}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.data)['errors'][0]['index'], 0)
+
+    def test_itstaff_cannot_ingest_telemetry(self):
+        """Only Admin can ingest telemetry"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        response = self.app.post('/api/monitoring/hardware/telemetry',
+                                json={'samples': [{'deviceId': 'DEV-001', 'cpuLoad': 1, 'memoryUtil': 1}]})
+        self.assertEqual(response.status_code, 403)
+
+    def test_audit_entries_are_written_in_batches(self):
+        """Queued audit entries reach the audit log through the background writer"""
+        import server
+        self.app.get('/api/assets/AST-001/qr')
+        self.app.get('/api/assets/AST-002/qr')
+        server.audit_writer.flush()
+        with app.app_context():
+            details = [entry.details for entry in server.AuditLog.query.all()]
+        self.assertIn('QR code generated for asset AST-001', details)
+        self.assertIn('QR code generated for asset AST-002', details)
+        self.assertEqual(server.audit_writer.stats()['queueDepth'], 0)
+
+    def test_audit_writer_stop_during_write_flushes_and_returns(self):
+        """stop() while the thread is writing a batch neither hangs nor drops queued entries"""
+        import threading
+        import server
+        writer = server.AuditLogWriter(app)
+        writing, release = threading.Event(), threading.Event()
+        written = []
+        original_write = writer._write
+
+        def slow_write(batch):
+            writing.set()
+            release.wait(5)
+            written.extend(entry['details'] for entry in batch)
+            original_write(batch)
+
+        writer._write = slow_write
+        entry = {'action': 'TEST', 'user_role': 'System', 'timestamp': server.datetime.utcnow()}
+        writer.enqueue(dict(entry, details='first'))
+        writer._queue.put(server._AUDIT_FLUSH_MARKER)
+        self.assertTrue(writing.wait(5))
+        writer.enqueue(dict(entry, details='second'))
+
+        stopper = threading.Thread(target=writer.stop, daemon=True)
+        stopper.start()
+        release.set()
+        stopper.join(10)
+        self.assertFalse(stopper.is_alive())
+        self.assertEqual(written, ['first', 'second'])
+        self.assertEqual(writer._queue.unfinished_tasks, 0)
+        with app.app_context():
+            details = {log.details for log in server.AuditLog.query.filter_by(action='TEST')}
+        self.assertEqual(details, {'first', 'second'})
+
+    def test_sync_audit_mode_commits_immediately(self):
+        """Strict mode writes audit entries before the request returns"""
+        import server
+        app.config['AUDIT_MODE'] = 'sync'
+        try:
+            writes_before = server.audit_writer.stats()['entriesWritten']
+            self.app.get('/api/assets/AST-003/qr')
+            with app.app_context():
+                entry = server.AuditLog.query.filter_by(details='QR code generated for asset AST-003').first()
+            self.assertIsNotNone(entry)
+            self.assertEqual(server.audit_writer.stats()['entriesWritten'], writes_before)
+        finally:
+            app.config['AUDIT_MODE'] = 'async'
+
+    def test_admin_can_view_audit_writer_stats(self):
+        """Admin can inspect audit queue depth and flush latency"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        self.app.get('/api/audit-log')
+        response = self.app.get('/api/audit-log/stats')
+        self.assertEqual(response.status_code, 200)
+        stats = json.loads(response.data)
+        for key in ['mode', 'queueDepth', 'entriesWritten', 'lastFlushMs', 'avgFlushMs', 'maxFlushMs']:
+            self.assertIn(key, stats)
+        self.assertGreater(stats['entriesWritten'], 0)
+
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        self.assertEqual(self.app.get('/api/audit-log/stats').status_code, 403)
+
+    def test_asset_history_pages_and_polls(self):
+        """One asset's timeline pages newest first and polls for newer entries"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        for user in ['Alice', 'Bob', 'Carol', 'Dave']:
+            response = self.app.post('/api/assets',
+                                     json={'action': 'update', 'assetId': 'AST-001', 'assignedUser': user})
+            self.assertEqual(response.status_code, 200)
+        self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-002', 'assignedUser': 'Eve'})
+
+        first = json.loads(self.app.get('/api/assets/AST-001/history?limit=2').data)
+        self.assertEqual(first['assetId'], 'AST-001')
+        self.assertEqual([entry['assignedUser'] for entry in first['items']], ['Dave', 'Carol'])
+        rest = json.loads(self.app.get(f"/api/assets/AST-001/history?after={first['nextCursor']}").data)
+        self.assertEqual([entry['assignedUser'] for entry in rest['items']][:2], ['Bob', 'Alice'])
+        self.assertTrue(all(entry['assetId'] == 'AST-001' for entry in rest['items']))
+        self.assertIsNone(rest['nextCursor'])
+
+        latest = first['latestCursor']
+        poll = json.loads(self.app.get(f'/api/assets/AST-001/history?since={latest}').data)
+        self.assertEqual(poll['items'], [])
+        self.assertEqual(poll['latestCursor'], latest)
+        for user in ['Frank', 'Grace']:
+            self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-001', 'assignedUser': user})
+        poll = json.loads(self.app.get(f'/api/assets/AST-001/history?since={latest}').data)
+        self.assertEqual([entry['assignedUser'] for entry in poll['items']], ['Frank', 'Grace'])
+        self.assertNotEqual(poll['latestCursor'], latest)
+
+        self.assertEqual(self.app.get('/api/assets/AST-001/history?since=nope').status_code, 400)
+        self.assertEqual(self.app.get('/api/assets/AST-001/history?after=nope').status_code, 400)
+        self.app.post('/api/auth/login',
+                     json={'username': 'employee', 'password': 'emp123'})
+        self.assertEqual(self.app.get('/api/assets/AST-001/history').status_code, 403)
+
+    def test_inventory_as_of_replays_from_nearest_snapshot(self):
+        """As-of inventory starts at the nearest snapshot and replays later asset logs"""
+        import server
+        from datetime import datetime, timedelta
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-001', 'assignedUser': 'Alice'})
+        self.app.post('/api/assets', json={
+            'action': 'create', 'assetId': 'AST-900', 'assetType': 'Tablet', 'assignedUser': 'Zoe',
+            'purchaseDate': '2024-01-01', 'warrantyExpiryDate': '2027-01-01'})
+        with app.app_context():
+            before_snapshot = datetime.utcnow()
+            result = app.test_cli_runner().invoke(args=['inventory', 'snapshot'])
+            self.assertEqual(result.exit_code, 0, result.output)
+        self.app.post('/api/assets', json={'action': 'delete', 'assetId': 'AST-900'})
+        self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-001', 'assignedUser': 'Bob'})
+
+        with app.app_context():
+            assets, snapshot, replayed = server.inventory_as_of(before_snapshot)
+            self.assertEqual(assets['AST-001'][1], 'Alice')
+            self.assertEqual(assets['AST-900'], ('Tablet', 'Zoe'))
+            self.assertEqual(replayed, 2)
+
+            now = datetime.utcnow()
+            assets, snapshot, replayed = server.inventory_as_of(now)
+            self.assertGreaterEqual(snapshot.taken_at, before_snapshot)
+            self.assertEqual(replayed, 2)
+            live = {asset.asset_id: (asset.asset_type, asset.assigned_user) for asset in server.Asset.query.all()}
+            self.assertEqual(assets, live)
+
+            assets, snapshot, replayed = server.inventory_as_of(now - timedelta(days=1))
+            self.assertIsNone(snapshot)
+            self.assertEqual(assets, {})
+
+        at = (datetime.utcnow() + timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M:%S')
+        data = json.loads(self.app.get(f'/api/inventory/as-of?at={at}').data)
+        self.assertEqual(data['deltasReplayed'], 2)
+        by_id = {asset['assetId']: asset for asset in data['assets']}
+        self.assertEqual(by_id['AST-001']['assignedUser'], 'Bob')
+        self.assertNotIn('AST-900', by_id)
+        self.assertEqual(self.app.get('/api/inventory/as-of').status_code, 400)
+        self.app.post('/api/auth/login',
+                     json={'username': 'employee', 'password': 'emp123'})
+        self.assertEqual(self.app.get(f'/api/inventory/as-of?at={at}').status_code, 403)
+
+    def test_inventory_as_of_carries_unknown_details_forward(self):
+        """Legacy asset logs with NULL details keep the previously known values"""
+        import server
+        from datetime import datetime
+        with app.app_context():
+            server.take_asset_snapshot()
+            known = server.Asset.query.filter_by(asset_id='AST-001').one()
+            server.db.session.add(server.AssetLog(asset_id='AST-001', action='UPDATE', details='legacy',
+                                                  performed_by='Admin'))
+            server.db.session.add(server.AssetLog(asset_id='AST-NEW', action='CREATE', details='legacy',
+                                                  performed_by='Admin'))
+            server.db.session.commit()
+            assets, _, replayed = server.inventory_as_of(datetime.utcnow())
+            self.assertEqual(replayed, 2)
+            self.assertEqual(assets['AST-001'], (known.asset_type, known.assigned_user))
+            self.assertEqual(assets['AST-NEW'], (None, None))
+
+    def test_sync_returns_only_changed_records(self):
+        """Delta sync reports upserts and deletes after a sequence number"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        seq = json.loads(self.app.get('/api/sync').data)['seq']
+        self.assertGreater(seq, 0)
+        empty = json.loads(self.app.get(f'/api/sync?since={seq}').data)
+        self.assertEqual(empty['assets'], {'upserted': [], 'deleted': []})
+
+        self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-001', 'assignedUser': 'Alice'})
+        self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-001', 'assignedUser': 'Bob'})
+        self.app.post('/api/assets', json={'action': 'delete', 'assetId': 'AST-002'})
+        self.app.post('/api/assets/bulk', json={'operations': [{
+            'action': 'create', 'assetId': 'AST-901', 'assetType': 'Tablet', 'assignedUser': 'Zoe',
+            'purchaseDate': '2024-01-01', 'warrantyExpiryDate': '2027-01-01'}]})
+        self.app.post('/api/licenses', json={'action': 'update', 'licenseId': 'LIC-001', 'usedSeats': 1})
+
+        delta = json.loads(self.app.get(f'/api/sync?since={seq}').data)
+        self.assertFalse(delta['reset'])
+        self.assertGreater(delta['seq'], seq)
+        upserted = {asset['assetId']: asset for asset in delta['assets']['upserted']}
+        self.assertEqual(set(upserted), {'AST-001', 'AST-901'})
+        self.assertEqual(upserted['AST-001']['assignedUser'], 'Bob')
+        self.assertEqual(delta['assets']['deleted'], ['AST-002'])
+        self.assertEqual([license['licenseId'] for license in delta['licenses']['upserted']], ['LIC-001'])
+
+        caught_up = json.loads(self.app.get(f"/api/sync?since={delta['seq']}").data)
+        self.assertEqual(caught_up['assets'], {'upserted': [], 'deleted': []})
+        self.assertTrue(json.loads(self.app.get(f"/api/sync?since={delta['seq'] + 100}").data)['reset'])
+        self.assertEqual(self.app.get('/api/sync?since=abc').status_code, 400)
+        self.app.post('/api/auth/login',
+                     json={'username': 'employee', 'password': 'emp123'})
+        self.assertEqual(self.app.get('/api/sync').status_code, 403)
+
+    def test_sync_prune_bounds_change_log(self):
+        """Pruning keeps the newest changes and resets clients whose changes were pruned"""
+        import server
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        start = json.loads(self.app.get('/api/sync').data)['seq']
+        for user in ['Alice', 'Bob', 'Carol', 'Dave']:
+            self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-001', 'assignedUser': user})
+        latest = json.loads(self.app.get('/api/sync').data)['seq']
+
+        result = app.test_cli_runner().invoke(args=['sync', 'prune', '--keep', '2'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with app.app_context():
+            seqs = [row.seq for row in server.ChangeRecord.query.order_by(server.ChangeRecord.seq)]
+        self.assertEqual(seqs, [latest - 1, latest])
+        self.assertIn(f'Pruned {latest - 2} change log rows', result.output)
+
+        self.assertTrue(json.loads(self.app.get(f'/api/sync?since={start}').data)['reset'])
+        recent = json.loads(self.app.get(f'/api/sync?since={latest - 2}').data)
+        self.assertFalse(recent['reset'])
+        self.assertEqual([asset['assignedUser'] for asset in recent['assets']['upserted']], ['Dave'])
+
+        with app.app_context():
+            self.assertEqual(server.prune_change_log(keep=0), 1)
+            self.assertEqual(server.prune_change_log(keep=0), 0)
+        self.assertEqual(json.loads(self.app.get('/api/sync').data)['seq'], latest)
+
+    def test_sync_cursor_behind_pruned_range_resets(self):
+        """A client whose next change was pruned must reload, one that missed nothing keeps syncing"""
+        import server
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        for user in ['Erin', 'Frank', 'Grace']:
+            self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-002', 'assignedUser': user})
+        with app.app_context():
+            server.prune_change_log(keep=2)
+            oldest = server.db.session.query(server.func.min(server.ChangeRecord.seq)).scalar()
+
+        behind = json.loads(self.app.get(f'/api/sync?since={oldest - 2}').data)
+        self.assertTrue(behind['reset'])
+        self.assertNotIn('assets', behind)
+        current = json.loads(self.app.get(f'/api/sync?since={oldest - 1}').data)
+        self.assertFalse(current['reset'])
+        self.assertEqual([asset['assignedUser'] for asset in current['assets']['upserted']], ['Grace'])
+
+    def test_admin_exports_stream_csv(self):
+        """Admin table exports stream CSV, gzipped on request"""
+        import csv
+        import gzip
+        import io
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        for dataset, header in [('assets', 'Asset ID'), ('licenses', 'License ID'),
+                                ('audit-log', 'ID'), ('asset-logs', 'ID')]:
+            response = self.app.get(f'/api/export/{dataset}')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_streamed)
+            self.assertIn('text/csv', response.headers['Content-Type'])
+            rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+            self.assertEqual(rows[0][0], header)
+
+        plain = self.app.get('/api/export/assets').get_data()
+        download = self.app.get('/api/export/assets?gzip=true')
+        self.assertEqual(download.headers['Content-Type'], 'application/gzip')
+        self.assertIn('assets.csv.gz', download.headers['Content-Disposition'])
+        self.assertEqual(gzip.decompress(download.get_data()), plain)
+        encoded = self.app.get('/api/export/assets', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(encoded.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(encoded.get_data()), plain)
+
+        self.assertEqual(self.app.get('/api/export/users').status_code, 404)
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        self.assertEqual(self.app.get('/api/export/assets').status_code, 403)
+
+    def test_csv_chunks_are_bounded(self):
+        """CSV export chunks stay near the chunk size however many rows there are"""
+        import gzip
+        from server import csv_chunks
+        rows = ([i, 'x' * 50] for i in range(5000))
+        chunks = list(csv_chunks(rows, chunk_bytes=4096))
+        self.assertGreater(len(chunks), 50)
+        self.assertTrue(all(len(chunk) < 4096 + 100 for chunk in chunks))
+        self.assertEqual(b''.join(chunks).count(b'\n'), 5000)
+        compressed = b''.join(csv_chunks(([i] for i in range(1000)), compress=True, chunk_bytes=256))
+        self.assertEqual(gzip.decompress(compressed).count(b'\n'), 1000)
+
+    def test_list_endpoints_stream_json_arrays(self):
+        """Large list endpoints stream a JSON array identical to the buffered one"""
+        import server
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        for url in ['/api/audit-log', '/api/assets/logs', '/api/complaints', '/api/monitoring/hardware',
+                    '/api/monitoring/network', '/api/monitoring/backup']:
+            response = self.app.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertTrue(response.is_streamed, url)
+            self.assertEqual(response.mimetype, 'application/json')
+            self.assertIsInstance(json.loads(response.data), list, url)
+
+        with app.test_request_context():
+            expected = [job.to_dict() for job in server.BackupJob.query.order_by(server.BackupJob.id).all()]
+            self.assertEqual(self.app.get('/api/monitoring/backup').data, server.jsonify(expected).data)
+            records = [{'n': i, 'text': 'x' * 40} for i in range(500)]
+            batches = [records[i:i + 10] for i in range(0, 500, 10)]
+            chunks = list(server.json_array_chunks(batches, chunk_bytes=1024))
+            self.assertGreater(len(chunks), 10)
+            self.assertEqual(json.loads(''.join(chunks)), records)
+            self.assertEqual(''.join(server.json_array_chunks([[], []])), '[]\n')
+
+    def test_get_endpoints_negotiate_msgpack(self):
+        """Accept: application/msgpack gets the same data as JSON, packed"""
+        import server
+        if server.msgpack is None:
+            self.skipTest('msgpack is not installed')
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        for url in ['/api/monitoring/hardware', '/api/monitoring/network', '/api/assets',
+                    '/api/assets?limit=2&fields=assetId', '/api/licenses?format=columnar',
+                    '/api/dashboard/metrics', '/api/sync']:
+            expected = json.loads(self.app.get(url).data)
+            response = self.app.get(url, headers={'Accept': 'application/msgpack'})
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.mimetype, 'application/msgpack', url)
+            self.assertIn('Accept', response.vary, url)
+            self.assertEqual(server.msgpack.unpackb(response.data), expected, url)
+
+        response = self.app.get('/api/assets', headers={'Accept': 'application/msgpack;q=0.5, application/json'})
+        self.assertEqual(response.mimetype, 'application/json')
+        response = self.app.get('/api/assets?format=xml', headers={'Accept': 'application/x-msgpack'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', server.msgpack.unpackb(response.data))
+        response = self.app.post('/api/assets', headers={'Accept': 'application/msgpack'},
+                                 json={'action': 'create'})
+        self.assertEqual(response.mimetype, 'application/json')
+
+        with app.test_request_context():
+            records = [{'n': i, 'when': server.date(2024, 1, 1)} for i in range(300)]
+            batches = [records[i:i + 7] for i in range(0, 300, 7)]
+            chunks = list(server.msgpack_array_chunks(batches, chunk_bytes=256))
+            self.assertGreater(len(chunks), 5)
+            self.assertEqual(server.msgpack.unpackb(b''.join(chunks)), json.loads(server.jsonify(records).data))
+
+    def test_msgpack_request_falls_back_to_json_when_not_installed(self):
+        """Without the msgpack package every client gets JSON"""
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        with mock.patch('server.msgpack', None):
+            response = self.app.get('/api/monitoring/backup', headers={'Accept': 'application/msgpack'})
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertNotIn('Accept', response.vary)
+        self.assertIsInstance(json.loads(response.data), list)
+
+    def test_row_serializers_match_to_dict(self):
+        """Column-tuple serializers produce exactly what to_dict() does"""
+        import server
+        self.app.post('/api/auth/login',
+                     json={'username': 'employee', 'password': 'emp123'})
+        self.app.post('/api/complaints', json={'assetId': 'AST-001', 'issue': 'Fan noise'})
+        self.app.post('/api/auth/login',
+                     json={'username': 'itstaff', 'password': 'it123'})
+        self.app.post('/api/assets', json={'action': 'update', 'assetId': 'AST-001', 'assignedUser': 'Alice'})
+        with app.app_context():
+            server.get_audit_writer().flush()
+            for model, serializer in server.ROW_SERIALIZERS.items():
+                query = model.query.order_by(model.id)
+                expected = [record.to_dict() for record in query.all()]
+                self.assertTrue(expected, model.__name__)
+                columns, convert = serializer.prepare()
+                self.assertEqual(convert(query.with_entities(*columns).all()), expected, model.__name__)
+
+    def seed_audit_entries(self, days_old, count):
+        """Insert audit entries spread one minute apart, starting days_old days ago"""
+        import server
+        from datetime import datetime, timedelta
+        started = datetime.utcnow() - timedelta(days=days_old)
+        with app.app_context():
+            server.db.session.add_all([
+                server.AuditLog(timestamp=started - timedelta(minutes=i), user_role='Admin',
+                                action=['LOGIN', 'UPDATE'][i % 2], details=f'Seeded {days_old}d #{i}')
+                for i in range(count)
+            ])
+            server.db.session.commit()
+
+    def test_audit_log_filters_and_keyset_pages(self):
+        """Audit log pages follow the cursor without overlap and honour filters"""
+        self.seed_audit_entries(1, 25)
+        self.app.post('/api/auth/login',
+                     json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+        seen, cursor = [], None
+        while True:
+            url = '/api/audit-log?action=UPDATE&limit=5' + (f'&after={cursor}' if cursor else '')
+            page = json.loads(self.app.get(url).data)
+            self.assertLessEqual(len(page['items']), 5)
+            seen += page['items']
+            cursor = page['nextCursor']
+            if cursor is None:
+                break
+        self.assertTrue(all(entry['action'] == 'UPDATE' for entry in seen))
+        seeded = [entry['details'] for entry in seen if entry['details'].startswith('Seeded')]
+        self.assertEqual(len(seeded), 12)
+        self.assertEqual(len(set(seeded)), 12)
+        timestamps = [entry['timestamp'] for entry in seen]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+        from datetime import datetime, timedelta
+        since = (datetime.utcnow() - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+        recent = json.loads(self.app.get(f'/api/audit-log?since={since}').data)
+        self.assertFalse(any(entry['details'].startswith('Seeded') for entry in recent))
+
+        self.assertEqual(self.app.get('/api/audit-log?after=garbage').status_code, 400)
+        self.assertEqual(self.app.get('/api/audit-log?since=yesterday').status_code, 400)
+        self.assertEqual(self.app.get('/api/audit-log?limit=0').status_code, 400)
+
+    def test_audit_retention_moves_entries_to_archive(self):
+        """Old entries move to gzip archives and are read back on request"""
+        import server
+        import tempfile
+        archive_dir = app.config['AUDIT_ARCHIVE_DIR']
+        app.config['AUDIT_ARCHIVE_DIR'] = tempfile.mkdtemp(prefix='iims-audit-')
+        try:
+            self.seed_audit_entries(120, 30)
+            self.seed_audit_entries(10, 3)
+            result = app.test_cli_runner().invoke(args=['audit', 'archive', '--days', '90'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn('Archived 30 audit entries', result.output)
+            with app.app_context():
+                self.assertEqual(server.AuditLog.query.filter(server.AuditLog.details.like('Seeded 120d%')).count(), 0)
+                self.assertTrue(server.get_audit_archive().days())
+                self.assertEqual(server.archive_audit_logs(90), 0)
+
+            self.app.post('/api/auth/login',
+                         json={'username': 'admin', 'password': 'admin123', 'mfaCode': '123456'})
+            live = json.loads(self.app.get('/api/audit-log').data)
+            self.assertFalse(any(entry['details'].startswith('Seeded 120d') for entry in live))
+
+            seen, cursor = [], None
+            while True:
+                url = '/api/audit-log?includeArchived=true&limit=7' + (f'&after={cursor}' if cursor else '')
+                page = json.loads(self.app.get(url).data)
+                seen += page['items']
+                cursor = page['nextCursor']
+                if cursor is None:
+                    break
+            archived = [entry for entry in seen if entry.get('archived')]
+            self.assertEqual(len(archived), 30)
+            self.assertEqual(len({entry['details'] for entry in archived}), 30)
+            self.assertEqual(seen[-1]['details'], 'Seeded 120d #29')
+            timestamps = [entry['timestamp'] for entry in seen]
+            self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+        finally:
+            app.config['AUDIT_ARCHIVE_DIR'] = archive_dir
+
+    def test_bearer_token_authenticates_any_client(self):
+        """The token returned by login works from a client without the cookie"""
+        response = self.app.post('/api/auth/login',
+                                json={'username': 'itstaff', 'password': 'it123'})
+        token = json.loads(response.data)['token']
+        other_client = app.test_client()
+        self.assertEqual(other_client.get('/api/complaints').status_code, 403)
+        response = other_client.get('/api/complaints', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        status = json.loads(other_client.get('/api/auth/status',
+                                             headers={'Authorization': f'Bearer {token}'}).data)
+        self.assertEqual(status, {'authenticated': True, 'role': 'IT Staff', 'user': 'itstaff'})
+
+    def test_tampered_token_is_rejected(self):
+        """A token with a modified payload or signature is treated as anonymous"""
+        response = self.app.post('/api/auth/login',
+                                json={'username': 'itstaff', 'password': 'it123'})
+        token = json.loads(response.data)['token']
+        forged = token[:-2] + ('AA' if not token.endswith('AA') else 'BB')
+        response = app.test_client().get('/api/complaints', headers={'Authorization': f'Bearer {forged}'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_is_rejected_after_logout(self):
+        """Logout revokes the token server-side, so replaying it no longer authenticates"""
+        token = json.loads(self.app.post('/api/auth/login',
+                                         json={'username': 'itstaff', 'password': 'it123'}).data)['token']
+        other_client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+        self.assertTrue(json.loads(other_client.get('/api/auth/status', headers=headers).data)['authenticated'])
+        later = json.loads(app.test_client().post('/api/auth/login',
+                                                  json={'username': 'itstaff', 'password': 'it123'}).data)['token']
+        self.assertNotEqual(later, token)
+
+        self.app.post('/api/auth/logout')
+        self.assertFalse(json.loads(other_client.get('/api/auth/status', headers=headers).data)['authenticated'])
+        # Another worker whose cached lookup has expired checks the database
+        app.extensions['auth_cache'].clear()
+        self.assertFalse(json.loads(other_client.get('/api/auth/status', headers=headers).data)['authenticated'])
+        self.assertEqual(other_client.get('/api/complaints', headers=headers).status_code, 403)
+        later_headers = {'Authorization': f'Bearer {later}'}
+        self.assertTrue(json.loads(other_client.get('/api/auth/status', headers=later_headers).data)['authenticated'])
+
+    def test_token_lookup_is_cached(self):
+        """Repeated requests with the same token do not read the users table"""
+        from tests.test_performance import count_queries
+        self.app.post('/api/auth/login', json={'username': 'itstaff', 'password': 'it123'})
+        self.app.get('/api/auth/status')
+        with app.app_context():
+            with count_queries() as statements:
+                self.app.get('/api/auth/status')
+        self.assertFalse(any('FROM users' in statement for statement in statements), statements)
+
+    def test_role_cannot_be_set_without_login(self):
+        """The role endpoint reports the signed-in role and cannot elevate it"""
+        response = self.app.post('/api/role', json={'role': 'Admin'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(json.loads(self.app.get('/api/role').data)['role'])
+        self.assertEqual(self.app.get('/api/users').status_code, 403)
+
 if __name__ == '__main__':
     unittest.main()
 